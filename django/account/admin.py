@@ -18,6 +18,7 @@ class UserAdmin(DjangoUserAdmin):
     form = UserChangeForm
     model = User
     list_display = ['username', 'email', 'role', 'participant_strand', 'is_active', 'date_joined', 'last_login']
+    list_select_related = ['role', 'participant_strand']
     search_fields = ['username', 'first_name', 'last_name', 'email']
     list_filter = ['role', 'participant_strand', 'is_active']
     readonly_fields = ['date_joined', 'last_login']
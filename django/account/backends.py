@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from .models import User
+
+
+# The version is part of every cache key, so changing it invalidates all cached users at once
+CACHE_VERSION_KEY = 'account_user_cache_version'
+
+
+def get_cache_key(user_id):
+    """
+    Returns the cache key of the user with the given id
+    """
+
+    return f'account_user_{cache.get_or_set(CACHE_VERSION_KEY, 1, None)}_{user_id}'
+
+
+def clear_cache():
+    """
+    Invalidate all cached users, e.g. after a user, role or strand has changed
+    """
+
+    try:
+        cache.incr(CACHE_VERSION_KEY)
+    except ValueError:
+        # The version isn't in the cache (e.g. it's been evicted), so nothing cached is reachable anyway
+        pass
+
+
+class UserBackend(ModelBackend):
+    """
+    Authenticates in the same way as ModelBackend, but loads the user of each request together with their role and participant strand
+
+    Nearly every request needs the role and strand (for permissions and in the dashboard templates),
+    so loading them in the same query as the user saves at least 2 queries per request.
+    If AUTH_USER_CACHE_TIMEOUT (seconds) is set, the loaded user is also cached for that long.
+    """
+
+    def get_user(self, user_id):
+        timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 0)
+        if timeout:
+            cache_key = get_cache_key(user_id)
+            user = cache.get(cache_key)
+            if user is not None:
+                return user if self.user_can_authenticate(user) else None
+
+        try:
+            user = User.objects.select_related('role', 'participant_strand').get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+
+        if timeout:
+            cache.set(cache_key, user, timeout)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,61 @@
+"""
+Process-local cache of the UserRole and ParticipantStrand tables
+
+These tables are tiny and almost never change, but are needed on nearly every request (e.g. for permissions),
+so they're loaded once per process (when first used) and kept in memory as id -> name maps.
+This allows a user's role and strand to be found from their role_id and participant_strand_id, without a database query.
+
+The cache is cleared when a UserRole or ParticipantStrand is saved or deleted (see signals.py).
+"""
+
+
+# Names of the roles and strands that the code depends on
+ROLE_ADMIN = 'admin'
+ROLE_PARTICIPANT = 'participant'
+STRAND_EDUCATION = 'education'
+STRAND_HEALTH = 'health'
+
+_user_role_names = None
+_participant_strand_names = None
+
+
+def get_user_role_names():
+    """
+    Returns a dict of all UserRoles: {id: name}
+    """
+
+    global _user_role_names
+    if _user_role_names is None:
+        from .models import UserRole
+        _user_role_names = dict(UserRole.objects.values_list('id', 'name'))
+    return _user_role_names
+
+
+def get_participant_strand_names():
+    """
+    Returns a dict of all ParticipantStrands: {id: name}
+    """
+
+    global _participant_strand_names
+    if _participant_strand_names is None:
+        from .models import ParticipantStrand
+        _participant_strand_names = dict(ParticipantStrand.objects.values_list('id', 'name'))
+    return _participant_strand_names
+
+
+def get_user_role_id(name):
+    """
+    Returns the id of the UserRole with the given name (or None if it doesn't exist)
+    """
+
+    return next((role_id for role_id, role_name in get_user_role_names().items() if role_name == name), None)
+
+
+def clear():
+    """
+    Clear the cache, so the tables are loaded again when next used
+    """
+
+    global _user_role_names, _participant_strand_names
+    _user_role_names = None
+    _participant_strand_names = None
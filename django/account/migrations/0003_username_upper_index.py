@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:21
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0002_initial_data'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Upper('username'), models.F('id'), name='account_user_upper_name_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('username'), name='account_user_username_upper_unique', violation_error_message='A user with that username already exists.'),
+        ),
+    ]
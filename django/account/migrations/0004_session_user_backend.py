@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.core.cache import caches
+from django.db import migrations
+from django.utils import timezone
+from importlib import import_module
+
+
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+USER_BACKEND = 'account.backends.UserBackend'
+# Session engines that store sessions in the database (sessions stored elsewhere, e.g. only in the cache, can't be updated here)
+DATABASE_SESSION_ENGINES = ['django.contrib.sessions.backends.db', 'django.contrib.sessions.backends.cached_db']
+
+
+def replace_session_backend(apps, old_backend, new_backend):
+    """
+    Change the authentication backend stored in each current session from old_backend to new_backend,
+    so users stay logged in when old_backend is removed from AUTHENTICATION_BACKENDS
+    """
+
+    if settings.SESSION_ENGINE not in DATABASE_SESSION_ENGINES:
+        return
+    SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+    Session = apps.get_model('sessions', 'Session')
+    for session in Session.objects.filter(expire_date__gt=timezone.now()).iterator():
+        store = SessionStore(session.session_key)
+        data = store.decode(session.session_data)
+        if data.get(BACKEND_SESSION_KEY) == old_backend:
+            data[BACKEND_SESSION_KEY] = new_backend
+            # Only the data is changed (saving the SessionStore would also extend the session's expiry date)
+            session.session_data = store.encode(data)
+            session.save(update_fields=['session_data'])
+            # Remove any copy of the session in the cache, so the updated session is read from the database
+            if hasattr(store, 'cache_key'):
+                caches[settings.SESSION_CACHE_ALIAS].delete(store.cache_key)
+
+
+def use_user_backend(apps, schema_editor):
+    replace_session_backend(apps, MODEL_BACKEND, USER_BACKEND)
+
+
+def use_model_backend(apps, schema_editor):
+    replace_session_backend(apps, USER_BACKEND, MODEL_BACKEND)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0003_username_upper_index'),
+        ('sessions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(use_user_backend, use_model_backend),
+    ]
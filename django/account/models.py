@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser, UserManager
 from django.db.models.functions import Upper
 from django.db import models
+from . import lookups
 import logging
 
 logger = logging.getLogger(__name__)
@@ -34,8 +35,10 @@ class CustomUserManager(UserManager):
         Allow users to login with case-insensitive username
 
         E.g. both "My.Name@uni.ac.uk" and "my.name@uni.ac.uk" will allow users to login
+
+        Compares the upper case usernames, rather than using username__iexact, so that the index on Upper('username') is used
         """
-        return self.get(username__iexact=username)
+        return self.alias(username_upper=Upper('username')).get(username_upper=Upper(models.Value(username)))
 
 
 class User(AbstractUser):
@@ -50,21 +53,29 @@ class User(AbstractUser):
     role = models.ForeignKey(UserRole, on_delete=models.SET_NULL, blank=True, null=True)
     participant_strand = models.ForeignKey(ParticipantStrand, on_delete=models.SET_NULL, blank=True, null=True)
 
+    @property
+    def role_name(self):
+        return lookups.get_user_role_names().get(self.role_id)
+
+    @property
+    def participant_strand_name(self):
+        return lookups.get_participant_strand_names().get(self.participant_strand_id)
+
     @property
     def is_admin(self):
-        return self.role and self.role.name == 'admin'
+        return self.role_name == lookups.ROLE_ADMIN
 
     @property
     def is_participant(self):
-        return self.role and self.role.name == 'participant'
+        return self.role_name == lookups.ROLE_PARTICIPANT
 
     @property
     def is_participant_education(self):
-        return self.is_participant and self.participant_strand.name == 'education'
+        return self.is_participant and self.participant_strand_name == lookups.STRAND_EDUCATION
 
     @property
     def is_participant_health(self):
-        return self.is_participant and self.participant_strand.name == 'health'
+        return self.is_participant and self.participant_strand_name == lookups.STRAND_HEALTH
 
     def __str__(self):
         return self.username
@@ -76,3 +87,15 @@ class User(AbstractUser):
 
     class Meta:
         ordering = [Upper('username'), 'id']
+        constraints = [
+            # Usernames are case-insensitive (see CustomUserManager), so must also be unique regardless of case
+            models.UniqueConstraint(
+                Upper('username'),
+                name='account_user_username_upper_unique',
+                violation_error_message='A user with that username already exists.'
+            ),
+        ]
+        indexes = [
+            # Used when logging in and to list users in the default ordering
+            models.Index(Upper('username'), 'id', name='account_user_upper_name_idx'),
+        ]
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from . import lookups
+from .backends import clear_cache
+from .models import User, UserRole, ParticipantStrand
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=UserRole)
+@receiver([post_save, post_delete], sender=ParticipantStrand)
+def clear_user_cache(sender, **kwargs):
+    """
+    Cached users (see backends.UserBackend) include their role and strand, so are all invalidated when any of these change
+    """
+
+    clear_cache()
+
+
+@receiver([post_save, post_delete], sender=UserRole)
+@receiver([post_save, post_delete], sender=ParticipantStrand)
+def clear_lookups(sender, **kwargs):
+    """
+    Reload the cached UserRole and ParticipantStrand tables (see lookups.py) when next used
+    """
+
+    lookups.clear()
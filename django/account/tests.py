@@ -0,0 +1,198 @@
+from django.apps import apps
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, authenticate
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from core.testing import QueryBudgetMixin, create_user
+from . import lookups
+from .lookups import ROLE_ADMIN, get_user_role_id
+from .models import ParticipantStrand, User, UserRole
+from importlib import import_module
+
+
+class AuthenticationBackendTest(TestCase):
+    """
+    Tests for the AUTHENTICATION_BACKENDS setting
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username='backend-admin', role_id=get_user_role_id(ROLE_ADMIN))
+
+    def test_login_uses_user_backend(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'account.backends.UserBackend')
+
+    def test_session_from_model_backend_is_updated_by_migration(self):
+        # A session created before UserBackend was introduced
+        session = self.client.session
+        session[SESSION_KEY] = str(self.user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = self.user.get_session_auth_hash()
+        session.save()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+        # ModelBackend isn't in AUTHENTICATION_BACKENDS, so the user isn't logged in
+        self.assertEqual(self.client.get(reverse('admin:index')).status_code, 302)
+
+        migration = import_module('account.migrations.0004_session_user_backend')
+        migration.use_user_backend(apps, None)
+        response = self.client.get(reverse('admin:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, self.user)
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'account.backends.UserBackend')
+
+
+class AdminQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """
+    The number of queries made by the admin pages mustn't grow with the number of objects shown (e.g. one query per row)
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('budget-admin', lookups.ROLE_ADMIN)
+        for i in range(30):
+            create_user(f'budget-participant-{i}', lookups.ROLE_PARTICIPANT, (lookups.STRAND_EDUCATION, lookups.STRAND_HEALTH)[i % 2])
+
+    def test_user_changelist(self):
+        self.assertNumQueriesForPage(7, self.admin, reverse('admin:account_user_changelist'))
+
+    def test_user_change(self):
+        participant = User.objects.get(username='budget-participant-0')
+        self.assertNumQueriesForPage(7, self.admin, reverse('admin:account_user_change', args=[participant.pk]))
+
+
+class LookupsTest(TestCase):
+    """
+    The cached UserRole and ParticipantStrand tables (see lookups.py) must change as soon as the tables change (see signals.py)
+    """
+
+    def setUp(self):
+        # The cache isn't rolled back with the database after each test
+        self.addCleanup(lookups.clear)
+        self.user = create_user('lookups-user', lookups.ROLE_PARTICIPANT, lookups.STRAND_EDUCATION)
+
+    def test_tables_are_cached(self):
+        lookups.get_user_role_names()
+        lookups.get_participant_strand_names()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.user.role_name, lookups.ROLE_PARTICIPANT)
+            self.assertEqual(self.user.participant_strand_name, lookups.STRAND_EDUCATION)
+
+    def test_user_roles(self):
+        self.assertIsNone(lookups.get_user_role_id('observer'))
+        role = UserRole.objects.create(name='observer')
+        self.assertEqual(lookups.get_user_role_id('observer'), role.pk)
+        role.name = 'visitor'
+        role.save()
+        self.assertEqual(lookups.get_user_role_names()[role.pk], 'visitor')
+        self.assertIsNone(lookups.get_user_role_id('observer'))
+        role.delete()
+        self.assertNotIn(role.pk, lookups.get_user_role_names())
+
+    def test_participant_strands(self):
+        strand = ParticipantStrand.objects.create(name='arts')
+        self.assertEqual(lookups.get_participant_strand_names()[strand.pk], 'arts')
+        self.user.participant_strand = strand
+        self.user.save()
+        self.assertEqual(self.user.participant_strand_name, 'arts')
+        strand.name = 'humanities'
+        strand.save()
+        self.assertEqual(self.user.participant_strand_name, 'humanities')
+        strand.delete()
+        self.assertNotIn(strand.pk, lookups.get_participant_strand_names())
+
+
+@override_settings(AUTH_USER_CACHE_TIMEOUT=60)
+class UserCacheTest(TestCase):
+    """
+    Users cached by UserBackend (when AUTH_USER_CACHE_TIMEOUT is set) must change as soon as the user, their role or strand changes
+    """
+
+    def setUp(self):
+        # The cache isn't rolled back with the database after each test
+        cache.clear()
+        self.addCleanup(lookups.clear)
+        self.user = create_user('cached-user', lookups.ROLE_ADMIN)
+        self.client.force_login(self.user)
+
+    def get_request_user(self):
+        return self.client.get(reverse('admin:index')).wsgi_request.user
+
+    def test_user_is_cached(self):
+        self.get_request_user()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get_request_user(), self.user)
+        self.assertFalse([query for query in queries if f'FROM "{User._meta.db_table}"' in query['sql']])
+
+    def test_changed_user(self):
+        self.assertTrue(self.get_request_user().is_admin)
+        self.user.role_id = lookups.get_user_role_id(lookups.ROLE_PARTICIPANT)
+        self.user.first_name = 'Changed'
+        self.user.save()
+        user = self.get_request_user()
+        self.assertEqual(user.first_name, 'Changed')
+        self.assertFalse(user.is_admin)
+
+    def test_changed_role(self):
+        self.assertEqual(self.get_request_user().role.name, lookups.ROLE_ADMIN)
+        UserRole.objects.filter(pk=self.user.role_id).update(name='renamed')
+        # Not yet invalidated, as update() doesn't send signals
+        self.assertEqual(self.get_request_user().role.name, lookups.ROLE_ADMIN)
+        role = UserRole.objects.get(pk=self.user.role_id)
+        role.save()
+        self.assertEqual(self.get_request_user().role.name, 'renamed')
+
+    def test_deleted_user(self):
+        self.get_request_user()
+        self.user.delete()
+        self.assertTrue(self.get_request_user().is_anonymous)
+
+
+class UsernameTest(TestCase):
+    """
+    Usernames are case-insensitive when logging in and must be unique regardless of case
+    """
+
+    def setUp(self):
+        self.user = create_user('My.Name@example.com', lookups.ROLE_PARTICIPANT, lookups.STRAND_EDUCATION)
+        self.user.set_password('password')
+        self.user.save()
+
+    def test_login_with_any_case(self):
+        for username in ('My.Name@example.com', 'my.name@example.com', 'MY.NAME@EXAMPLE.COM'):
+            with self.subTest(username=username):
+                self.assertEqual(authenticate(username=username, password='password'), self.user)
+        self.assertIsNone(authenticate(username='my.name@example', password='password'))
+
+    def test_login_after_username_changes(self):
+        self.user.username = 'New.Name@example.com'
+        self.user.save()
+        self.assertEqual(authenticate(username='new.name@example.com', password='password'), self.user)
+        self.assertIsNone(authenticate(username='my.name@example.com', password='password'))
+
+    def test_usernames_that_only_differ_by_case_are_rejected(self):
+        with self.assertRaises(IntegrityError):
+            User.objects.create(username='MY.NAME@example.com')
+
+    def test_admin_reports_usernames_that_only_differ_by_case(self):
+        self.client.force_login(create_user('username-admin', lookups.ROLE_ADMIN))
+        response = self.client.post(reverse('admin:account_user_add'), {
+            'username': 'my.name@EXAMPLE.com',
+            'password1': 'a-long-password-1',
+            'password2': 'a-long-password-1',
+        })
+        self.assertContains(response, 'A user with that username already exists.')
+        self.assertEqual(User.objects.filter(username__iexact='my.name@example.com').count(), 1)
+
+    def test_login_lookup_uses_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Checks the SQLite query plan')
+        with CaptureQueriesContext(connection) as queries:
+            User.objects.get_by_natural_key('my.name@example.com')
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {queries[0]["sql"]}')
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('USING INDEX', plan)
+        self.assertNotIn('SCAN', plan)
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from chunkedupload.models import UploadSession
+from datetime import timedelta
+
+
+class Command(BaseCommand):
+    """
+    Delete chunked uploads (and their files) that haven't been updated for CHUNKED_UPLOAD_EXPIRY seconds,
+    i.e. uploads that were abandoned or never attached to an object
+
+    Should be run regularly, e.g. daily using cron
+    """
+
+    help = 'Deletes chunked uploads that have expired'
+
+    def handle(self, *args, **options):
+        expired = timezone.now() - timedelta(seconds=settings.CHUNKED_UPLOAD_EXPIRY)
+        deleted = 0
+        # Deleted one at a time, so that each upload's file is deleted too
+        for session in UploadSession.objects.filter(
+            Q(last_updated__lt=expired) | Q(last_updated__isnull=True, created__lt=expired)
+        ).iterator():
+            session.delete()
+            deleted += 1
+        self.stdout.write(f'Deleted {deleted} expired uploads')
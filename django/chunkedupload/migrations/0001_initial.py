@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.BigIntegerField(help_text='Size of the complete file, in bytes')),
+                ('chunk_size', models.IntegerField(help_text='Size of each chunk (except the last), in bytes')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_updated', models.DateTimeField(blank=True, null=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset', models.BigIntegerField()),
+                ('size', models.IntegerField()),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='chunkedupload.uploadsession')),
+            ],
+            options={
+                'ordering': ['offset'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='uploadchunk',
+            constraint=models.UniqueConstraint(fields=('session', 'offset'), name='chunkedupload_uploadchunk_unique_offset'),
+        ),
+    ]
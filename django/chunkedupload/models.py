@@ -0,0 +1,140 @@
+from django.db import models
+from django.db.models import Sum
+from django.utils import timezone
+from account.models import User
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+class UploadSession(models.Model):
+    """
+    A file that's being uploaded in chunks (see views.py), so that large files (e.g. audio and video recordings)
+    can be uploaded in parallel requests and resumed if the connection drops
+
+    Chunks are written to a file in the 'data' folder of this app at their offset, so they can arrive in any order.
+    Once all chunks have been received, the file is attached to a model's file field when its admin form is saved (see widgets.py)
+    """
+
+    related_name = 'upload_sessions'
+
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField(help_text='Size of the complete file, in bytes')
+    chunk_size = models.IntegerField(help_text='Size of each chunk (except the last), in bytes')
+
+    author = models.ForeignKey(User, related_name=related_name, on_delete=models.CASCADE)
+    created = models.DateTimeField(default=timezone.now)
+    last_updated = models.DateTimeField(blank=True, null=True)
+
+    @classmethod
+    def get_in_progress(cls, user):
+        """
+        Returns the user's uploads whose file is still in the 'data' folder,
+        i.e. that haven't been attached to a model, cancelled or deleted by clear_expired_uploads yet
+        """
+        return [session for session in cls.objects.filter(author=user).only('id', 'size') if os.path.exists(session.file_path)]
+
+    @property
+    def file_path(self):
+        return os.path.join(DATA_PATH, f'{self.pk}.part')
+
+    @property
+    def received_offsets(self):
+        """
+        Returns a list of the offsets of all chunks received so far, in order
+        """
+        return list(self.chunks.order_by('offset').values_list('offset', flat=True))
+
+    @property
+    def received_size(self):
+        return self.chunks.aggregate(received_size=Sum('size'))['received_size'] or 0
+
+    @property
+    def is_complete(self):
+        return self.received_size == self.size
+
+    def get_offset(self):
+        """
+        Returns the number of bytes received without any gaps from the start of the file (the 'Upload-Offset' in tus)
+        """
+
+        offset = 0
+        for chunk_offset, chunk_size in self.chunks.order_by('offset').values_list('offset', 'size'):
+            if chunk_offset != offset:
+                break
+            offset += chunk_size
+        return offset
+
+    def create_file(self):
+        """
+        Create an empty file of the full size, so that chunks can be written at their offset in any order
+        """
+
+        os.makedirs(DATA_PATH, exist_ok=True)
+        with open(self.file_path, 'wb') as file:
+            file.truncate(self.size)
+
+    def write_chunk(self, offset, stream):
+        """
+        Write a chunk that's read from the given stream (e.g. the request), starting at the given offset
+
+        Returns the size of the chunk, which must be chunk_size (or the rest of the file, for the last chunk)
+        """
+
+        expected_size = min(self.chunk_size, self.size - offset)
+        size = 0
+        with open(self.file_path, 'r+b') as file:
+            file.seek(offset)
+            while size <= expected_size:
+                data = stream.read(min(64 * 1024, expected_size + 1 - size))
+                if not data:
+                    break
+                file.write(data)
+                size += len(data)
+        if size != expected_size:
+            raise ValueError(f'Chunk at offset {offset} is {size} bytes, expected {expected_size} bytes')
+
+        self.chunks.update_or_create(offset=offset, defaults={'size': size})
+        self.last_updated = timezone.now()
+        self.save(update_fields=['last_updated'])
+        return size
+
+    def delete(self, *args, **kwargs):
+        # Delete the file (which won't exist if it's been attached to a model)
+        try:
+            os.remove(self.file_path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            logger.exception('Failed to delete upload file %s', self.file_path)
+        return super().delete(*args, **kwargs)
+
+    def __str__(self):
+        return self.filename
+
+    class Meta:
+        ordering = ['-created']
+
+
+class UploadChunk(models.Model):
+    """
+    A chunk of an UploadSession that's been received
+    """
+
+    related_name = 'chunks'
+
+    session = models.ForeignKey(UploadSession, related_name=related_name, on_delete=models.CASCADE)
+    offset = models.BigIntegerField()
+    size = models.IntegerField()
+
+    def __str__(self):
+        return f'{self.session}: {self.offset}-{self.offset + self.size}'
+
+    class Meta:
+        ordering = ['offset']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'offset'], name='chunkedupload_uploadchunk_unique_offset'),
+        ]
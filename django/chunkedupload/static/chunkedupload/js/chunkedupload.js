@@ -0,0 +1,187 @@
+// Chunked, resumable uploads of file inputs (see chunkedupload/widgets.py and chunkedupload/views.py)
+//
+// When a file is selected it's uploaded in chunks, several at a time, and failed chunks are retried.
+// If the page is reloaded (or the connection drops) and the same file is selected again, only the missing chunks are uploaded.
+// Once complete, the id of the upload is set in a hidden input and the file input is cleared, so the form doesn't upload the file again.
+
+(function () {
+
+    var CONCURRENCY = 4,
+        MAX_RETRIES = 5,
+        RETRY_DELAY = 1000;
+
+    function getCsrfToken(input) {
+        var token = input.form ? input.form.querySelector('input[name="csrfmiddlewaretoken"]') : null;
+        return token ? token.value : '';
+    }
+
+    function getStorageKey(file) {
+        // Identifies the file, so an unfinished upload of it can be resumed
+        return 'chunkedupload:' + [file.name, file.size, file.lastModified].join(':');
+    }
+
+    function request(method, url, headers, body) {
+        return new Promise(function (resolve, reject) {
+            var xhr = new XMLHttpRequest();
+            xhr.open(method, url);
+            Object.keys(headers).forEach(function (name) {
+                xhr.setRequestHeader(name, headers[name]);
+            });
+            xhr.onload = function () {
+                if (xhr.status >= 200 && xhr.status < 300) {
+                    resolve(xhr);
+                } else {
+                    reject(xhr);
+                }
+            };
+            xhr.onerror = function () {
+                reject(xhr);
+            };
+            xhr.send(body);
+        });
+    }
+
+    function withRetries(send) {
+        // Retry failed requests with an exponential backoff, except for client errors (which won't succeed if repeated)
+        function attempt(retries) {
+            return send().catch(function (xhr) {
+                if (retries >= MAX_RETRIES || (xhr.status >= 400 && xhr.status < 500)) {
+                    throw xhr;
+                }
+                return new Promise(function (resolve) {
+                    setTimeout(resolve, RETRY_DELAY * Math.pow(2, retries));
+                }).then(function () {
+                    return attempt(retries + 1);
+                });
+            });
+        }
+        return attempt(0);
+    }
+
+    function getChunks(xhr) {
+        var chunks = xhr.getResponseHeader('Upload-Chunks');
+        return chunks ? chunks.split(',').map(Number) : [];
+    }
+
+    function startUpload(input, file, csrfToken) {
+        // Resume an unfinished upload of the same file, or create a new one
+        var storageKey = getStorageKey(file),
+            url = localStorage.getItem(storageKey),
+            headers = {'X-CSRFToken': csrfToken, 'Tus-Resumable': '1.0.0'};
+
+        function create() {
+            return request('POST', input.dataset.chunkedUploadUrl, Object.assign({
+                'Upload-Length': file.size,
+                'Upload-Metadata': 'filename ' + btoa(unescape(encodeURIComponent(file.name)))
+            }, headers)).then(function (xhr) {
+                localStorage.setItem(storageKey, xhr.getResponseHeader('Location'));
+                return {url: xhr.getResponseHeader('Location'), xhr: xhr};
+            });
+        }
+
+        if (!url) {
+            return create();
+        }
+        return request('HEAD', url, headers).then(function (xhr) {
+            return {url: url, xhr: xhr};
+        }, function () {
+            // The upload has expired or been attached to an object already
+            localStorage.removeItem(storageKey);
+            return create();
+        });
+    }
+
+    function uploadFile(input, file) {
+        var csrfToken = getCsrfToken(input),
+            progress = document.getElementById(input.id + '-chunked-upload-progress'),
+            status = document.getElementById(input.id + '-chunked-upload-status'),
+            hidden = input.form.querySelector('input[name="' + input.dataset.chunkedUploadName + '"]');
+
+        hidden.value = '';
+        progress.hidden = false;
+        progress.value = 0;
+        status.textContent = 'Uploading...';
+        input.form.dataset.chunkedUploads = Number(input.form.dataset.chunkedUploads || 0) + 1;
+
+        return startUpload(input, file, csrfToken).then(function (upload) {
+            var chunkSize = Number(upload.xhr.getResponseHeader('Upload-Chunk-Size')),
+                received = getChunks(upload.xhr),
+                offsets = [],
+                uploaded = 0,
+                offset;
+
+            for (offset = 0; offset < file.size; offset += chunkSize) {
+                if (received.indexOf(offset) === -1) {
+                    offsets.push(offset);
+                } else {
+                    uploaded += Math.min(chunkSize, file.size - offset);
+                }
+            }
+            progress.max = file.size || 1;
+            progress.value = uploaded;
+
+            function next() {
+                var chunkOffset = offsets.shift();
+                if (chunkOffset === undefined) {
+                    return Promise.resolve();
+                }
+                var chunk = file.slice(chunkOffset, chunkOffset + chunkSize);
+                return withRetries(function () {
+                    return request('PATCH', upload.url, {
+                        'X-CSRFToken': csrfToken,
+                        'Tus-Resumable': '1.0.0',
+                        'Upload-Offset': chunkOffset,
+                        'Content-Type': 'application/offset+octet-stream'
+                    }, chunk);
+                }).then(function () {
+                    uploaded += chunk.size;
+                    progress.value = uploaded;
+                    return next();
+                });
+            }
+
+            var workers = [];
+            for (var i = 0; i < CONCURRENCY; i++) {
+                workers.push(next());
+            }
+            return Promise.all(workers).then(function () {
+                return request('HEAD', upload.url, {'Tus-Resumable': '1.0.0'});
+            });
+        }).then(function (xhr) {
+            localStorage.removeItem(getStorageKey(file));
+            hidden.value = xhr.getResponseHeader('Upload-Id');
+            // The file has been uploaded, so isn't uploaded again when the form is submitted
+            input.value = '';
+            status.textContent = 'Uploaded ' + file.name;
+        }).catch(function () {
+            // The file will be uploaded with the form instead
+            status.textContent = 'Upload failed, the file will be uploaded when saving';
+        }).finally(function () {
+            input.form.dataset.chunkedUploads = Number(input.form.dataset.chunkedUploads) - 1;
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('input[type="file"][data-chunked-upload-url]').forEach(function (input) {
+            if (!input.form || !window.Promise || !window.localStorage || !window.Blob) {
+                return;
+            }
+            input.addEventListener('change', function () {
+                if (input.files.length) {
+                    uploadFile(input, input.files[0]);
+                }
+            });
+            if (!input.form.dataset.chunkedUploadListener) {
+                input.form.dataset.chunkedUploadListener = '1';
+                input.form.addEventListener('submit', function (event) {
+                    // Wait for uploads to finish before saving
+                    if (Number(input.form.dataset.chunkedUploads || 0) > 0) {
+                        event.preventDefault();
+                        alert('Please wait for the upload to finish before saving');
+                    }
+                });
+            }
+        });
+    });
+
+})();
@@ -0,0 +1,205 @@
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from core.testing import create_user
+from . import models
+from .models import UploadSession
+from .widgets import ChunkedFileInput
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+import base64
+import os
+import shutil
+import tempfile
+
+
+class DataPathMixin:
+    """
+    Mixin for a TestCase that writes uploads to an empty, temporary 'data' folder
+    """
+
+    def setUp(self):
+        super().setUp()
+        data_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, data_path)
+        data_path_patch = mock.patch.object(models, 'DATA_PATH', data_path)
+        data_path_patch.start()
+        self.addCleanup(data_path_patch.stop)
+
+
+@override_settings(CHUNKED_UPLOAD_CHUNK_SIZE=4)
+class ChunkedUploadViewTest(DataPathMixin, TestCase):
+    """
+    Tests for the create_upload and upload views
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user('upload-user', 'admin')
+        self.client.force_login(self.user)
+
+    def create_upload(self, size, filename='recording.mp3'):
+        return self.client.post(reverse('chunkedupload:create'), headers={
+            'Upload-Length': str(size),
+            'Upload-Metadata': f'filename {base64.b64encode(filename.encode()).decode()}',
+        })
+
+    def send_chunk(self, url, offset, data):
+        return self.client.patch(url, data, content_type='application/offset+octet-stream', headers={'Upload-Offset': str(offset)})
+
+    def test_upload_chunks_in_any_order(self):
+        response = self.create_upload(10)
+        self.assertEqual(response.status_code, 201)
+        url = response['Location']
+        session = UploadSession.objects.get(pk=response['Upload-Id'])
+        self.assertEqual(session.filename, 'recording.mp3')
+        self.assertEqual(os.path.getsize(session.file_path), 10)
+
+        response = self.send_chunk(url, 4, b'4567')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response['Upload-Offset'], '0')
+        self.assertEqual(response['Upload-Chunks'], '4')
+        self.assertFalse(session.is_complete)
+
+        self.send_chunk(url, 8, b'89')
+        response = self.send_chunk(url, 0, b'0123')
+        self.assertEqual(response['Upload-Offset'], '10')
+        self.assertEqual(response['Upload-Chunks'], '0,4,8')
+        self.assertTrue(session.is_complete)
+        with open(session.file_path, 'rb') as f:
+            self.assertEqual(f.read(), b'0123456789')
+
+        response = self.client.head(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Upload-Offset'], '10')
+
+    def test_invalid_uploads_are_rejected(self):
+        self.assertEqual(self.client.post(reverse('chunkedupload:create'), headers={'Upload-Metadata': 'filename YS5tcDM='}).status_code, 400)
+        self.assertEqual(self.client.post(reverse('chunkedupload:create'), headers={'Upload-Length': '10'}).status_code, 400)
+        with self.settings(CHUNKED_UPLOAD_MAX_SIZE=9):
+            self.assertEqual(self.create_upload(10).status_code, 413)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_invalid_chunks_are_rejected(self):
+        url = self.create_upload(10)['Location']
+        self.assertEqual(self.send_chunk(url, 2, b'2345').status_code, 409)
+        self.assertEqual(self.send_chunk(url, 12, b'ab').status_code, 409)
+        self.assertEqual(self.send_chunk(url, 0, b'012').status_code, 400)
+        self.assertEqual(self.send_chunk(url, 0, b'01234').status_code, 400)
+        self.assertEqual(self.client.head(url)['Upload-Chunks'], '')
+
+    def test_cannot_access_other_users_upload(self):
+        url = self.create_upload(10)['Location']
+        self.client.force_login(create_user('other-upload-user', 'admin'))
+        self.assertEqual(self.client.head(url).status_code, 404)
+        self.assertEqual(self.send_chunk(url, 0, b'0123').status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+
+    def test_cancel_upload_deletes_file(self):
+        response = self.create_upload(10)
+        file_path = UploadSession.objects.get(pk=response['Upload-Id']).file_path
+        self.assertEqual(self.client.delete(response['Location']).status_code, 204)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(file_path))
+
+    @override_settings(CHUNKED_UPLOAD_MAX_USER_UPLOADS=2)
+    def test_number_of_uploads_in_progress_is_limited(self):
+        self.create_upload(10)
+        self.create_upload(10)
+        self.assertEqual(self.create_upload(10).status_code, 429)
+        # Other users have their own limit
+        self.client.force_login(create_user('other-upload-user', 'admin'))
+        self.assertEqual(self.create_upload(10).status_code, 201)
+
+    @override_settings(CHUNKED_UPLOAD_MAX_USER_SIZE=25)
+    def test_size_of_uploads_in_progress_is_limited(self):
+        first = self.create_upload(20)
+        self.assertEqual(self.create_upload(10).status_code, 413)
+        self.assertEqual(self.create_upload(5).status_code, 201)
+        # Attaching an upload (which moves its file) frees its space
+        os.remove(UploadSession.objects.get(pk=first['Upload-Id']).file_path)
+        self.assertEqual(self.create_upload(20).status_code, 201)
+
+
+@override_settings(CHUNKED_UPLOAD_CHUNK_SIZE=4)
+class ChunkedFileInputTest(DataPathMixin, TestCase):
+    """
+    Tests for widgets.ChunkedFileInput
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user('widget-user', 'admin')
+        self.session = UploadSession.objects.create(filename='recording.mp3', size=4, chunk_size=4, author=self.user)
+        self.session.create_file()
+        self.session.write_chunk(0, BytesIO(b'abcd'))
+        self.data = {'audio-chunked-upload': str(self.session.pk)}
+
+    def test_complete_upload_is_used(self):
+        value = ChunkedFileInput(user=self.user).value_from_datadict(self.data, {}, 'audio')
+        self.addCleanup(value.close)
+        self.assertEqual(value.name, 'recording.mp3')
+        self.assertEqual(value.read(), b'abcd')
+
+    def test_other_users_upload_is_ignored(self):
+        widget = ChunkedFileInput(user=create_user('other-widget-user', 'admin'))
+        self.assertIsNone(widget.value_from_datadict(self.data, {}, 'audio'))
+
+    def test_incomplete_upload_is_ignored(self):
+        session = UploadSession.objects.create(filename='recording.mp3', size=8, chunk_size=4, author=self.user)
+        session.create_file()
+        widget = ChunkedFileInput(user=self.user)
+        self.assertIsNone(widget.value_from_datadict({'audio-chunked-upload': str(session.pk)}, {}, 'audio'))
+
+    def test_complete_upload_is_kept_when_form_is_shown_again(self):
+        widget = ChunkedFileInput(user=self.user)
+        value = widget.value_from_datadict(self.data, {}, 'audio')
+        self.addCleanup(value.close)
+        html = widget.render('audio', value, {'id': 'id_audio'})
+        self.assertInHTML(f'<input type="hidden" name="audio-chunked-upload" value="{self.session.pk}">', html)
+        self.assertIn('Uploaded recording.mp3', html)
+
+    def test_no_upload_renders_empty_upload_id(self):
+        html = ChunkedFileInput(user=self.user).render('audio', None, {'id': 'id_audio'})
+        self.assertInHTML('<input type="hidden" name="audio-chunked-upload" value="">', html)
+
+
+class ClearExpiredUploadsTest(DataPathMixin, TestCase):
+    """
+    Tests for the clear_expired_uploads management command
+    """
+
+    def create_session(self, created, last_updated=None):
+        session = UploadSession.objects.create(
+            filename='recording.mp3',
+            size=4,
+            chunk_size=4,
+            author=self.user,
+            created=created,
+            last_updated=last_updated
+        )
+        session.create_file()
+        return session
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user('expired-upload-user', 'admin')
+
+    @override_settings(CHUNKED_UPLOAD_EXPIRY=60 * 60)
+    def test_deletes_expired_uploads_and_their_files(self):
+        now = timezone.now()
+        never_updated = self.create_session(now - timedelta(hours=2))
+        not_updated_recently = self.create_session(now - timedelta(hours=3), now - timedelta(hours=2))
+        updated_recently = self.create_session(now - timedelta(hours=3), now - timedelta(minutes=5))
+        created_recently = self.create_session(now - timedelta(minutes=5))
+
+        stdout = StringIO()
+        call_command('clear_expired_uploads', stdout=stdout)
+        self.assertIn('Deleted 2 expired uploads', stdout.getvalue())
+        self.assertCountEqual(UploadSession.objects.all(), [updated_recently, created_recently])
+        for session in (never_updated, not_updated_recently):
+            self.assertFalse(os.path.exists(session.file_path))
+        for session in (updated_recently, created_recently):
+            self.assertTrue(os.path.exists(session.file_path))
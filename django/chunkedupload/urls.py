@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'chunkedupload'
+
+urlpatterns = [
+    path('', views.create_upload, name='create'),
+    path('<int:pk>/', views.upload, name='upload'),
+]
@@ -0,0 +1,123 @@
+"""
+Endpoints of chunked, resumable uploads, based on the tus protocol (https://tus.io/protocols/resumable-upload)
+
+- POST upload/ creates an UploadSession: the Upload-Length header is the size of the file
+  and the Upload-Metadata header includes its base64 encoded filename, e.g. 'filename bXlmaWxlLm1wMw=='.
+  Each user can only have CHUNKED_UPLOAD_MAX_USER_UPLOADS uploads (of CHUNKED_UPLOAD_MAX_USER_SIZE in total) in progress
+- PATCH upload/<pk>/ writes a chunk, starting at the Upload-Offset header.
+  Unlike tus, chunks can be sent in any order and in parallel, as long as each starts at a multiple of Upload-Chunk-Size
+- HEAD upload/<pk>/ returns the progress of an upload, so it can be resumed (see Upload-Chunks)
+- DELETE upload/<pk>/ cancels an upload
+
+Responses include Upload-Id (used by the widget to attach the file to a form), Upload-Length, Upload-Chunk-Size,
+Upload-Offset (bytes received from the start without gaps) and Upload-Chunks (offsets of all chunks received, comma separated)
+"""
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods
+from .models import UploadSession
+import base64
+import binascii
+import os
+
+
+TUS_VERSION = '1.0.0'
+
+
+def get_filename(upload_metadata):
+    """
+    Returns the filename from the given Upload-Metadata header, e.g. 'filename bXlmaWxlLm1wMw==' returns 'myfile.mp3'
+    """
+
+    for pair in upload_metadata.split(','):
+        key, _, value = pair.strip().partition(' ')
+        if key == 'filename':
+            try:
+                return os.path.basename(base64.b64decode(value, validate=True).decode())[:255]
+            except (binascii.Error, UnicodeDecodeError):
+                return None
+    return None
+
+
+def upload_response(session, status=204):
+    response = HttpResponse(status=status)
+    response['Tus-Resumable'] = TUS_VERSION
+    response['Cache-Control'] = 'no-store'
+    response['Upload-Id'] = session.pk
+    response['Upload-Length'] = session.size
+    response['Upload-Chunk-Size'] = session.chunk_size
+    response['Upload-Offset'] = session.get_offset()
+    response['Upload-Chunks'] = ','.join(str(offset) for offset in session.received_offsets)
+    return response
+
+
+@login_required
+@require_http_methods(['POST'])
+def create_upload(request):
+    """
+    Start a new chunked upload of a file
+    """
+
+    try:
+        size = int(request.headers['Upload-Length'])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest('Upload-Length header must be the size of the file')
+    if size < 0:
+        return HttpResponseBadRequest('Upload-Length header must be the size of the file')
+    if size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+        return HttpResponse('File is too large', status=413)
+
+    # Each upload's file is created at its full size straight away, so limit the disk space each user can reserve
+    in_progress = UploadSession.get_in_progress(request.user)
+    if len(in_progress) >= settings.CHUNKED_UPLOAD_MAX_USER_UPLOADS:
+        return HttpResponse('Too many uploads in progress, finish or cancel one first', status=429)
+    if sum(session.size for session in in_progress) + size > settings.CHUNKED_UPLOAD_MAX_USER_SIZE:
+        return HttpResponse('Uploads in progress are too large in total, finish or cancel one first', status=413)
+
+    filename = get_filename(request.headers.get('Upload-Metadata', ''))
+    if not filename:
+        return HttpResponseBadRequest('Upload-Metadata header must include the filename')
+
+    session = UploadSession.objects.create(
+        filename=filename,
+        size=size,
+        chunk_size=settings.CHUNKED_UPLOAD_CHUNK_SIZE,
+        author=request.user
+    )
+    session.create_file()
+    response = upload_response(session, status=201)
+    response['Location'] = reverse('chunkedupload:upload', args=[session.pk])
+    return response
+
+
+@login_required
+@require_http_methods(['HEAD', 'PATCH', 'DELETE'])
+def upload(request, pk):
+    """
+    Write a chunk of (PATCH), get the progress of (HEAD) or cancel (DELETE) a chunked upload
+    """
+
+    session = get_object_or_404(UploadSession, pk=pk, author=request.user)
+
+    if request.method == 'DELETE':
+        session.delete()
+        return HttpResponse(status=204)
+
+    if request.method == 'PATCH':
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest('Upload-Offset header must be the offset of the chunk')
+        if offset < 0 or offset >= session.size or offset % session.chunk_size:
+            return HttpResponse(f'Upload-Offset must be a multiple of {session.chunk_size} within the file', status=409)
+        # The chunk is read from the request as it arrives, rather than being loaded into memory or a temporary file
+        try:
+            session.write_chunk(offset, request)
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e))
+
+    return upload_response(session, status=200 if request.method == 'HEAD' else 204)
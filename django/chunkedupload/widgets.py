@@ -0,0 +1,103 @@
+from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from django.forms.widgets import FILE_INPUT_CONTRADICTION, CheckboxInput
+from django.urls import reverse
+from .models import UploadSession
+import mimetypes
+import os
+
+
+class ChunkedUploadedFile(UploadedFile):
+    """
+    A file that's been uploaded in chunks (see models.UploadSession)
+
+    Like Django's TemporaryUploadedFile, it provides temporary_file_path(),
+    so the storage moves the file into place when it's saved, rather than copying it
+    """
+
+    def __init__(self, session):
+        self.upload_id = session.pk
+        super().__init__(
+            file=open(session.file_path, 'rb'),
+            name=session.filename,
+            content_type=mimetypes.guess_type(session.filename)[0] or 'application/octet-stream',
+            size=session.size
+        )
+
+    def temporary_file_path(self):
+        return self.file.name
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            # The file has been moved into place by the storage
+            pass
+
+
+def get_uploaded_file(upload_id, user):
+    """
+    Returns the ChunkedUploadedFile of the given user's complete upload, or None if there isn't one
+    """
+
+    if not str(upload_id).isdigit() or user is None:
+        return None
+    session = UploadSession.objects.filter(pk=upload_id, author=user).first()
+    if session is None or not session.is_complete or not os.path.exists(session.file_path):
+        return None
+    return ChunkedUploadedFile(session)
+
+
+class ChunkedFileInput(forms.ClearableFileInput):
+    """
+    File input that uploads the selected file in parallel chunks as soon as it's selected (see chunkedupload.js)
+    and then submits the id of the upload with the form (instead of the file itself)
+
+    If JavaScript isn't available (or the chunked upload fails) the file is uploaded with the form as usual.
+    Requires the current user, so that users can only attach their own uploads (see formfield_for_dbfield in the admin)
+    """
+
+    template_name = 'chunkedupload/widgets/chunkedfileinput.html'
+
+    class Media:
+        js = ['chunkedupload/js/chunkedupload.js']
+
+    def __init__(self, attrs=None, user=None):
+        super().__init__(attrs)
+        self.user = user
+        self.uploaded_files = {}
+
+    def upload_name(self, name):
+        """
+        Given the name of the file input, return the name of the hidden input that holds the id of its chunked upload
+        """
+        return f'{name}-chunked-upload'
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['upload_name'] = self.upload_name(name)
+        # Keep a completed upload if the form is shown again (e.g. another field is invalid), so it isn't uploaded again
+        if isinstance(value, ChunkedUploadedFile):
+            context['widget']['upload_id'] = value.upload_id
+            context['widget']['upload_filename'] = value.name
+        context['widget']['attrs']['data-chunked-upload-url'] = reverse('chunkedupload:create')
+        context['widget']['attrs']['data-chunked-upload-name'] = self.upload_name(name)
+        return context
+
+    def value_from_datadict(self, data, files, name):
+        upload_id = data.get(self.upload_name(name))
+        if not upload_id or name in files:
+            return super().value_from_datadict(data, files, name)
+
+        # Only open the uploaded file once, although this is called several times for each form
+        if upload_id not in self.uploaded_files:
+            self.uploaded_files[upload_id] = get_uploaded_file(upload_id, self.user)
+        upload = self.uploaded_files[upload_id]
+        if upload is None:
+            return super().value_from_datadict(data, files, name)
+        if not self.is_required and CheckboxInput().value_from_datadict(data, files, self.clear_checkbox_name(name)):
+            return FILE_INPUT_CONTRADICTION
+        return upload
+
+    def value_omitted_from_data(self, data, files, name):
+        return super().value_omitted_from_data(data, files, name) and self.upload_name(name) not in data
@@ -6,35 +6,82 @@ which is why they're stored in 'core' so can be shared between apps.
 """
 
 
+from collections import namedtuple
 from datetime import date, timedelta
-from django.db.models import Q
+from django.db.models import Exists, OuterRef
+
+
+# The details of the current user that permissions depend on
+PermissionUser = namedtuple('PermissionUser', ['role', 'participant_strand'])
+
+
+def get_permission_user(request):
+    """
+    Returns the PermissionUser of the current request, resolving the user's role and participant strand only once per request
+    """
+
+    permission_user = getattr(request, '_permission_user', None)
+    if permission_user is None:
+        user = request.user
+        permission_user = PermissionUser(
+            role=user.role_name,
+            participant_strand=user.participant_strand_name
+        )
+        request._permission_user = permission_user
+    return permission_user
+
+
+def is_admin(user, app_label, obj):
+    return user.role == 'admin'
+
+
+def is_admin_or_in_strand(user, app_label, obj):
+    return user.role == 'admin' or user.participant_strand == app_label
+
+
+def is_admin_or_in_strand_and_recently_created(user, app_label, obj):
+    return is_admin_or_in_strand(user, app_label, obj) and bool(obj and date.today() < (obj.created.date() + timedelta(days=14)))
+
+
+# Permission names (as passed to get_permission) and the rule that permits (returns True) or denies (returns False) access
+# Each rule is given the PermissionUser, the app label of the model (which matches the name of its strand) and the object (if any)
+PERMISSION_POLICY = {
+    # Permit admins only
+    'admin_only': is_admin,
+    # Permit all users in this strand
+    'all_users_in_strand': is_admin_or_in_strand,
+    # Permit all users in this strand if object was created within the past 2 weeks
+    'all_users_in_strand_recently_created': is_admin_or_in_strand_and_recently_created,
+}
 
 
 def get_permission(self, request, obj, permission):
     """
     Permit (return True) or deny (return False) access to the current action that calls this method.
     Used within has_view_permission(), has_view_permission(), etc. in a ModelAdmin.
-    Pass one of the permission names mentioned below (e.g. 'admin_only') to apply that permission.
+    Pass one of the permission names in PERMISSION_POLICY (e.g. 'admin_only') to apply that permission.
+
+    Decisions are remembered for the rest of the request (per model, permission and object),
+    as the admin checks the same permissions many times when rendering a single page.
     """
 
     # Ensure user is logged in
-    if request.user.is_authenticated:
+    if not request.user.is_authenticated:
+        return False
+
+    rule = PERMISSION_POLICY.get(permission)
+    if rule is None:
+        return False
 
-        # Permit admins only
-        if permission == 'admin_only':
-            if request.user.role.name == 'admin':
-                return True
-        # Permit all users in this strand
-        elif permission == 'all_users_in_strand':
-            if request.user.role.name == 'admin' or request.user.participant_strand.name == self.model._meta.app_label:
-                return True
-        # Permit all users in this strand if object was created within the past 2 weeks
-        elif permission == 'all_users_in_strand_recently_created':
-            if (request.user.role.name == 'admin' or request.user.participant_strand.name == self.model._meta.app_label) and (obj and date.today() < (obj.created.date() + timedelta(days=14))):
-                return True
+    # Unsaved objects have no pk to remember the decision by
+    if obj is not None and obj.pk is None:
+        return rule(get_permission_user(request), self.model._meta.app_label, obj)
 
-    # Deny if none of above conditions found
-    return False
+    permission_cache = request.__dict__.setdefault('_permission_cache', {})
+    key = (self.model._meta.label, permission, None if obj is None else obj.pk)
+    if key not in permission_cache:
+        permission_cache[key] = rule(get_permission_user(request), self.model._meta.app_label, obj)
+    return permission_cache[key]
 
 
 def get_queryset_by_permission(self, request, queryset_permission):
@@ -46,23 +93,30 @@ def get_queryset_by_permission(self, request, queryset_permission):
     """
 
     objects = self.model.objects.all()
+    # Load the related objects that are shown for each object (e.g. author) in the same query, rather than one query per object
+    if isinstance(self.list_select_related, (list, tuple)):
+        objects = objects.select_related(*self.list_select_related)
 
     # Ensure user is logged in
     if request.user.is_authenticated:
+        user = get_permission_user(request)
 
         # Show objects if user is participant and the author of the object or if user is an admin
         if queryset_permission == 'hide_if_participant_is_not_author':
-            if request.user.role.name == 'participant' and request.user.participant_strand.name == self.model._meta.app_label:
+            if user.role == 'participant' and user.participant_strand == self.model._meta.app_label:
                 return objects.filter(author=request.user)
-            elif request.user.role.name == 'admin':
+            elif user.role == 'admin':
                 return objects
         # Permit admins and only certain participants (if the limit_to_certain_participants field on object is set, otherwise allow all participants in strand)
         elif queryset_permission == 'limit_to_certain_participants':
-            if request.user.role.name == 'participant' and request.user.participant_strand.name == self.model._meta.app_label:
+            if user.role == 'participant' and user.participant_strand == self.model._meta.app_label:
+                # Subqueries of the many to many table (rather than joining it) so that objects aren't duplicated
+                field = self.model._meta.get_field('limit_to_certain_participants')
+                participants = field.remote_field.through.objects.filter(**{field.m2m_field_name(): OuterRef('pk')})
                 return objects.filter(
-                    Q(limit_to_certain_participants__in=[request.user]) | Q(limit_to_certain_participants=None)
+                    Exists(participants.filter(**{field.m2m_reverse_field_name(): request.user})) | ~Exists(participants)
                 )
-            elif request.user.role.name == 'admin':
+            elif user.role == 'admin':
                 return objects
 
     # Return empty queryset if none of above conditions found
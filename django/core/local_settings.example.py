@@ -19,6 +19,9 @@ DEBUG = True/False
 # Set to ['*'] if in development, or specific IP addresses and domains if in production
 ALLOWED_HOSTS = ['*']/['encv.bham.ac.uk']
 
+# Set to None if in development, or 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache) in production (see mediafiles/responses.py)
+MEDIA_SERVER = None/'x-accel-redirect'
+
 # Provide the email address for the site admin (e.g. the researcher/research team)
 ADMIN_EMAIL = '...@bham.ac.uk'
 
@@ -0,0 +1,148 @@
+"""
+Pagination of large admin changelists
+
+Classes in this script are used in admin.py in different apps (see GenericAdminView),
+which is why they're stored in 'core' so can be shared between apps.
+
+- EstimatedCountPaginator: avoids counting every row of a large table on each changelist page
+- KeysetChangeList: pages through a changelist in its default order (newest first) using the created date and id
+  of the last object on the previous page, so that deep pages cost as little as the first page
+"""
+
+
+from django.conf import settings
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from datetime import datetime
+
+
+# Query string parameters of the keyset pagination links: the object to show the page after/before
+AFTER_VAR = 'after'
+BEFORE_VAR = 'before'
+
+# Tables with fewer rows than this (according to PostgreSQL's statistics) are counted exactly
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def get_estimated_count(queryset):
+    """
+    Returns an estimate of the number of objects in the (unfiltered) queryset
+
+    PostgreSQL: uses the number of rows in the table according to PostgreSQL's statistics (maintained by autovacuum)
+    Other databases: uses a count that's cached for ADMIN_COUNT_CACHE_TIMEOUT seconds
+    """
+
+    table = queryset.model._meta.db_table
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [connection.ops.quote_name(table)])
+            row = cursor.fetchone()
+        # reltuples is -1 if the table hasn't been analysed yet
+        if row and row[0] >= ESTIMATED_COUNT_THRESHOLD:
+            return row[0]
+        return queryset.count()
+    return cache.get_or_set(f'admin_count_{queryset.db}_{table}', queryset.count, settings.ADMIN_COUNT_CACHE_TIMEOUT)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that estimates the number of objects when the changelist isn't filtered (see get_estimated_count)
+    Filtered changelists (e.g. a participant's own objects, or search results) are counted exactly
+    """
+
+    @cached_property
+    def is_estimated_count(self):
+        return not self.object_list.query.where
+
+    @cached_property
+    def count(self):
+        if self.is_estimated_count:
+            return get_estimated_count(self.object_list)
+        return super().count
+
+
+def cursor_to_str(obj):
+    return f'{obj.created.isoformat()},{obj.pk}'
+
+
+def cursor_from_str(value):
+    try:
+        created, pk = value.rsplit(',', 1)
+        return datetime.fromisoformat(created), int(pk)
+    except ValueError:
+        raise IncorrectLookupParameters(f'Invalid cursor: {value}')
+
+
+class KeysetChangeList(ChangeList):
+    """
+    ChangeList that uses keyset pagination when showing objects in their default order (newest first),
+    i.e. each page is filtered to the objects created before the last object on the previous page,
+    rather than skipping all objects on previous pages (OFFSET), which gets slower for each page.
+
+    Relies on an index of (created, id) for the model.
+    Any other order (e.g. sorting by a column or ranked search results) uses the usual page numbers.
+    """
+
+    keyset_ordering = ('-created', '-pk')
+
+    def __init__(self, request, *args, **kwargs):
+        self.after = request.GET.get(AFTER_VAR)
+        self.before = request.GET.get(BEFORE_VAR)
+        super().__init__(request, *args, **kwargs)
+        # Don't keep the current page's position in links to other changelists (e.g. filters, search and sorting)
+        for var in (AFTER_VAR, BEFORE_VAR):
+            self.params.pop(var, None)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        for var in (AFTER_VAR, BEFORE_VAR):
+            lookup_params.pop(var, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        return super().get_query_string({AFTER_VAR: None, BEFORE_VAR: None, **(new_params or {})}, remove)
+
+    @property
+    def is_keyset_paginated(self):
+        # Page numbers (e.g. from an old link) are still supported
+        return tuple(self.queryset.query.order_by) == self.keyset_ordering and not self.show_all and self.page_num == 1
+
+    def get_results(self, request):
+        self.next_page_url = self.previous_page_url = None
+        if not self.is_keyset_paginated:
+            return super().get_results(request)
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        queryset = self.queryset
+        # (created, id) is after/before the cursor, written so that the index can be searched by created
+        if self.after:
+            created, pk = cursor_from_str(self.after)
+            results = list(queryset.filter(Q(created__lt=created) | Q(pk__lt=pk), created__lte=created)[:self.list_per_page + 1])
+            has_previous, has_next = True, len(results) > self.list_per_page
+            results = results[:self.list_per_page]
+        elif self.before:
+            created, pk = cursor_from_str(self.before)
+            results = list(queryset.filter(Q(created__gt=created) | Q(pk__gt=pk), created__gte=created).reverse()[:self.list_per_page + 1])
+            has_previous, has_next = len(results) > self.list_per_page, True
+            results = results[:self.list_per_page][::-1]
+        else:
+            results = list(queryset[:self.list_per_page + 1])
+            has_previous, has_next = False, len(results) > self.list_per_page
+            results = results[:self.list_per_page]
+
+        self.result_count = paginator.count
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.show_admin_actions = not self.show_full_result_count or bool(results)
+        self.full_result_count = self.root_queryset.count() if self.show_full_result_count else None
+        self.result_list = results
+        self.can_show_all = False
+        self.multi_page = has_previous or has_next
+        self.paginator = paginator
+        self.next_page_url = self.get_query_string({AFTER_VAR: cursor_to_str(results[-1])}) if has_next and results else None
+        self.previous_page_url = self.get_query_string({BEFORE_VAR: cursor_to_str(results[0])}) if has_previous and results else None
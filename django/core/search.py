@@ -0,0 +1,232 @@
+"""
+Full text search of models in the Django admin, using the database's own full text search
+
+A full text search index is created for a model's text fields in a migration (see CreateSearchIndex and DeleteSearchIndex) and is kept up to date by the database:
+- PostgreSQL: a generated tsvector column (search_vector) with a GIN index
+- SQLite: an FTS5 virtual table (<table>_search) with triggers that update it when the model's table changes
+
+Functions in this script are used in admin.py in different apps (see custom_permissions.py for a similar approach).
+A ModelAdmin sets full_text_search_fields to the search_fields that are covered by the index.
+Other databases fall back to the default Django admin search.
+"""
+
+
+from django.contrib import admin
+from django.contrib.admin.views.main import SEARCH_VAR
+from django.db import connections, router
+from django.db.migrations.operations.base import Operation
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+import re
+
+
+# The PostgreSQL text search configuration, which determines the language used for stemming and stop words
+POSTGRES_SEARCH_CONFIG = 'english'
+
+
+class PostgresSearchBackend:
+    """
+    Full text search using a tsvector column that's generated from the text fields, with a GIN index
+    """
+
+    def create_index_sql(self, table, fields):
+        document = " || ' ' || ".join(f"coalesce(\"{field}\", '')" for field in fields)
+        return [
+            f'ALTER TABLE "{table}" ADD COLUMN "search_vector" tsvector '
+            f"GENERATED ALWAYS AS (to_tsvector('{POSTGRES_SEARCH_CONFIG}'::regconfig, {document})) STORED",
+            f'CREATE INDEX "{table}_search_vector" ON "{table}" USING GIN ("search_vector")',
+        ]
+
+    def delete_index_sql(self, table, fields):
+        # Dropping the column also drops its index
+        return [f'ALTER TABLE "{table}" DROP COLUMN "search_vector"']
+
+    def get_query(self, search_term):
+        return search_term
+
+    def matching_ids_sql(self, table, query):
+        return (
+            f'SELECT "id" FROM "{table}" WHERE "search_vector" @@ websearch_to_tsquery(%s::regconfig, %s)',
+            [POSTGRES_SEARCH_CONFIG, query]
+        )
+
+    def rank_sql(self, table, query):
+        return (
+            f'ts_rank("{table}"."search_vector", websearch_to_tsquery(%s::regconfig, %s))',
+            [POSTGRES_SEARCH_CONFIG, query]
+        )
+
+
+class SqliteSearchBackend:
+    """
+    Full text search using an FTS5 virtual table of the text fields, which is kept in sync with the model's table by triggers
+    """
+
+    def create_index_sql(self, table, fields):
+        search_table = f'{table}_search'
+        columns = ', '.join(f'"{field}"' for field in fields)
+        new_values = ', '.join(f'new."{field}"' for field in fields)
+        old_values = ', '.join(f'old."{field}"' for field in fields)
+        delete_old = f'INSERT INTO "{search_table}"("{search_table}", rowid, {columns}) VALUES (\'delete\', old."id", {old_values});'
+        insert_new = f'INSERT INTO "{search_table}"(rowid, {columns}) VALUES (new."id", {new_values});'
+        return [
+            f'CREATE VIRTUAL TABLE "{search_table}" USING fts5({columns}, '
+            f"content='{table}', content_rowid='id', tokenize='porter unicode61')",
+            f'CREATE TRIGGER "{search_table}_insert" AFTER INSERT ON "{table}" BEGIN {insert_new} END',
+            f'CREATE TRIGGER "{search_table}_delete" AFTER DELETE ON "{table}" BEGIN {delete_old} END',
+            f'CREATE TRIGGER "{search_table}_update" AFTER UPDATE OF {columns} ON "{table}" BEGIN {delete_old} {insert_new} END',
+            # Index the existing rows
+            f'INSERT INTO "{search_table}"("{search_table}") VALUES (\'rebuild\')',
+        ]
+
+    def delete_index_sql(self, table, fields):
+        search_table = f'{table}_search'
+        return [
+            f'DROP TRIGGER IF EXISTS "{search_table}_insert"',
+            f'DROP TRIGGER IF EXISTS "{search_table}_delete"',
+            f'DROP TRIGGER IF EXISTS "{search_table}_update"',
+            f'DROP TABLE IF EXISTS "{search_table}"',
+        ]
+
+    def get_query(self, search_term):
+        # Quote each word of the search term (so it can't be read as FTS5 query syntax) and match words starting with it
+        return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', search_term))
+
+    def matching_ids_sql(self, table, query):
+        return (f'SELECT rowid FROM "{table}_search" WHERE "{table}_search" MATCH %s', [query])
+
+    def rank_sql(self, table, query):
+        # FTS5's rank is lower for better matches, so is negated to match PostgreSQL (where higher is better)
+        # The matches are found once (LIMIT -1 stops SQLite moving the rowid condition into the FTS5 query,
+        # which would repeat the whole search for every row) and then looked up by rowid
+        return (
+            f'COALESCE((SELECT -matches.rank FROM (SELECT rowid, rank FROM "{table}_search" WHERE "{table}_search" MATCH %s LIMIT -1) matches '
+            f'WHERE matches.rowid = "{table}"."id"), 0)',
+            [query]
+        )
+
+
+SEARCH_BACKENDS = {
+    'postgresql': PostgresSearchBackend(),
+    'sqlite': SqliteSearchBackend(),
+}
+
+
+def get_search_backend(using):
+    """
+    Returns the search backend of the given database alias, or None if full text search isn't supported for that database
+    """
+
+    return SEARCH_BACKENDS.get(connections[using].vendor)
+
+
+class CreateSearchIndex(Operation):
+    """
+    Migration operation that creates a full text search index of the given text fields of a model
+    """
+
+    reversible = True
+
+    def __init__(self, model_name, fields):
+        self.model_name = model_name
+        self.fields = fields
+
+    def deconstruct(self):
+        return (self.__class__.__qualname__, [], {'model_name': self.model_name, 'fields': self.fields})
+
+    def state_forwards(self, app_label, state):
+        # The index isn't part of the model's state, as it's only used by the search functions below
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._execute(app_label, schema_editor, to_state, 'create_index_sql')
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._execute(app_label, schema_editor, from_state, 'delete_index_sql')
+
+    def _execute(self, app_label, schema_editor, state, method_name):
+        backend = SEARCH_BACKENDS.get(schema_editor.connection.vendor)
+        if backend is not None:
+            table = state.apps.get_model(app_label, self.model_name)._meta.db_table
+            for sql in getattr(backend, method_name)(table, self.fields):
+                schema_editor.execute(sql)
+
+    def describe(self):
+        return f'Create full text search index on {self.model_name}'
+
+
+class DeleteSearchIndex(CreateSearchIndex):
+    """
+    Migration operation that deletes the full text search index of a model (the reverse of CreateSearchIndex)
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._execute(app_label, schema_editor, from_state, 'delete_index_sql')
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._execute(app_label, schema_editor, to_state, 'create_index_sql')
+
+    def describe(self):
+        return f'Delete full text search index on {self.model_name}'
+
+
+def is_full_text_search(self, using):
+    """
+    Returns True if the full text search index is used to search this ModelAdmin's objects in the given database
+    """
+
+    return bool(getattr(self, 'full_text_search_fields', None)) and get_search_backend(using) is not None
+
+
+def get_search_results(self, request, queryset, search_term):
+    """
+    Search the objects of a ModelAdmin, annotating each matching object with its search_rank (higher is a better match).
+    Used within get_search_results() in a ModelAdmin.
+
+    The full_text_search_fields are searched using the full text search index.
+    The other search_fields are searched as usual, except for 'id' (which must match exactly)
+    and related fields (which are searched in the related table, so this table isn't scanned).
+    """
+
+    search_term = search_term.strip()
+    if not search_term or not is_full_text_search(self, queryset.db):
+        return admin.ModelAdmin.get_search_results(self, request, queryset, search_term)
+
+    backend = get_search_backend(queryset.db)
+    table = self.model._meta.db_table
+    query = backend.get_query(search_term)
+
+    if query:
+        matches = Q(pk__in=RawSQL(*backend.matching_ids_sql(table, query)))
+        rank = RawSQL(*backend.rank_sql(table, query), output_field=FloatField())
+    else:
+        matches = Q(pk__in=[])
+        rank = Value(0.0, output_field=FloatField())
+
+    for search_field in self.get_search_fields(request):
+        if search_field in self.full_text_search_fields:
+            continue
+        elif search_field == 'id':
+            if search_term.isdigit():
+                matches |= Q(pk=int(search_term))
+        elif '__' in search_field:
+            field_name, related_field_name = search_field.split('__', 1)
+            related_model = self.model._meta.get_field(field_name).related_model
+            matches |= Q(**{
+                f'{field_name}__in': related_model.objects.filter(**{f'{related_field_name}__icontains': search_term}).values('pk')
+            })
+        else:
+            matches |= Q(**{f'{search_field}__icontains': search_term})
+
+    return queryset.filter(matches).annotate(search_rank=rank), False
+
+
+def get_ordering(self, request):
+    """
+    Order the results of a full text search by their search_rank (best matches first), otherwise use the default ordering.
+    Used within get_ordering() in a ModelAdmin.
+    """
+
+    if request.GET.get(SEARCH_VAR, '').strip() and is_full_text_search(self, router.db_for_read(self.model)):
+        return ['-search_rank', *self.model._meta.ordering]
+    return admin.ModelAdmin.get_ordering(self, request)
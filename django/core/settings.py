@@ -22,10 +22,12 @@ INSTALLED_APPS = [
     'ckeditor_uploader',
     # Custom apps
     'account',
+    'chunkedupload',
     'downloaddata',
     'education',
     'general',
-    'health'
+    'health',
+    'mediafiles'
 ]
 
 MIDDLEWARE = [
@@ -66,6 +68,13 @@ WSGI_APPLICATION = 'core.wsgi.application'
 
 AUTH_USER_MODEL = 'account.User'
 
+# Loads the role and participant strand of each request's user in the same query as the user
+# (sessions of users logged in before it was introduced are updated to use it by migration account/0004_session_user_backend)
+AUTHENTICATION_BACKENDS = ['account.backends.UserBackend']
+# Cache the user of each request for this many seconds (0 to disable)
+# Only enable when using a cache shared by all processes (e.g. Redis or Memcached), so that changes to users invalidate the cache everywhere
+AUTH_USER_CACHE_TIMEOUT = 0
+
 
 # Password validation
 
@@ -107,6 +116,25 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static/")
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Media files are only sent to users permitted to view them (see mediafiles app), by the web server set in MEDIA_SERVER:
+# 'x-accel-redirect' (nginx), 'x-sendfile' (Apache with mod_xsendfile) or None (Django, for development)
+MEDIA_SERVER = None
+# The internal nginx location that serves MEDIA_ROOT (for 'x-accel-redirect')
+MEDIA_INTERNAL_URL = '/protected-media/'
+# Thumbnails of uploaded images (e.g. in admin lists) are THUMBNAIL_SIZE (width, height) pixels
+# Thumbnails are cached, with the least recently used deleted once the cache exceeds THUMBNAIL_CACHE_MAX_SIZE (bytes)
+THUMBNAIL_SIZE = (100, 100)
+THUMBNAIL_CACHE_MAX_SIZE = 1024 * 1024 * 256
+# Uploaded images (e.g. journal entry images and images in the rich text editor) are processed in the background
+# by the run_image_worker command (see mediafiles/images.py): rotated to match their EXIF orientation, EXIF data removed,
+# resized to fit within IMAGE_MAX_SIZE (width, height) pixels and compressed. A WebP copy is also created at each of IMAGE_VARIANT_WIDTHS (pixels)
+IMAGE_MAX_SIZE = (2560, 2560)
+IMAGE_QUALITY = 85
+IMAGE_VARIANT_WIDTHS = (480, 960, 1600)
+# A job that has been running for longer than IMAGE_JOB_TIMEOUT (seconds), e.g. because its worker was stopped, is run again by another worker,
+# up to IMAGE_JOB_MAX_ATTEMPTS times in total (after which it's marked as failed)
+IMAGE_JOB_TIMEOUT = 60 * 10
+IMAGE_JOB_MAX_ATTEMPTS = 3
 
 
 # Default primary key field type
@@ -115,13 +143,31 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Data exports (see downloaddata app)
+# Export files are cached and reused while the exported data is unchanged
+# Files are deleted once older than EXPORT_CACHE_MAX_AGE (seconds) or when the cache exceeds EXPORT_CACHE_MAX_SIZE (bytes)
+EXPORT_CACHE_MAX_AGE = 60 * 60 * 24 * 7
+EXPORT_CACHE_MAX_SIZE = 1024 * 1024 * 1024
+# Identical export requests wait for the one already in progress, unless it has been running for longer than EXPORT_JOB_TIMEOUT (seconds)
+EXPORT_JOB_TIMEOUT = 60 * 30
+# Engine used to create Word exports: 'ooxml' (streaming, for large exports) or 'python-docx' (reference implementation)
+EXPORT_WORD_ENGINE = 'ooxml'
+
+
+# Admin
+# Unfiltered admin changelists show a count of objects that's cached for ADMIN_COUNT_CACHE_TIMEOUT (seconds)
+# (on PostgreSQL, large tables use PostgreSQL's own estimate instead, see core/pagination.py)
+ADMIN_COUNT_CACHE_TIMEOUT = 60
+
+
 # CKEditor
 # Image File uploads via CKEditor
 CKEDITOR_UPLOAD_PATH = 'cke_uploads/'  # will be based within MEDIA dir
 CKEDITOR_ALLOW_NONIMAGE_FILES = False  # only allow images to be uploaded
 CKEDITOR_IMAGE_BACKEND = 'ckeditor_uploader.backends.PillowBackend'
 CKEDITOR_THUMBNAIL_SIZE = (100, 100)
-CKEDITOR_FORCE_JPEG_COMPRESSION = True
+# Images are compressed (and their EXIF data removed) after they've been rotated by the run_image_worker command instead
+CKEDITOR_FORCE_JPEG_COMPRESSION = False
 CKEDITOR_IMAGE_QUALITY = 90
 # Configuration
 # For full list of configurations, see: https://ckeditor.com/docs/ckeditor4/latest/api/CKEDITOR_config.html
@@ -195,11 +241,25 @@ if not SECRET_KEY:  # NOQA
 
 # Default STORAGES from Django documentation
 # See: https://docs.djangoproject.com/en/4.2/ref/settings/#std-setting-STORAGES
+# The default storage queues uploaded images to be processed (see mediafiles/storage.py)
 STORAGES = {
-    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "default": {"BACKEND": "mediafiles.storage.MediaStorage"},
     "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
 }
 
 # Use ManifestStaticFilesStorage when not in debug mode
 if not DEBUG:  # NOQA
     STORAGES['staticfiles'] = {"BACKEND": "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"}
+
+
+# Chunked uploads (see chunkedupload app)
+# Large files are uploaded in chunks of CHUNKED_UPLOAD_CHUNK_SIZE (bytes), each in its own request,
+# so the web server's maximum request size (e.g. client_max_body_size in nginx) must be larger than this
+CHUNKED_UPLOAD_CHUNK_SIZE = 1024 * 1024 * 8
+CHUNKED_UPLOAD_MAX_SIZE = 1024 * 1024 * 1024 * 10
+# Each user can have up to CHUNKED_UPLOAD_MAX_USER_UPLOADS uploads in progress (not yet attached, cancelled or expired),
+# of up to CHUNKED_UPLOAD_MAX_USER_SIZE (bytes) in total, as disk space for the whole file is reserved when an upload starts
+CHUNKED_UPLOAD_MAX_USER_UPLOADS = 10
+CHUNKED_UPLOAD_MAX_USER_SIZE = 1024 * 1024 * 1024 * 20
+# Uploads that haven't been updated for CHUNKED_UPLOAD_EXPIRY (seconds) are deleted by the clear_expired_uploads command
+CHUNKED_UPLOAD_EXPIRY = 60 * 60 * 24
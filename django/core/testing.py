@@ -0,0 +1,33 @@
+"""
+Helpers for the tests of each app (see tests.py in each app folder)
+"""
+
+from account import lookups
+from account.models import ParticipantStrand, User
+
+
+def create_user(username, role, participant_strand=None):
+    """
+    Create a user with the given role and (optionally) participant strand, e.g. create_user('p1', 'participant', 'education')
+    """
+
+    return User.objects.create(
+        username=username,
+        role_id=lookups.get_user_role_id(role),
+        participant_strand=ParticipantStrand.objects.get(name=participant_strand) if participant_strand else None
+    )
+
+
+class QueryBudgetMixin:
+    """
+    Mixin for a TestCase that checks the number of queries made by pages
+    """
+
+    def assertNumQueriesForPage(self, num, user, url):
+        """
+        Assert the page makes num queries once any per-process caches (e.g. of content types) have been filled
+        """
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with self.assertNumQueries(num):
+            self.assertEqual(self.client.get(url).status_code, 200)
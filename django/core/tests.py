@@ -0,0 +1,214 @@
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from account import lookups
+from education.models import JournalEntry
+from . import custom_permissions
+from .pagination import cursor_from_str
+from .testing import create_user
+from .text import html_to_text
+from datetime import timedelta
+from unittest import mock
+
+
+class HtmlToTextTest(SimpleTestCase):
+    """
+    Tests for text.html_to_text()
+    """
+
+    def test_empty(self):
+        self.assertEqual(html_to_text(None), '')
+        self.assertEqual(html_to_text(''), '')
+
+    def test_character_references(self):
+        self.assertEqual(html_to_text('<p>Fish &amp; chips&nbsp;&#39;n&#x27; peas</p>'), "Fish & chips 'n' peas")
+
+    def test_paragraphs_are_separate_lines(self):
+        self.assertEqual(html_to_text('<p>one</p><p>two</p>'), 'one\ntwo')
+        self.assertEqual(html_to_text('<p>one</p>\n\n<p>two</p>\n'), 'one\ntwo')
+
+    def test_block_ends_are_line_breaks(self):
+        html = '<h1>Title</h1><div>Div</div><blockquote>Quote</blockquote><ul><li>One</li><li>Two</li></ul><H2>End</H2>'
+        self.assertEqual(html_to_text(html), 'Title\nDiv\nQuote\nOne\nTwo\nEnd')
+
+    def test_table(self):
+        self.assertEqual(html_to_text('<table><tr><td>a</td><td>b</td></tr><tr><th>c</th></tr></table>'), 'a b\nc')
+
+    def test_line_breaks_are_kept(self):
+        self.assertEqual(html_to_text('<p>one<br>two<br /><br/>three</p>'), 'one\ntwo\n\nthree')
+
+    def test_whitespace_is_collapsed(self):
+        self.assertEqual(html_to_text('<p>\n  one \t two\n</p>\n<p>  three  </p>'), 'one two\nthree')
+        self.assertEqual(html_to_text('<p>one</p><p></p><p></p><p>two</p>'), 'one\n\ntwo')
+
+
+class FullTextSearchTest(TestCase):
+    """
+    Tests for search.get_search_results() and the index created by search.CreateSearchIndex (see education migration 0005)
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('search-admin', lookups.ROLE_ADMIN)
+        cls.author = create_user('search-author', lookups.ROLE_PARTICIPANT, lookups.STRAND_EDUCATION)
+        cls.best_match = JournalEntry.objects.create(author=cls.author, text='<p>Empathy, empathy and more empathy</p>')
+        cls.match = JournalEntry.objects.create(
+            author=cls.author,
+            text='<p>A long story about reading, culture and community, which only mentions empathy once among many other words</p>'
+        )
+        cls.other = JournalEntry.objects.create(author=cls.admin, text='<p>Nothing in common</p>', link='https://www.example.com/')
+
+    def search(self, search_term):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin:education_journalentry_changelist'), {'q': search_term})
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['cl'].result_list)
+
+    def test_best_matches_are_first(self):
+        self.assertEqual(self.search('empathy'), [self.best_match, self.match])
+
+    def test_words_are_matched_by_their_start(self):
+        self.assertEqual(self.search('empath'), [self.best_match, self.match])
+        self.assertEqual(self.search('example'), [self.other])
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.search('empathy reading'), [self.match])
+
+    def test_related_fields_are_searched(self):
+        self.assertCountEqual(self.search('search-auth'), [self.best_match, self.match])
+
+    def test_id_is_matched_exactly(self):
+        self.assertEqual(self.search(str(self.other.pk)), [self.other])
+
+    def test_query_syntax_is_ignored(self):
+        self.assertEqual(self.search('"empathy'), [self.best_match, self.match])
+        self.assertEqual(self.search('empathy OR nothing'), [])
+        self.assertEqual(self.search('(empathy* -^:'), [self.best_match, self.match])
+        self.assertEqual(self.search('"(*^-:'), [])
+
+    def test_index_is_updated_when_objects_change(self):
+        self.other.text = '<p>Now about empathy too</p>'
+        self.other.save()
+        self.match.delete()
+        self.assertEqual(self.search('empathy'), [self.best_match, self.other])
+        self.assertEqual(self.search('common'), [])
+
+
+class KeysetChangeListTest(TestCase):
+    """
+    Tests for pagination.KeysetChangeList
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('keyset-admin', lookups.ROLE_ADMIN)
+        now = timezone.now()
+        # Several journal entries created at the same time, so pages must be split by id as well as by created
+        cls.journal_entries = [
+            JournalEntry.objects.create(author=cls.admin, created=now - timedelta(minutes=minutes))
+            for minutes in (0, 1, 1, 1, 1, 2, 3)
+        ]
+        # Newest first, then highest id first
+        cls.journal_entries.sort(key=lambda journal_entry: (journal_entry.created, journal_entry.pk), reverse=True)
+
+    def setUp(self):
+        list_per_page_patch = mock.patch.object(admin.site._registry[JournalEntry], 'list_per_page', 2)
+        list_per_page_patch.start()
+        self.addCleanup(list_per_page_patch.stop)
+        self.client.force_login(self.admin)
+
+    def get_changelist(self, query_string=''):
+        response = self.client.get(reverse('admin:education_journalentry_changelist') + query_string)
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl']
+
+    def test_next_and_previous_pages(self):
+        pages = []
+        cl = self.get_changelist()
+        self.assertIsNone(cl.previous_page_url)
+        pages.append(cl.result_list)
+        while cl.next_page_url:
+            cl = self.get_changelist(cl.next_page_url)
+            pages.append(cl.result_list)
+        self.assertEqual([journal_entry for page in pages for journal_entry in page], self.journal_entries)
+        self.assertEqual(len(pages), 4)
+
+        # And back again
+        for page in reversed(pages[:-1]):
+            cl = self.get_changelist(cl.previous_page_url)
+            self.assertEqual(cl.result_list, page)
+        self.assertIsNone(cl.previous_page_url)
+        self.assertIsNotNone(cl.next_page_url)
+
+    def test_invalid_cursor(self):
+        for value in ('', 'not-a-date,1', '2024-01-31T14:00:00,id', 'no-comma'):
+            with self.subTest(value=value), self.assertRaises(IncorrectLookupParameters):
+                cursor_from_str(value)
+        # The admin shows the unfiltered changelist instead (with ?e=1)
+        response = self.client.get(reverse('admin:education_journalentry_changelist'), {'after': 'not-a-cursor'})
+        self.assertRedirects(response, reverse('admin:education_journalentry_changelist') + '?e=1', fetch_redirect_response=False)
+
+    def test_other_orders_use_page_numbers(self):
+        cl = self.get_changelist('?o=-2&p=2')
+        self.assertFalse(cl.is_keyset_paginated)
+        self.assertIsNone(cl.next_page_url)
+        self.assertEqual(cl.page_num, 2)
+        self.assertEqual(len(cl.result_list), 2)
+        self.assertEqual(cl.result_count, len(self.journal_entries))
+
+    def test_page_numbers_are_still_supported(self):
+        cl = self.get_changelist('?p=3')
+        self.assertFalse(cl.is_keyset_paginated)
+        self.assertEqual(list(cl.result_list), self.journal_entries[4:6])
+
+
+class PermissionCacheTest(TestCase):
+    """
+    Permission decisions (see custom_permissions.get_permission) are remembered for the rest of a request only
+    """
+
+    def setUp(self):
+        self.model_admin = admin.site._registry[JournalEntry]
+        self.participant = create_user('permission-participant', lookups.ROLE_PARTICIPANT, lookups.STRAND_EDUCATION)
+        self.recent = JournalEntry.objects.create(author=self.participant)
+        self.old = JournalEntry.objects.create(author=self.participant, created=timezone.now() - timedelta(days=30))
+
+    def get_request(self):
+        request = RequestFactory().get('/')
+        request.user = self.participant
+        return request
+
+    def test_decisions_are_remembered_for_the_request(self):
+        request = self.get_request()
+        rule = mock.Mock(wraps=custom_permissions.is_admin_or_in_strand)
+        with mock.patch.dict(custom_permissions.PERMISSION_POLICY, {'all_users_in_strand': rule}):
+            for _ in range(3):
+                self.assertTrue(self.model_admin.has_view_permission(request))
+                self.assertTrue(self.model_admin.has_view_permission(request, self.recent))
+        self.assertEqual(rule.call_count, 2)
+
+    def test_decisions_are_per_object(self):
+        request = self.get_request()
+        self.assertTrue(self.model_admin.has_change_permission(request, self.recent))
+        self.assertFalse(self.model_admin.has_change_permission(request, self.old))
+        self.assertFalse(self.model_admin.has_change_permission(request, JournalEntry(author=self.participant, created=self.old.created)))
+        self.assertTrue(self.model_admin.has_change_permission(request, JournalEntry(author=self.participant)))
+
+    def test_changes_to_the_user_apply_to_the_next_request(self):
+        self.assertTrue(self.model_admin.has_view_permission(self.get_request()))
+        self.participant.participant_strand_id = None
+        self.participant.save()
+        self.assertFalse(self.model_admin.has_view_permission(self.get_request()))
+        self.participant.role_id = lookups.get_user_role_id(lookups.ROLE_ADMIN)
+        self.participant.save()
+        request = self.get_request()
+        self.assertTrue(self.model_admin.has_view_permission(request))
+        self.assertTrue(self.model_admin.has_delete_permission(request, self.old))
+
+    def test_changes_to_the_object_apply_to_the_next_request(self):
+        self.assertFalse(self.model_admin.has_change_permission(self.get_request(), self.old))
+        self.old.created = timezone.now()
+        self.old.save()
+        self.assertTrue(self.model_admin.has_change_permission(self.get_request(), self.old))
@@ -0,0 +1,50 @@
+"""
+Functions for working with text that are shared between apps
+"""
+
+from html import unescape
+import re
+
+
+# Matches an HTML tag, an HTML character reference (e.g. '&amp;', '&#39;', '&#x27;') or a run of whitespace
+TAG_CHARACTER_REFERENCE_OR_WHITESPACE = re.compile(r'<[^>]*>|&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[a-zA-Z][a-zA-Z0-9]*);|\s+')
+# Matches tags that represent a line break
+LINE_BREAK_TAG = re.compile(r'<br\b', re.IGNORECASE)
+# Matches closing tags of block elements, which end a line
+BLOCK_END_TAG = re.compile(r'</(?:p|div|li|h[1-6]|tr|blockquote)\s*>', re.IGNORECASE)
+# Matches closing tags of table cells, which are separated by a space
+CELL_END_TAG = re.compile(r'</t[dh]\s*>', re.IGNORECASE)
+# Matches spaces at the start or end of a line
+SPACES_AROUND_LINE_BREAK = re.compile(r' *\n *')
+# Matches more than one blank line
+BLANK_LINES = re.compile(r'\n{3,}')
+
+
+def html_to_text_replacement(match):
+    value = match.group(0)
+    # Tags
+    if value[0] == '<':
+        if LINE_BREAK_TAG.match(value) or BLOCK_END_TAG.match(value):
+            return '\n'
+        return ' ' if CELL_END_TAG.match(value) else ''
+    # Whitespace, which is collapsed (as in the browser)
+    if value[0] != '&':
+        return ' '
+    # Character references
+    value = unescape(value)
+    return ' ' if value == '\xa0' else value
+
+
+def html_to_text(html):
+    """
+    Convert HTML (e.g. from a rich text field) to plain text
+
+    Tags are removed, with <br> and the end of each block (e.g. paragraph, list item or heading) converted to a new line,
+    whitespace is collapsed and all character references are converted,
+    e.g. '<p>Fish &amp; chips</p><p>Peas</p>' becomes 'Fish & chips\\nPeas'
+    """
+    if not html:
+        return ''
+    text = TAG_CHARACTER_REFERENCE_OR_WHITESPACE.sub(html_to_text_replacement, html)
+    text = SPACES_AROUND_LINE_BREAK.sub('\n', text)
+    return BLANK_LINES.sub('\n\n', text).strip()
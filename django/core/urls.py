@@ -1,14 +1,17 @@
 from django.urls import path, include
 from django.contrib import admin
-from django.conf.urls.static import static
 from django.conf import settings
 
 urlpatterns = [
     # General app URLs
     path('', include('general.urls')),
     path('download/', include('downloaddata.urls')),
+    # Chunked uploads of large files
+    path('upload/', include('chunkedupload.urls')),
     # CKEditor file uploads
     path('ckeditor/', include('ckeditor_uploader.urls')),
     # Django admin
     path('dashboard/', admin.site.urls),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # Media files (user uploaded content), only sent to users permitted to view them
+    path(settings.MEDIA_URL.lstrip('/'), include('mediafiles.urls')),
+]
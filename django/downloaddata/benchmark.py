@@ -0,0 +1,249 @@
+"""
+Synthetic data and benchmarks for measuring the performance of data exports and the admin at realistic scale
+
+Used by the 'generate_synthetic_data' and 'run_benchmarks' management commands
+"""
+
+from django.contrib import admin
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from account.models import User, UserRole, ParticipantStrand
+from education import models as education_models
+from health import models as health_models
+from . import cache, excel, word
+from contextlib import contextmanager
+from datetime import timedelta
+from tempfile import TemporaryDirectory
+import os
+import random
+import time
+import tracemalloc
+import uuid
+
+
+# Size of each batch of objects inserted with bulk_create()
+BATCH_SIZE = 1000
+
+# Words used to build the rich text bodies of journal entries and conversation reflections
+WORDS = (
+    'empathy narrative culture value story reading character feeling reflection community '
+    'health education patient champion conversation listen understand share experience family'
+).split()
+
+
+def random_sentence(rng, words=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def random_rich_text(rng):
+    """
+    Returns HTML similar to that created by CKEditor, e.g. paragraphs with inline formatting and entities
+    """
+    paragraphs = []
+    for _ in range(rng.randint(1, 5)):
+        paragraphs.append(f'<p>{random_sentence(rng)} <strong>{random_sentence(rng, 3)}</strong> &amp; {random_sentence(rng)}&nbsp;</p>')
+    return '\n\n'.join(paragraphs)
+
+
+def random_media_path(rng, upload_to, extension, probability=0.3):
+    """
+    Returns a fake media file path (no file is created), or None
+    """
+    return f'{upload_to}/{uuid.UUID(int=rng.getrandbits(128)).hex[:12]}.{extension}' if rng.random() < probability else None
+
+
+def generate_synthetic_data(users=100, prompts=20, journal_entries=1000, conversations=1000, seed=None):
+    """
+    Creates synthetic users, journal entry prompts, journal entries (with prompts, rich text and fake media paths)
+    and conversations using bulk_create(). Returns a dict of the number of objects created per model.
+    """
+
+    rng = random.Random(seed)
+    run_id = uuid.UUID(int=rng.getrandbits(128)).hex[:8]
+    now = timezone.now()
+
+    # Users
+    role = UserRole.objects.get(name='participant')
+    strands = list(ParticipantStrand.objects.all())
+    password = make_password(None)  # unusable password, hashed once and shared by all synthetic users
+    user_objects = User.objects.bulk_create(
+        (
+            User(
+                username=f'synthetic.{run_id}.{i}@example.com',
+                password=password,
+                role=role,
+                participant_strand=strands[i % len(strands)] if strands else None,
+                is_staff=True,
+            )
+            for i in range(users)
+        ),
+        batch_size=BATCH_SIZE
+    )
+
+    # Journal entry prompts
+    prompt_objects = education_models.JournalEntryPrompt.objects.bulk_create(
+        (
+            education_models.JournalEntryPrompt(text=f'{random_sentence(rng, 8)} ({run_id}.{i})', order=i + 1)
+            for i in range(prompts)
+        ),
+        batch_size=BATCH_SIZE
+    )
+
+    # Journal entries and their prompts
+    upload_to_root = education_models.JournalEntry.upload_to_root
+    journal_entry_count = 0
+    for batch_start in range(0, journal_entries, BATCH_SIZE):
+        batch = []
+        for _ in range(batch_start, min(batch_start + BATCH_SIZE, journal_entries)):
+            created = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+            journal_entry = education_models.JournalEntry(
+                text=random_rich_text(rng),
+                link='https://www.example.com' if rng.random() < 0.2 else None,
+                image=random_media_path(rng, f'{upload_to_root}image', 'jpg'),
+                audio=random_media_path(rng, f'{upload_to_root}audio', 'mp3', 0.1),
+                video=random_media_path(rng, f'{upload_to_root}video', 'mp4', 0.05),
+                author=rng.choice(user_objects) if user_objects else None,
+                created=created,
+                last_updated=created + timedelta(minutes=rng.randint(0, 60)) if rng.random() < 0.5 else None,
+            )
+            # bulk_create() doesn't call save(), so set the fields that save() would
+            journal_entry.set_text_plain()
+            batch.append(journal_entry)
+        batch = education_models.JournalEntry.objects.bulk_create(batch)
+        journal_entry_count += len(batch)
+        if prompt_objects:
+            JournalEntryPromptThrough = education_models.JournalEntry.prompt.through
+            JournalEntryPromptThrough.objects.bulk_create(
+                JournalEntryPromptThrough(journalentry_id=journal_entry.id, journalentryprompt_id=prompt.id)
+                for journal_entry in batch
+                for prompt in rng.sample(prompt_objects, rng.randint(0, min(3, len(prompt_objects))))
+            )
+
+    # Conversations
+    conversation_count = 0
+    for batch_start in range(0, conversations, BATCH_SIZE):
+        batch = []
+        for _ in range(batch_start, min(batch_start + BATCH_SIZE, conversations)):
+            created = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+            batch.append(health_models.Conversation(
+                conversation_date=created.date(),
+                conversation_audio=random_media_path(rng, 'health/conversation/audio', 'mp3', 1),
+                conversation_transcript=random_media_path(rng, 'health/conversation/transcript', 'docx', 0.5),
+                cancer_champion_reflection=' '.join(random_sentence(rng) for _ in range(rng.randint(0, 5))) or None,
+                author=rng.choice(user_objects) if user_objects else None,
+                created=created,
+            ))
+        conversation_count += len(health_models.Conversation.objects.bulk_create(batch))
+
+    return {
+        'users': len(user_objects),
+        'journal_entry_prompts': len(prompt_objects),
+        'journal_entries': journal_entry_count,
+        'conversations': conversation_count,
+    }
+
+
+def measure(func):
+    """
+    Calls func() and returns its wall time (seconds), number of database queries and peak memory allocated (bytes, via tracemalloc)
+    """
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            func()
+            seconds = time.perf_counter() - start
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'seconds': round(seconds, 4),
+        'queries': len(queries),
+        'peak_memory_bytes': peak_memory,
+    }
+
+
+def changelist_benchmark(model, user, params=None):
+    """
+    Returns a function that renders the admin changelist of the given model as the given user
+    Optionally provide the changelist's query string parameters (e.g. a search term) as params
+    """
+
+    def render_changelist():
+        request = RequestFactory().get(f'/dashboard/{model._meta.app_label}/{model._meta.model_name}/', params)
+        request.user = user
+        admin.site._registry[model].changelist_view(request).render()
+    return render_changelist
+
+
+@contextmanager
+def separate_caches():
+    """
+    Stores export files in a temporary folder and uses a separate local memory cache (e.g. for admin counts),
+    so benchmarks don't leave synthetic data in the export cache or in the cache used by the site
+    """
+
+    original_data_path = cache.DATA_PATH
+    with TemporaryDirectory() as data_path, override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'benchmarks',
+        }
+    }):
+        cache.DATA_PATH = data_path
+        try:
+            yield
+        finally:
+            cache.DATA_PATH = original_data_path
+
+
+def export_benchmark(create_function, site_url):
+    """
+    Returns a function that creates an export file (then deletes it, so benchmarks don't fill the export cache)
+    """
+
+    def create_export():
+        os.remove(create_function(site_url))
+    return create_export
+
+
+def run_benchmarks(sizes, site_url='https://www.example.com', seed=0):
+    """
+    For each size, creates that many synthetic journal entries and conversations and measures the exports and admin changelists.
+    All synthetic data is rolled back after each size, so the database is left unchanged,
+    and nothing is stored in the export cache or the site's cache (see separate_caches).
+    Returns a list of results (dicts)
+    """
+
+    results = []
+    for size in sizes:
+        with separate_caches(), transaction.atomic():
+            generate_synthetic_data(
+                users=max(10, size // 100),
+                prompts=20,
+                journal_entries=size,
+                conversations=size,
+                seed=seed
+            )
+            admin_user = User.objects.create(
+                username=f'benchmark.admin.{uuid.uuid4().hex[:8]}@example.com',
+                role=UserRole.objects.get(name='admin')
+            )
+            benchmarks = {
+                'excel.create_workbook': export_benchmark(excel.create_workbook, site_url),
+                'word.create_document': export_benchmark(word.create_document, site_url),
+                'admin changelist: JournalEntry': changelist_benchmark(education_models.JournalEntry, admin_user),
+                'admin changelist: Questionnaire': changelist_benchmark(education_models.Questionnaire, admin_user),
+                'admin changelist: Conversation': changelist_benchmark(health_models.Conversation, admin_user),
+                'admin search: JournalEntry': changelist_benchmark(education_models.JournalEntry, admin_user, {'q': 'reading reflection'}),
+                'admin search: Conversation': changelist_benchmark(health_models.Conversation, admin_user, {'q': 'reading reflection'}),
+                'admin changelist: User': changelist_benchmark(User, admin_user),
+            }
+            for name, func in benchmarks.items():
+                results.append({'benchmark': name, 'size': size, **measure(func)})
+            transaction.set_rollback(True)
+    return results
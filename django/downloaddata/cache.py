@@ -0,0 +1,80 @@
+"""
+Cache of export files, so repeat downloads of an unchanged dataset don't have to be regenerated
+
+Export files are stored in the 'data' folder of this app, each with a unique file name so that concurrent exports
+can't overwrite or delete each other's files. Old files are evicted by evict() based on their age and the total size of the folder.
+"""
+
+from django.conf import settings
+from django.db.models import Count, Max
+from account.models import User
+from education import models as education_models
+from health import models as health_models
+import hashlib
+import os
+import time
+import uuid
+
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def new_file_path(extension):
+    """
+    Returns a unique file path in the data folder for a new export file with the given extension (e.g. 'xlsx')
+    """
+
+    os.makedirs(DATA_PATH, exist_ok=True)
+    file_name = f'encv_data_{time.strftime("%Y-%m-%d_%H-%M")}_{uuid.uuid4().hex[:8]}.{extension}'
+    return os.path.join(DATA_PATH, file_name)
+
+
+def get_dataset_fingerprint(file_format, site_url, since=None):
+    """
+    Returns a cheap fingerprint of the current state of the exported data
+
+    The fingerprint changes whenever an exported object is added, edited (last_updated) or deleted (count),
+    or when a prompt or username shown in the export changes (these have no last_updated, so their values are included),
+    so two exports with the same fingerprint (which includes file_format, site_url and since) contain the same data
+    """
+
+    state = [file_format, site_url, since]
+    for model in (education_models.JournalEntry, health_models.Conversation):
+        state.append(model.objects.aggregate(Count('id'), Max('id'), Max('created'), Max('last_updated')))
+    for values in (
+        education_models.JournalEntryPrompt.objects.order_by('id').values_list('id', 'order', 'text'),
+        User.objects.order_by('id').values_list('id', 'username'),
+    ):
+        digest = hashlib.sha256()
+        for row in values.iterator():
+            digest.update(repr(row).encode())
+        state.append(digest.hexdigest())
+    return hashlib.sha256(repr(state).encode()).hexdigest()
+
+
+def evict():
+    """
+    Deletes export files that are older than EXPORT_CACHE_MAX_AGE (seconds)
+    and then the oldest remaining files until the folder is no larger than EXPORT_CACHE_MAX_SIZE (bytes)
+    """
+
+    if not os.path.isdir(DATA_PATH):
+        return
+
+    files = []
+    for entry in os.scandir(DATA_PATH):
+        if entry.is_file():
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    files.sort()
+
+    oldest_allowed = time.time() - settings.EXPORT_CACHE_MAX_AGE
+    total_size = sum(size for _, size, _ in files)
+    for mtime, size, path in files:
+        if mtime >= oldest_allowed and total_size <= settings.EXPORT_CACHE_MAX_SIZE:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
@@ -1,15 +1,12 @@
 import xlsxwriter
-import os
-import glob
-import time
-from education import models as education_models
-from health import models as health_models
+from . import cache, rows
 
 
 def write_data_to_worksheet(workbook, worksheet, datamatrix, column_titles=None):
     """
     Writes provided datamatrix to the provided xlsxwriter worksheet
-    Provided datamatrix must be a matrix (aka list of list, 2D list)
+    Provided datamatrix must be an iterable of rows (e.g. a list of lists or a generator of lists),
+    which is consumed one row at a time so it can be used with a workbook in 'constant_memory' mode
     A list of column titles can be provided.
     """
 
@@ -21,17 +18,16 @@ def write_data_to_worksheet(workbook, worksheet, datamatrix, column_titles=None)
     # Allow for line breaks by setting text_wrap to True
     row_format = workbook.add_format({'text_wrap': True})
 
-    for row, dataitem in enumerate(datamatrix):
-
-        # Column titles to first row, if provided
-        if row == 0 and column_titles:
-            for col, title in enumerate(column_titles):
-                # Print column titles
-                worksheet.write(row, col, title, column_titles_style)
-                column_max_widths.append(len(str(title)))  # add initial values to column_max_widths list
-            column_titles_adjustment = 1
+    # Column titles to first row, if provided
+    if column_titles:
+        for col, title in enumerate(column_titles):
+            # Print column titles
+            worksheet.write(0, col, title, column_titles_style)
+            column_max_widths.append(len(str(title)))  # add initial values to column_max_widths list
+        column_titles_adjustment = 1
 
-        # Datamatrix
+    # Datamatrix
+    for row, dataitem in enumerate(datamatrix):
         for col, value in enumerate(dataitem):
             # Write data for each row
             worksheet.write(row + column_titles_adjustment, col, value, row_format)
@@ -46,34 +42,26 @@ def write_data_to_worksheet(workbook, worksheet, datamatrix, column_titles=None)
                 column_max_widths[col] = col_width
 
     # Set the column widths
+    # (only the column metadata is held in memory, so this is still valid after rows have been flushed to disk)
     for col, cmw in enumerate(column_max_widths):
         worksheet.set_column(col, col, cmw)
 
 
-def media_url_full(request, media_file_path):
-    """
-    Return the full URL of the media file
-    """
-    return f"{request.scheme}://{request.META['HTTP_HOST']}{media_file_path}"
-
-
-def create_workbook(request):
+def create_workbook(site_url, since=None):
     """
     Creates a spreadsheet and returns its file path
-    """
 
-    # Delete all existing files in the data folder
-    data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
-    files = glob.glob(data_path + '/*')
-    for f in files:
-        os.remove(f)
+    site_url (e.g. 'https://www.example.com') is used to build the full URLs of media files
+    If since (a datetime) is provided, only data created or updated after it is included
+    """
 
-    # Establish new file name
-    file_name = f'encv_data_{time.strftime("%Y-%m-%d_%H-%M")}.xlsx'
-    file_path = os.path.join(data_path, file_name)
+    # Establish new, unique file path
+    file_path = cache.new_file_path('xlsx')
 
     # Create workbook
-    workbook = xlsxwriter.Workbook(file_path)
+    # 'constant_memory' flushes each row to disk once the next row is started,
+    # so memory use stays flat regardless of the number of rows exported
+    workbook = xlsxwriter.Workbook(file_path, {'constant_memory': True})
 
     # Create worksheet 1: Education - Journal Entries
     columns_journal_entries = [
@@ -88,20 +76,7 @@ def create_workbook(request):
         "Created",
         "Last Updated"
     ]
-    data_journal_entries = []
-    for journal_entry in education_models.JournalEntry.objects.all().select_related('author',).prefetch_related('prompt'):
-        data_journal_entries.append([
-            journal_entry.id,
-            str(journal_entry.author),
-            journal_entry.prompts_as_str,
-            journal_entry.text,
-            journal_entry.link,
-            media_url_full(request, journal_entry.image.url) if journal_entry.image else None,
-            media_url_full(request, journal_entry.audio.url) if journal_entry.audio else None,
-            media_url_full(request, journal_entry.video.url) if journal_entry.video else None,
-            str(journal_entry.created)[:16],
-            str(journal_entry.last_updated)[:16],
-        ])
+    data_journal_entries = rows.journal_entry_rows(site_url, since=since)
     write_data_to_worksheet(
         workbook,
         workbook.add_worksheet("Education - Journal Entries"),
@@ -120,18 +95,7 @@ def create_workbook(request):
         "Created",
         "Last Updated"
     ]
-    data_conversations = []
-    for conversation in health_models.Conversation.objects.all().select_related('author',):
-        data_conversations.append([
-            conversation.id,
-            str(conversation.author),
-            str(conversation.conversation_date)[:10],
-            media_url_full(request, conversation.conversation_audio.url) if conversation.conversation_audio else None,
-            media_url_full(request, conversation.conversation_transcript.url) if conversation.conversation_transcript else None,
-            conversation.cancer_champion_reflection,
-            str(conversation.created)[:16],
-            str(conversation.last_updated)[:16],
-        ])
+    data_conversations = rows.conversation_rows(site_url, since=since)
     write_data_to_worksheet(
         workbook,
         workbook.add_worksheet("Health - Conversations"),
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from downloaddata import benchmark
+
+
+class Command(BaseCommand):
+    """
+    Fill the database with synthetic data, e.g. to try out the exports and admin at realistic scale
+
+    E.g.: python manage.py generate_synthetic_data --journal-entries 10000 --conversations 10000
+    """
+
+    help = 'Creates synthetic users, journal entry prompts, journal entries and conversations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--prompts', type=int, default=20)
+        parser.add_argument('--journal-entries', type=int, default=1000)
+        parser.add_argument('--conversations', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=None, help='Seed for the random number generator, to create repeatable data')
+        parser.add_argument('--force', action='store_true', help='Allow synthetic data to be created when DEBUG is False')
+
+    def handle(self, *args, **options):
+        # Guard against filling a production database with synthetic data by accident
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('DEBUG is False, so this may be a production database. Use --force to create synthetic data anyway.')
+
+        created = benchmark.generate_synthetic_data(
+            users=options['users'],
+            prompts=options['prompts'],
+            journal_entries=options['journal_entries'],
+            conversations=options['conversations'],
+            seed=options['seed']
+        )
+        for name, count in created.items():
+            self.stdout.write(f'Created {count} {name}')
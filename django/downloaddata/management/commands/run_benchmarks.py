@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.db import connection
+from downloaddata import benchmark
+import django
+import json
+
+
+class Command(BaseCommand):
+    """
+    Measure the data exports and main admin changelists at different data sizes and output the results as JSON
+
+    Synthetic data is created for each size inside a transaction that is rolled back, so the database is left unchanged.
+    As the transaction can lock the database (e.g. SQLite) for a long time, this is meant for development databases only.
+    Results include wall time, number of queries and peak memory (tracemalloc adds some overhead to the wall times).
+
+    E.g.: python manage.py run_benchmarks --sizes 1000 10000 100000 --output benchmarks.json
+    """
+
+    help = 'Benchmarks the data exports and admin changelists, outputting the results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='Numbers of journal entries/conversations to benchmark with')
+        parser.add_argument('--output', help='Path of a file to write the JSON results to (default: write to stdout)')
+        parser.add_argument('--force', action='store_true', help='Allow benchmarks to be run when DEBUG is False')
+
+    def handle(self, *args, **options):
+        # Guard against locking a production database with a long transaction full of synthetic data by accident
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('DEBUG is False, so this may be a production database. Use --force to run benchmarks anyway.')
+
+        report = {
+            'created': timezone.now().isoformat(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'results': benchmark.run_benchmarks(options['sizes']),
+        }
+        report_json = json.dumps(report, indent=4)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(report_json)
+        else:
+            self.stdout.write(report_json)
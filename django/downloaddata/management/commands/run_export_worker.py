@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from downloaddata import cache
+from downloaddata.models import ExportJob
+import time
+
+
+class Command(BaseCommand):
+    """
+    Process pending ExportJob objects in the background, away from the web workers
+
+    Run continuously (e.g. as a systemd service): python manage.py run_export_worker
+    Or process all pending jobs and exit (e.g. from cron): python manage.py run_export_worker --once
+    """
+
+    help = 'Claims and runs pending data export jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process all pending jobs and then exit')
+        parser.add_argument('--poll-interval', type=float, default=5, help='Seconds to wait between checks for new jobs')
+
+    def handle(self, *args, **options):
+        while True:
+            job = ExportJob.claim_next()
+            if job:
+                self.stdout.write(f'Running export job {job.pk} ({job.file_format})')
+                job.run()
+                self.stdout.write(f'Export job {job.pk} finished: {job.status}')
+                # Remove old export files so the cache stays within its size/age limits
+                cache.evict()
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,137 @@
+"""
+A ZIP file of all uploaded media files, streamed to the user as it's created
+
+The ZIP file is written to a write-only stream and its bytes are yielded as they're produced,
+so no temporary file is needed and memory use stays flat no matter how large the media files are.
+Files that are already compressed (e.g. images, audio and video) are stored as they are rather than compressed again.
+"""
+
+from django.core.files.storage import default_storage
+from education import models as education_models
+from health import models as health_models
+from . import rows
+import csv
+import io
+import os
+import zipfile
+
+
+# The media file fields included in the ZIP file
+MEDIA_FIELDS = [
+    (education_models.JournalEntry, ['image', 'audio', 'video']),
+    (health_models.Conversation, ['conversation_audio', 'conversation_transcript']),
+]
+
+# Files with these extensions are already compressed, so are stored in the ZIP file without compression
+COMPRESSED_EXTENSIONS = {
+    # Images
+    'jpg', 'jpeg', 'png', 'gif', 'webp', 'heic', 'heif',
+    # Audio
+    'mp3', 'm4a', 'aac', 'ogg', 'oga', 'opus', 'wma', 'flac',
+    # Video
+    'mp4', 'm4v', 'mov', 'webm', 'mkv', 'avi', 'wmv', '3gp',
+    # Documents and archives
+    'docx', 'xlsx', 'pptx', 'odt', 'pdf', 'zip', 'gz',
+}
+
+MANIFEST_NAME = 'manifest.csv'
+MANIFEST_COLUMNS = ['Model', 'ID', 'Field', 'Path In ZIP File', 'Included']
+
+# Size of each block read from a media file
+READ_SIZE = 1024 * 1024
+
+
+class ZipStream:
+    """
+    A write-only file-like object that collects the bytes written by zipfile.ZipFile, so they can be yielded
+
+    It can't seek, so ZipFile writes a data descriptor after each file rather than going back to update its header
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+
+    def write(self, data):
+        self.buffer += data
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        """
+        Returns the bytes written since the last call and empties the buffer
+        """
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def media_files():
+    """
+    Yields (model name, object id, field name, file name) for each media file referenced by the MEDIA_FIELDS
+    """
+
+    for model, fields in MEDIA_FIELDS:
+        for values in model.objects.order_by('id').values_list('id', *fields).iterator(chunk_size=rows.QUERYSET_CHUNK_SIZE):
+            for field, name in zip(fields, values[1:]):
+                if name:
+                    yield model.__name__, values[0], field, name
+
+
+def media_file_path(name):
+    """
+    Returns the path on disk of the media file with this (stored) name, or None if the file doesn't exist
+    """
+    path = default_storage.path(name)
+    return path if os.path.isfile(path) else None
+
+
+def stream_media_zip():
+    """
+    Yields the bytes of a ZIP file containing all media files, plus a manifest (CSV) that maps each object to its files
+    """
+
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as zip_file:
+
+        # Manifest, written first so the files themselves can be streamed without keeping a list of them
+        with zip_file.open(MANIFEST_NAME, 'w') as manifest_file:
+            manifest_text = io.TextIOWrapper(manifest_file, encoding='utf-8', newline='')
+            manifest = csv.writer(manifest_text)
+            manifest.writerow(MANIFEST_COLUMNS)
+            for model_name, id, field, name in media_files():
+                manifest.writerow([model_name, id, field, name, 'Yes' if media_file_path(name) else 'No (file not found)'])
+                if len(stream.buffer) >= READ_SIZE:
+                    manifest_text.flush()
+                    yield stream.pop()
+            manifest_text.flush()
+            manifest_text.detach()
+        yield stream.pop()
+
+        # Media files
+        written = set()
+        for model_name, id, field, name in media_files():
+            path = media_file_path(name)
+            if path is None or name in written:
+                continue
+            written.add(name)
+            zip_info = zipfile.ZipInfo.from_file(path, name)
+            extension = os.path.splitext(name)[1].lstrip('.').lower()
+            zip_info.compress_type = zipfile.ZIP_STORED if extension in COMPRESSED_EXTENSIONS else zipfile.ZIP_DEFLATED
+            with open(path, 'rb') as source, zip_file.open(zip_info, 'w') as destination:
+                while True:
+                    data = source.read(READ_SIZE)
+                    if not data:
+                        break
+                    destination.write(data)
+                    yield stream.pop()
+            yield stream.pop()
+
+    # Central directory, written when the ZIP file is closed
+    yield stream.pop()
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_format', models.CharField(choices=[('excel', 'Excel'), ('word', 'Word')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('complete', 'Complete'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('site_url', models.CharField(help_text='Used to build the full URLs of media files, e.g. https://www.example.com', max_length=255)),
+                ('file_path', models.CharField(blank=True, max_length=1000, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='created by')),
+            ],
+            options={
+                'ordering': ['-created'],
+                'indexes': [models.Index(fields=['status', 'created'], name='downloaddat_status_f1e4f5_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('downloaddata', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='fingerprint',
+            field=models.CharField(blank=True, help_text='State of the exported data when this job was created (see cache.get_dataset_fingerprint)', max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='exportjob',
+            index=models.Index(fields=['fingerprint', 'file_format'], name='downloaddat_fingerp_4f07ef_idx'),
+        ),
+    ]
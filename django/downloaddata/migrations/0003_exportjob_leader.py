@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('downloaddata', '0002_exportjob_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='leader',
+            field=models.ForeignKey(blank=True, help_text='An identical job already in progress when this job was created. This job waits for and shares its file, rather than being run itself.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='followers', to='downloaddata.exportjob'),
+        ),
+        migrations.AddConstraint(
+            model_name='exportjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('leader', None), ('status__in', ['pending', 'running'])), fields=('file_format', 'fingerprint'), name='downloaddata_exportjob_single_in_progress'),
+        ),
+    ]
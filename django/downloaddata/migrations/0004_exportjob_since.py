@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('downloaddata', '0003_exportjob_leader'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='since',
+            field=models.DateTimeField(blank=True, help_text='If set, only data created or updated after this time is exported', null=True),
+        ),
+    ]
@@ -0,0 +1,265 @@
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+from datetime import timedelta
+from account.models import User
+from . import excel, word
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class ExportJob(models.Model):
+    """
+    A request to export the project data to a file (e.g. Excel or Word)
+
+    Jobs are created by the download views and processed in the background by the 'run_export_worker' management command,
+    so large exports don't tie up a web worker
+    """
+
+    related_name = 'export_jobs'
+
+    FILE_FORMAT_EXCEL = 'excel'
+    FILE_FORMAT_WORD = 'word'
+    FILE_FORMAT_CHOICES = [
+        (FILE_FORMAT_EXCEL, 'Excel'),
+        (FILE_FORMAT_WORD, 'Word'),
+    ]
+
+    # Number of times a job is saved as the in progress job, or as a follower of it, before giving up
+    # (each attempt fails if another identical job became in progress at the same time, see Meta.constraints)
+    SAVE_ATTEMPTS = 5
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETE = 'complete'
+    STATUS_FAILED = 'failed'
+    IN_PROGRESS_STATUSES = [STATUS_PENDING, STATUS_RUNNING]
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETE, 'Complete'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    # The function that creates the file and the content type it is served with, for each file format
+    FILE_FORMAT_CREATE_FUNCTIONS = {
+        FILE_FORMAT_EXCEL: excel.create_workbook,
+        FILE_FORMAT_WORD: word.create_document,
+    }
+    FILE_FORMAT_CONTENT_TYPES = {
+        FILE_FORMAT_EXCEL: 'application/vnd.ms-excel',
+        FILE_FORMAT_WORD: 'application/word',
+    }
+
+    file_format = models.CharField(max_length=20, choices=FILE_FORMAT_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    site_url = models.CharField(max_length=255, help_text='Used to build the full URLs of media files, e.g. https://www.example.com')
+    since = models.DateTimeField(blank=True, null=True, help_text='If set, only data created or updated after this time is exported')
+    fingerprint = models.CharField(max_length=64, blank=True, null=True, help_text='State of the exported data when this job was created (see cache.get_dataset_fingerprint)')
+    file_path = models.CharField(max_length=1000, blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    leader = models.ForeignKey(
+        'self',
+        related_name='followers',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        help_text='An identical job already in progress when this job was created. This job waits for and shares its file, rather than being run itself.'
+    )
+
+    author = models.ForeignKey(User, related_name=related_name, on_delete=models.CASCADE, blank=True, null=True, verbose_name='created by')
+    created = models.DateTimeField(default=timezone.now)
+    started = models.DateTimeField(blank=True, null=True)
+    finished = models.DateTimeField(blank=True, null=True)
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_COMPLETE, self.STATUS_FAILED)
+
+    @property
+    def has_timed_out(self):
+        return self.status == self.STATUS_RUNNING and self.started < timezone.now() - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT)
+
+    @property
+    def file_exists(self):
+        return self.status == self.STATUS_COMPLETE and bool(self.file_path) and os.path.exists(self.file_path)
+
+    @classmethod
+    def get_cached(cls, file_format, fingerprint):
+        """
+        Returns the most recent completed job for this file_format and fingerprint whose file still exists, or None
+        """
+        for job in cls.objects.filter(file_format=file_format, fingerprint=fingerprint, status=cls.STATUS_COMPLETE)[:5]:
+            if job.file_exists:
+                return job
+        return None
+
+    @classmethod
+    def invalidate_cached(cls):
+        """
+        Stops get_cached() returning any existing export, for when exported data has been changed without changing
+        the dataset fingerprint (e.g. text_plain recalculated with bulk_update(), which doesn't set last_updated)
+
+        The files themselves are deleted by cache.evict() as usual, so downloads that have already started can finish
+        """
+        return cls.objects.filter(status=cls.STATUS_COMPLETE).exclude(fingerprint=None).update(fingerprint=None)
+
+    @classmethod
+    def get_watermark(cls, user, file_format):
+        """
+        Returns the time the user's most recent completed export of this file_format started, or None
+
+        All data created or updated before this time is in that export,
+        so it can be used as 'since' to export only what has changed since
+        """
+        job = cls.objects.filter(author=user, file_format=file_format, status=cls.STATUS_COMPLETE).order_by('-started').first()
+        return job.started if job else None
+
+    @classmethod
+    def get_in_progress(cls, file_format, fingerprint):
+        """
+        Returns the pending/running job (that isn't itself following another job) for this file_format and fingerprint, or None
+
+        A running job that has exceeded EXPORT_JOB_TIMEOUT is marked as failed instead of being returned
+        """
+        job = cls.objects.filter(
+            file_format=file_format,
+            fingerprint=fingerprint,
+            status__in=cls.IN_PROGRESS_STATUSES,
+            leader=None
+        ).first()
+        if job and job.has_timed_out:
+            job.fail('Timed out')
+            return None
+        return job
+
+    @classmethod
+    def create_or_follow(cls, **fields):
+        """
+        Create a pending job, or if an identical job (same file_format and fingerprint) is already in progress, a job that follows it
+
+        If the job being followed has already finished by the time this job is saved, its outcome is handed over straight away,
+        as it may have handed over to its followers before this job existed
+        """
+        job = cls(**fields)
+        job.leader = cls.get_in_progress(job.file_format, job.fingerprint)
+        for attempt in range(cls.SAVE_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    job.save()
+                break
+            except IntegrityError:
+                if attempt == cls.SAVE_ATTEMPTS - 1:
+                    raise
+                # Another identical job was created at the same time, so follow that job instead
+                # (or if it has already finished, try again to create a pending job)
+                job.leader = cls.get_in_progress(job.file_format, job.fingerprint)
+
+        if job.leader:
+            job.leader.refresh_from_db()
+            if job.leader.is_finished:
+                job.leader.hand_over_to_followers()
+                job.refresh_from_db()
+        return job
+
+    @property
+    def content_type(self):
+        return self.FILE_FORMAT_CONTENT_TYPES[self.file_format]
+
+    @classmethod
+    def claim_next(cls):
+        """
+        Claim the oldest pending job and mark it as running, returning None if there are no pending jobs
+
+        The status is only changed if the job is still pending when the UPDATE runs,
+        so multiple workers can safely poll the same table without running a job twice
+        """
+        for job in cls.objects.filter(status=cls.STATUS_PENDING, leader=None).order_by('created', 'id')[:10]:
+            claimed = cls.objects.filter(pk=job.pk, status=cls.STATUS_PENDING).update(
+                status=cls.STATUS_RUNNING,
+                started=timezone.now()
+            )
+            if claimed:
+                job.refresh_from_db()
+                return job
+        return None
+
+    def run(self):
+        """
+        Create the export file for this job and record the outcome
+        """
+        try:
+            self.file_path = self.FILE_FORMAT_CREATE_FUNCTIONS[self.file_format](self.site_url, since=self.since)
+            self.status = self.STATUS_COMPLETE
+        except Exception as err:
+            logger.exception('Export job %s failed', self.pk)
+            self.error = str(err)
+            self.status = self.STATUS_FAILED
+        self.finished = timezone.now()
+        self.save()
+        self.hand_over_to_followers()
+
+    def fail(self, error):
+        """
+        Mark this job as failed and let any followers fall back to running the export themselves
+        """
+        self.error = error
+        self.status = self.STATUS_FAILED
+        self.finished = timezone.now()
+        self.save()
+        self.hand_over_to_followers()
+
+    def hand_over_to_followers(self):
+        """
+        Once this job has finished, pass its outcome on to the jobs following it
+
+        If this job completed, the followers complete with the same file.
+        If this job failed, the followers follow another identical job that is in progress if there is one,
+        otherwise the oldest follower becomes a normal pending job (to be run by a worker) and the other followers follow it instead.
+
+        This can safely be called more than once, including at the same time (e.g. by create_or_follow and the worker).
+        """
+        if self.status == self.STATUS_COMPLETE:
+            self.followers.update(
+                status=self.STATUS_COMPLETE,
+                file_path=self.file_path,
+                started=self.started,
+                finished=self.finished,
+                leader=None
+            )
+        elif self.status == self.STATUS_FAILED:
+            for attempt in range(self.SAVE_ATTEMPTS):
+                if not self.followers.exists():
+                    break
+                new_leader = ExportJob.get_in_progress(self.file_format, self.fingerprint)
+                try:
+                    with transaction.atomic():
+                        if new_leader is None:
+                            new_leader = self.followers.order_by('created', 'id').first()
+                            ExportJob.objects.filter(pk=new_leader.pk).update(leader=None)
+                        self.followers.update(leader=new_leader)
+                except IntegrityError:
+                    if attempt == self.SAVE_ATTEMPTS - 1:
+                        raise
+                    # Another identical job became in progress at the same time, so try again to follow it
+
+    def __str__(self):
+        return f'Export Job: {self.get_file_format_display()} ({self.get_status_display()})'
+
+    class Meta:
+        ordering = ['-created']
+        indexes = [
+            models.Index(fields=['status', 'created']),
+            models.Index(fields=['fingerprint', 'file_format']),
+        ]
+        constraints = [
+            # Acts as a lock: only one job per file_format and fingerprint can be in progress,
+            # all other identical requests made in the meantime must follow it (see 'leader' field)
+            models.UniqueConstraint(
+                fields=['file_format', 'fingerprint'],
+                condition=models.Q(status__in=['pending', 'running'], leader=None),
+                name='downloaddata_exportjob_single_in_progress'
+            ),
+        ]
@@ -0,0 +1,149 @@
+"""
+A streaming writer for Word documents (.docx), used by the Word export
+
+Paragraphs are written as XML straight into word/document.xml within the .docx (zip) file as they're added,
+rather than building the whole document in memory first (as python-docx does),
+so the time taken grows linearly with the number of paragraphs and memory use stays low.
+
+All other parts of the document (e.g. styles) are copied from python-docx's default template,
+and paragraphs are written with the same XML that python-docx would create,
+so documents match those created by python-docx's add_heading(), add_paragraph() and add_page_break().
+"""
+
+from xml.sax.saxutils import escape
+import docx
+import os
+import re
+import zipfile
+
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(docx.__file__), 'templates', 'default.docx')
+DOCUMENT_PART_NAME = 'word/document.xml'
+
+# Paragraph XML templates
+PARAGRAPH_XML = '<w:p>{runs}</w:p>'
+STYLED_PARAGRAPH_XML = '<w:p><w:pPr><w:pStyle w:val="{style}"/></w:pPr>{runs}</w:p>'
+PAGE_BREAK_XML = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+RUN_XML = '<w:r>{content}</w:r>'
+TEXT_XML = '<w:t>{text}</w:t>'
+TEXT_PRESERVE_SPACE_XML = '<w:t xml:space="preserve">{text}</w:t>'
+# XML for characters that python-docx converts into elements within a run
+SPECIAL_CHARACTER_XML = {
+    '\t': '<w:tab/>',
+    '\n': '<w:br/>',
+    '\r': '<w:br/>',
+}
+
+# Splits text into regular text and the special characters above
+SPECIAL_CHARACTERS_REGEX = re.compile('([\t\n\r])')
+# Whitespace between tags in the template XML (other than after the XML declaration)
+BLANK_TEXT_REGEX = re.compile(r'(?<!\?)>\s+<')
+# Characters that aren't allowed in XML documents
+INVALID_XML_CHARACTERS_REGEX = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f￾￿]')
+
+# Write document.xml to the zip file once this many characters have been buffered
+BUFFER_SIZE = 64 * 1024
+
+
+def run_xml(text):
+    """
+    Returns the XML of a run (<w:r>) containing text, the same as python-docx's Run.text
+    """
+
+    content = []
+    for part in SPECIAL_CHARACTERS_REGEX.split(INVALID_XML_CHARACTERS_REGEX.sub('', text)):
+        if part in SPECIAL_CHARACTER_XML:
+            content.append(SPECIAL_CHARACTER_XML[part])
+        elif part:
+            template = TEXT_PRESERVE_SPACE_XML if len(part.strip()) < len(part) else TEXT_XML
+            content.append(template.format(text=escape(part)))
+    return RUN_XML.format(content=''.join(content))
+
+
+class DocumentWriter:
+    """
+    Writes a Word document (.docx) to file_path, paragraph by paragraph
+
+    Use as a context manager, which completes the file on exit, e.g.:
+
+    with DocumentWriter(file_path) as document:
+        document.add_heading('Title', 0)
+        document.add_paragraph('Some text')
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.buffer = []
+        self.buffer_length = 0
+
+    def __enter__(self):
+        self.template = zipfile.ZipFile(TEMPLATE_PATH)
+        self.zip_file = zipfile.ZipFile(self.file_path, 'w', compression=zipfile.ZIP_DEFLATED)
+
+        # Copy the parts of the template that come before document.xml
+        self.template_parts = self.template.infolist()
+        document_part_index = [part.filename for part in self.template_parts].index(DOCUMENT_PART_NAME)
+        for part in self.template_parts[:document_part_index]:
+            self.copy_template_part(part)
+        self.template_parts_after_document = self.template_parts[document_part_index + 1:]
+
+        # Start document.xml with the template's XML up to the start of its body,
+        # keeping the rest (the section properties and closing tags) to write once all paragraphs have been added
+        # (whitespace between tags is removed, as python-docx does)
+        template_document_xml = BLANK_TEXT_REGEX.sub('><', self.template.read(DOCUMENT_PART_NAME).decode('utf-8'))
+        body_start = template_document_xml.index('<w:body>') + len('<w:body>')
+        body_end = template_document_xml.index('<w:sectPr')
+        self.document_xml_end = template_document_xml[body_end:].rstrip()
+        self.document_part = self.zip_file.open(DOCUMENT_PART_NAME, 'w')
+        self.write(template_document_xml[:body_start])
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.write(self.document_xml_end)
+                self.flush()
+            self.document_part.close()
+            # Copy the parts of the template that come after document.xml
+            if exc_type is None:
+                for part in self.template_parts_after_document:
+                    self.copy_template_part(part)
+        finally:
+            self.zip_file.close()
+            self.template.close()
+        # Don't leave an incomplete file behind if an error occurred
+        if exc_type is not None and os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+    def copy_template_part(self, part):
+        self.zip_file.writestr(part, self.template.read(part))
+
+    def write(self, xml):
+        self.buffer.append(xml)
+        self.buffer_length += len(xml)
+        if self.buffer_length >= BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        self.document_part.write(''.join(self.buffer).encode('utf-8'))
+        self.buffer = []
+        self.buffer_length = 0
+
+    def add_paragraph(self, text='', style_id=None):
+        """
+        Adds a paragraph containing text, optionally with a paragraph style (e.g. 'Heading1')
+        """
+        runs = run_xml(text) if text else ''
+        if style_id:
+            self.write(STYLED_PARAGRAPH_XML.format(style=style_id, runs=runs))
+        else:
+            self.write(PARAGRAPH_XML.format(runs=runs))
+
+    def add_heading(self, text='', level=1):
+        """
+        Adds a heading paragraph, using the 'Title' style for level 0 and 'Heading {level}' for other levels
+        """
+        self.add_paragraph(text, 'Title' if level == 0 else f'Heading{level}')
+
+    def add_page_break(self):
+        self.write(PAGE_BREAK_XML)
@@ -0,0 +1,149 @@
+"""
+Row extraction for data exports, shared by the Excel and Word exports
+
+Rows are read as plain tuples with values_list() rather than as model instances,
+with the prompts of each journal entry aggregated in SQL and media URLs built directly from the stored file paths.
+"""
+
+from django.core.files.storage import default_storage
+from django.db import NotSupportedError, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.encoding import filepath_to_uri
+from education import models as education_models
+from health import models as health_models
+
+
+# Number of rows fetched from the database at a time
+QUERYSET_CHUNK_SIZE = 2000
+
+
+# SQL to aggregate the prompts of each journal entry into a single string, one prompt per line
+# Each prompt is formatted the same as JournalEntryPrompt.__str__() and prompts are in JournalEntryPrompt.Meta.ordering order
+PROMPT_LABEL_SQL = """
+    CASE WHEN p."order" IS NULL OR p."order" = 0 THEN p."text"
+    ELSE CAST(p."order" AS TEXT) || ') ' || COALESCE(p."text", '') END
+"""
+PROMPTS_SQL = {
+    # SQLite: GROUP_CONCAT() has no ORDER BY, so aggregate over an ordered subquery
+    'sqlite': f"""
+        SELECT GROUP_CONCAT(label, char(10)) FROM (
+            SELECT {PROMPT_LABEL_SQL} AS label
+            FROM "{{through_table}}" t INNER JOIN "{{prompt_table}}" p ON p."id" = t."journalentryprompt_id"
+            WHERE t."journalentry_id" = "{{journal_entry_table}}"."id"
+            ORDER BY p."order"
+        )
+    """,
+    'postgresql': f"""
+        SELECT STRING_AGG({PROMPT_LABEL_SQL}, chr(10) ORDER BY p."order")
+        FROM "{{through_table}}" t INNER JOIN "{{prompt_table}}" p ON p."id" = t."journalentryprompt_id"
+        WHERE t."journalentry_id" = "{{journal_entry_table}}"."id"
+    """,
+}
+
+
+def prompts_as_str(using='default'):
+    """
+    Returns an expression that annotates each JournalEntry with its prompts as a string (see JournalEntry.prompts_as_str)
+
+    Raises NotSupportedError for databases without SQL in PROMPTS_SQL, rather than running another database's SQL
+    """
+
+    vendor = connections[using].vendor
+    if vendor not in PROMPTS_SQL:
+        raise NotSupportedError(f'Data exports do not support the {vendor} database, only {" and ".join(PROMPTS_SQL)} (see downloaddata.rows.PROMPTS_SQL)')
+    sql = PROMPTS_SQL[vendor].format(
+        through_table=education_models.JournalEntry.prompt.through._meta.db_table,
+        prompt_table=education_models.JournalEntryPrompt._meta.db_table,
+        journal_entry_table=education_models.JournalEntry._meta.db_table,
+    )
+    return RawSQL(f'({sql})', [])
+
+
+def media_url_prefix(site_url):
+    """
+    Returns the start of the full URL of every media file, e.g. 'https://www.example.com/media/'
+    """
+    return f'{site_url}{default_storage.base_url}'
+
+
+def media_url(prefix, name):
+    """
+    Returns the full URL of a media file from its stored name (the same as FieldFile.url, but without a model instance)
+    """
+    return f'{prefix}{filepath_to_uri(name)}' if name else None
+
+
+def format_datetime(value):
+    """
+    Returns a datetime as a string to the nearest minute, e.g. '2024-01-31 14:05'
+    """
+    return value.strftime('%Y-%m-%d %H:%M') if value else str(value)
+
+
+def changed_since(since):
+    """
+    Returns a filter for objects created or updated after since (a datetime)
+    """
+    return Q(created__gt=since) | Q(last_updated__gt=since)
+
+
+def journal_entry_rows(site_url, order_by=None, text_field='text', since=None):
+    """
+    Yields a tuple for each JournalEntry:
+    (id, author, prompts, text, link, image URL, audio URL, video URL, created, last_updated)
+
+    text_field is 'text' for the rich text (HTML) or 'text_plain' for its plain text version
+    If since (a datetime) is provided, only journal entries created or updated after it are included
+    """
+
+    prefix = media_url_prefix(site_url)
+    queryset = education_models.JournalEntry.objects.annotate(prompts=prompts_as_str())
+    if since:
+        queryset = queryset.filter(changed_since(since))
+    if order_by:
+        queryset = queryset.order_by(*order_by)
+    for (id, author, prompts, text, link, image, audio, video, created, last_updated) in queryset.values_list(
+        'id', 'author__username', 'prompts', text_field, 'link', 'image', 'audio', 'video', 'created', 'last_updated'
+    ).iterator(chunk_size=QUERYSET_CHUNK_SIZE):
+        yield (
+            id,
+            str(author),
+            prompts or '',
+            text,
+            link,
+            media_url(prefix, image),
+            media_url(prefix, audio),
+            media_url(prefix, video),
+            format_datetime(created),
+            format_datetime(last_updated),
+        )
+
+
+def conversation_rows(site_url, order_by=None, since=None):
+    """
+    Yields a tuple for each Conversation:
+    (id, author, conversation_date, conversation audio URL, conversation transcript URL, cancer_champion_reflection, created, last_updated)
+
+    If since (a datetime) is provided, only conversations created or updated after it are included
+    """
+
+    prefix = media_url_prefix(site_url)
+    queryset = health_models.Conversation.objects.all()
+    if since:
+        queryset = queryset.filter(changed_since(since))
+    if order_by:
+        queryset = queryset.order_by(*order_by)
+    for (id, author, conversation_date, conversation_audio, conversation_transcript, cancer_champion_reflection, created, last_updated) in queryset.values_list(
+        'id', 'author__username', 'conversation_date', 'conversation_audio', 'conversation_transcript', 'cancer_champion_reflection', 'created', 'last_updated'
+    ).iterator(chunk_size=QUERYSET_CHUNK_SIZE):
+        yield (
+            id,
+            str(author),
+            str(conversation_date),
+            media_url(prefix, conversation_audio),
+            media_url(prefix, conversation_transcript),
+            cancer_champion_reflection,
+            format_datetime(created),
+            format_datetime(last_updated),
+        )
@@ -0,0 +1,463 @@
+from django.core.cache import cache as django_cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, NotSupportedError, connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from account.lookups import ROLE_ADMIN, ROLE_PARTICIPANT, get_user_role_id
+from account.models import User
+from education.models import JournalEntry, JournalEntryPrompt
+from health.models import Conversation
+from . import cache, rows, word
+from .cache import get_dataset_fingerprint
+from .models import ExportJob
+from datetime import date, datetime, timedelta
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import mock
+import json
+import os
+import zipfile
+
+
+class DatasetFingerprintTest(TestCase):
+    """
+    Tests for cache.get_dataset_fingerprint()
+    """
+
+    def setUp(self):
+        self.prompt = JournalEntryPrompt.objects.create(text='First prompt', order=1)
+        self.user = User.objects.create(username='fingerprint-user', role_id=get_user_role_id(ROLE_PARTICIPANT))
+
+    def test_unchanged_data_has_same_fingerprint(self):
+        self.assertEqual(get_dataset_fingerprint('xlsx', 'http://testserver'), get_dataset_fingerprint('xlsx', 'http://testserver'))
+
+    def test_renamed_prompt_changes_fingerprint(self):
+        fingerprint = get_dataset_fingerprint('xlsx', 'http://testserver')
+        self.prompt.text = 'Renamed prompt'
+        self.prompt.save()
+        self.assertNotEqual(get_dataset_fingerprint('xlsx', 'http://testserver'), fingerprint)
+
+    def test_changed_username_changes_fingerprint(self):
+        fingerprint = get_dataset_fingerprint('xlsx', 'http://testserver')
+        self.user.username = 'renamed-user'
+        self.user.save()
+        self.assertNotEqual(get_dataset_fingerprint('xlsx', 'http://testserver'), fingerprint)
+
+
+class ExportJobInvalidateCachedTest(TestCase):
+    """
+    Exports must not be reused after text_plain has been recalculated, which doesn't change the dataset fingerprint
+    """
+
+    def setUp(self):
+        user = User.objects.create(username='invalidate-user', role_id=get_user_role_id(ROLE_PARTICIPANT))
+        JournalEntry.objects.create(author=user, text='<p>First</p><p>Second</p>')
+        self.fingerprint = get_dataset_fingerprint(ExportJob.FILE_FORMAT_EXCEL, 'http://testserver')
+        file_path = os.path.join(self.enterContext(TemporaryDirectory()), 'export.xlsx')
+        open(file_path, 'wb').close()
+        ExportJob.objects.create(
+            file_format=ExportJob.FILE_FORMAT_EXCEL,
+            site_url='http://testserver',
+            fingerprint=self.fingerprint,
+            status=ExportJob.STATUS_COMPLETE,
+            file_path=file_path,
+        )
+
+    def test_backfill_text_plain_invalidates_cached_exports(self):
+        self.assertIsNotNone(ExportJob.get_cached(ExportJob.FILE_FORMAT_EXCEL, self.fingerprint))
+        call_command('backfill_text_plain', stdout=StringIO())
+        self.assertEqual(get_dataset_fingerprint(ExportJob.FILE_FORMAT_EXCEL, 'http://testserver'), self.fingerprint)
+        self.assertIsNone(ExportJob.get_cached(ExportJob.FILE_FORMAT_EXCEL, self.fingerprint))
+
+
+class ExportJobCreateOrFollowTest(TestCase):
+    """
+    Tests for ExportJob.create_or_follow(), including identical jobs that finish or are created at the same time
+    """
+
+    job_fields = {
+        'file_format': ExportJob.FILE_FORMAT_EXCEL,
+        'site_url': 'http://testserver',
+        'fingerprint': 'fingerprint',
+    }
+
+    def finish(self, job, status):
+        ExportJob.objects.filter(pk=job.pk).update(status=status, file_path='/tmp/export.xlsx', started=timezone.now(), finished=timezone.now())
+
+    def test_creates_pending_job(self):
+        job = ExportJob.create_or_follow(**self.job_fields)
+        self.assertEqual(job.status, ExportJob.STATUS_PENDING)
+        self.assertIsNone(job.leader)
+
+    def test_follows_job_in_progress(self):
+        leader = ExportJob.create_or_follow(**self.job_fields)
+        job = ExportJob.create_or_follow(**self.job_fields)
+        self.assertEqual(job.leader, leader)
+        self.assertIsNone(ExportJob.claim_next().leader)
+        self.assertIsNone(ExportJob.claim_next())
+
+    def test_adopts_outcome_of_leader_that_completed_before_follower_was_saved(self):
+        leader = ExportJob.create_or_follow(**self.job_fields)
+
+        def get_in_progress(file_format, fingerprint):
+            self.finish(leader, ExportJob.STATUS_COMPLETE)
+            return leader
+
+        with mock.patch.object(ExportJob, 'get_in_progress', side_effect=get_in_progress):
+            job = ExportJob.create_or_follow(**self.job_fields)
+        self.assertEqual(job.status, ExportJob.STATUS_COMPLETE)
+        self.assertEqual(job.file_path, '/tmp/export.xlsx')
+        self.assertIsNone(job.leader)
+
+    def test_runs_itself_if_leader_failed_before_follower_was_saved(self):
+        leader = ExportJob.create_or_follow(**self.job_fields)
+        original_get_in_progress = ExportJob.get_in_progress
+        calls = []
+
+        def get_in_progress(file_format, fingerprint):
+            # Only the first call (by create_or_follow) returns the leader, later calls (by hand_over_to_followers) are unchanged
+            calls.append(1)
+            if len(calls) > 1:
+                return original_get_in_progress(file_format, fingerprint)
+            self.finish(leader, ExportJob.STATUS_FAILED)
+            return leader
+
+        with mock.patch.object(ExportJob, 'get_in_progress', side_effect=get_in_progress):
+            job = ExportJob.create_or_follow(**self.job_fields)
+        self.assertEqual(job.status, ExportJob.STATUS_PENDING)
+        self.assertIsNone(job.leader)
+        self.assertEqual(ExportJob.claim_next(), job)
+
+    def test_creates_pending_job_if_identical_job_finished_after_integrity_error(self):
+        other = ExportJob.create_or_follow(**self.job_fields)
+        calls = []
+
+        def get_in_progress(file_format, fingerprint):
+            # The first call misses the other job (as if it was created at the same time)
+            # and the second misses it because it has finished since
+            calls.append(1)
+            if len(calls) == 2:
+                self.finish(other, ExportJob.STATUS_COMPLETE)
+            return None
+
+        with mock.patch.object(ExportJob, 'get_in_progress', side_effect=get_in_progress):
+            job = ExportJob.create_or_follow(**self.job_fields)
+        self.assertEqual(job.status, ExportJob.STATUS_PENDING)
+        self.assertIsNone(job.leader)
+
+    def test_gives_up_if_constraint_keeps_failing(self):
+        # An in progress job that get_in_progress() doesn't find, so every attempt to save a new pending job fails
+        ExportJob.create_or_follow(**self.job_fields)
+        with mock.patch.object(ExportJob, 'get_in_progress', return_value=None) as get_in_progress:
+            with self.assertRaises(IntegrityError):
+                ExportJob.create_or_follow(**self.job_fields)
+        self.assertEqual(get_in_progress.call_count, ExportJob.SAVE_ATTEMPTS)
+
+    def test_hand_over_gives_up_if_constraint_keeps_failing(self):
+        leader = ExportJob.create_or_follow(**self.job_fields)
+        ExportJob.create_or_follow(**self.job_fields)
+        self.finish(leader, ExportJob.STATUS_FAILED)
+        leader.refresh_from_db()
+        # An in progress job that get_in_progress() doesn't find, so every attempt to make the follower a pending job fails
+        ExportJob.objects.create(**self.job_fields)
+        with mock.patch.object(ExportJob, 'get_in_progress', return_value=None) as get_in_progress:
+            with self.assertRaises(IntegrityError):
+                leader.hand_over_to_followers()
+        self.assertEqual(get_in_progress.call_count, ExportJob.SAVE_ATTEMPTS)
+
+
+class WordEngineTest(TestCase):
+    """
+    The 'ooxml' Word engine must create the same document as the 'python-docx' engine (the reference implementation)
+    """
+
+    def setUp(self):
+        author = User.objects.create(username='word-user', role_id=get_user_role_id(ROLE_PARTICIPANT))
+        prompts = [
+            JournalEntryPrompt.objects.create(text='Unordered prompt'),
+            JournalEntryPrompt.objects.create(text='Second prompt', order=2),
+            JournalEntryPrompt.objects.create(text='First prompt & <more>', order=1),
+        ]
+        journal_entry = JournalEntry.objects.create(
+            author=author,
+            text='<p>Tabs\tand  double spaces</p><p>Escaped &amp; &lt;characters&gt; "quoted"</p><p> Leading space</p>',
+            link='https://www.example.com/?a=1&b=2',
+            image='education/journal_entry/image/photo with spaces.jpg',
+            audio='education/journal_entry/audio/recording.mp3',
+        )
+        journal_entry.prompt.set(prompts)
+        JournalEntry.objects.create(author=author, text='', last_updated=journal_entry.created + timedelta(days=1))
+        Conversation.objects.create(
+            author=author,
+            conversation_date=date(2024, 1, 31),
+            conversation_audio='health/conversation/audio/conversation.mp3',
+            cancer_champion_reflection='Line one\r\nLine two\n\n\ttabbed',
+        )
+
+    def read_document_xml(self, engine, since=None):
+        file_path = word.create_document('http://testserver', engine=engine, since=since)
+        self.addCleanup(os.remove, file_path)
+        with zipfile.ZipFile(file_path) as zip_file:
+            return zip_file.read('word/document.xml')
+
+    def test_engines_create_identical_document_xml(self):
+        self.assertEqual(self.read_document_xml(word.ENGINE_OOXML), self.read_document_xml(word.ENGINE_PYTHON_DOCX))
+
+    def test_engines_create_identical_document_xml_since(self):
+        since = timezone.now() - timedelta(hours=1)
+        self.assertEqual(self.read_document_xml(word.ENGINE_OOXML, since), self.read_document_xml(word.ENGINE_PYTHON_DOCX, since))
+
+
+class PromptsAsStrTest(TestCase):
+    """
+    Tests for rows.prompts_as_str()
+    """
+
+    def test_prompts_in_order(self):
+        journal_entry = JournalEntry.objects.create(author=User.objects.create(username='prompts-user', role_id=get_user_role_id(ROLE_PARTICIPANT)))
+        journal_entry.prompt.set([
+            JournalEntryPrompt.objects.create(text='Second prompt', order=2),
+            JournalEntryPrompt.objects.create(text='First prompt', order=1),
+        ])
+        prompts = JournalEntry.objects.annotate(prompts=rows.prompts_as_str()).values_list('prompts', flat=True).get()
+        self.assertEqual(prompts, '1) First prompt\n2) Second prompt')
+
+    def test_unsupported_database(self):
+        with mock.patch.object(connection, 'vendor', 'oracle'):
+            with self.assertRaisesMessage(NotSupportedError, 'oracle'):
+                rows.prompts_as_str()
+
+
+class MediaZipTest(TestCase):
+    """
+    Tests for views.download_media_zip
+    """
+
+    def test_admin_can_download(self):
+        self.client.force_login(User.objects.create(username='zip-admin', role_id=get_user_role_id(ROLE_ADMIN)))
+        response = self.client.get(reverse('downloaddata:media_zip'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        b''.join(response.streaming_content)
+
+    def test_participant_cannot_download(self):
+        self.client.force_login(User.objects.create(username='zip-participant', role_id=get_user_role_id(ROLE_PARTICIPANT)))
+        response = self.client.get(reverse('downloaddata:media_zip'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_anonymous_user_is_sent_to_login(self):
+        response = self.client.get(reverse('downloaddata:media_zip'))
+        self.assertEqual(response.status_code, 302)
+
+
+class ExportViewPermissionTest(TestCase):
+    """
+    Only admins can export data or see export jobs, as exports include every participant's data
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create(username='export-admin', role_id=get_user_role_id(ROLE_ADMIN))
+        self.participant = User.objects.create(username='export-participant', role_id=get_user_role_id(ROLE_PARTICIPANT))
+
+    def test_admin_can_create_export_jobs(self):
+        self.client.force_login(self.admin)
+        for url_name in ('downloaddata:excel', 'downloaddata:word'):
+            with self.subTest(url_name=url_name):
+                response = self.client.get(reverse(url_name))
+                job = ExportJob.objects.filter(author=self.admin).latest('pk')
+                self.assertRedirects(response, reverse('downloaddata:job', kwargs={'pk': job.pk}))
+
+    def test_participant_cannot_create_export_jobs(self):
+        self.client.force_login(self.participant)
+        for url_name in ('downloaddata:excel', 'downloaddata:word'):
+            with self.subTest(url_name=url_name):
+                self.assertEqual(self.client.get(reverse(url_name)).status_code, 403)
+        self.assertFalse(ExportJob.objects.exists())
+
+    def test_participant_cannot_see_own_export_job(self):
+        # e.g. a job created while the user was still an admin
+        job = ExportJob.objects.create(file_format=ExportJob.FILE_FORMAT_EXCEL, site_url='http://testserver', author=self.participant)
+        self.client.force_login(self.participant)
+        for url_name in ('downloaddata:job', 'downloaddata:job_download'):
+            with self.subTest(url_name=url_name):
+                self.assertEqual(self.client.get(reverse(url_name, kwargs={'pk': job.pk})).status_code, 403)
+
+    def test_anonymous_user_is_sent_to_login(self):
+        for url_name in ('downloaddata:excel', 'downloaddata:word'):
+            with self.subTest(url_name=url_name):
+                self.assertEqual(self.client.get(reverse(url_name)).status_code, 302)
+
+
+class RunBenchmarksTest(TestCase):
+    """
+    Tests for the run_benchmarks management command
+    """
+
+    def test_refuses_to_run_without_debug(self):
+        with self.assertRaises(CommandError):
+            call_command('run_benchmarks', '--sizes', '5', stdout=StringIO())
+
+    def test_leaves_database_and_caches_unchanged(self):
+        data_path = cache.DATA_PATH
+        export_files = set(os.listdir(data_path)) if os.path.isdir(data_path) else set()
+        django_cache.clear()
+        stdout = StringIO()
+        call_command('run_benchmarks', '--sizes', '5', '--force', stdout=stdout)
+        self.assertEqual({result['size'] for result in json.loads(stdout.getvalue())['results']}, {5})
+        self.assertFalse(JournalEntry.objects.exists())
+        self.assertEqual(cache.DATA_PATH, data_path)
+        self.assertEqual(set(os.listdir(data_path)) if os.path.isdir(data_path) else set(), export_files)
+        self.assertIsNone(django_cache.get(f'admin_count_default_{JournalEntry._meta.db_table}'))
+
+
+class ChangedSinceExportTest(TestCase):
+    """
+    Exports of only the data created or updated since a given time (?since=), e.g. since the user's last export (?since=last)
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create(username='since-admin', role_id=get_user_role_id(ROLE_ADMIN))
+        author = User.objects.create(username='since-author', role_id=get_user_role_id(ROLE_PARTICIPANT))
+        self.since = timezone.now() - timedelta(days=1)
+        self.old = JournalEntry.objects.create(author=author, text='<p>Old</p>', created=self.since - timedelta(days=1))
+        self.new = JournalEntry.objects.create(author=author, text='<p>New</p>')
+        self.old_conversation = Conversation.objects.create(author=author, conversation_date=date(2024, 1, 31), created=self.since - timedelta(days=1))
+
+    def get_journal_entry_ids(self):
+        return [row[0] for row in rows.journal_entry_rows('http://testserver', order_by=['id'], since=self.since)]
+
+    def test_only_data_changed_since_is_exported(self):
+        self.assertEqual(self.get_journal_entry_ids(), [self.new.pk])
+        self.assertEqual(list(rows.conversation_rows('http://testserver', since=self.since)), [])
+
+        self.old.last_updated = timezone.now()
+        self.old.save()
+        self.old_conversation.last_updated = timezone.now()
+        self.old_conversation.save()
+        self.assertEqual(self.get_journal_entry_ids(), [self.old.pk, self.new.pk])
+        self.assertEqual([row[0] for row in rows.conversation_rows('http://testserver', since=self.since)], [self.old_conversation.pk])
+
+    def test_fingerprint_changes_when_data_is_updated(self):
+        fingerprint = get_dataset_fingerprint('xlsx', 'http://testserver', self.since)
+        self.assertNotEqual(get_dataset_fingerprint('xlsx', 'http://testserver'), fingerprint)
+        self.old.last_updated = timezone.now()
+        self.old.save()
+        self.assertNotEqual(get_dataset_fingerprint('xlsx', 'http://testserver', self.since), fingerprint)
+
+    def test_watermark_is_start_of_users_last_completed_export(self):
+        self.assertIsNone(ExportJob.get_watermark(self.admin, ExportJob.FILE_FORMAT_EXCEL))
+        started = timezone.now() - timedelta(hours=2)
+        job_fields = {'site_url': 'http://testserver', 'status': ExportJob.STATUS_COMPLETE, 'author': self.admin}
+        ExportJob.objects.create(**job_fields, file_format=ExportJob.FILE_FORMAT_EXCEL, started=started)
+        self.assertEqual(ExportJob.get_watermark(self.admin, ExportJob.FILE_FORMAT_EXCEL), started)
+
+        # Exports in progress, in another format or by other users don't change it
+        ExportJob.objects.create(**{**job_fields, 'status': ExportJob.STATUS_RUNNING}, file_format=ExportJob.FILE_FORMAT_EXCEL, started=timezone.now())
+        ExportJob.objects.create(**job_fields, file_format=ExportJob.FILE_FORMAT_WORD, started=timezone.now())
+        other_admin = User.objects.create(username='since-other-admin', role_id=get_user_role_id(ROLE_ADMIN))
+        ExportJob.objects.create(**{**job_fields, 'author': other_admin}, file_format=ExportJob.FILE_FORMAT_EXCEL, started=timezone.now())
+        self.assertEqual(ExportJob.get_watermark(self.admin, ExportJob.FILE_FORMAT_EXCEL), started)
+
+        later = timezone.now() - timedelta(hours=1)
+        ExportJob.objects.create(**job_fields, file_format=ExportJob.FILE_FORMAT_EXCEL, started=later)
+        self.assertEqual(ExportJob.get_watermark(self.admin, ExportJob.FILE_FORMAT_EXCEL), later)
+
+    def test_since_parameter(self):
+        self.client.force_login(self.admin)
+        started = timezone.now() - timedelta(hours=2)
+        ExportJob.objects.create(
+            file_format=ExportJob.FILE_FORMAT_EXCEL,
+            site_url='http://testserver',
+            status=ExportJob.STATUS_COMPLETE,
+            author=self.admin,
+            started=started
+        )
+        for since, expected in (
+            ('last', started),
+            ('2024-01-31', timezone.make_aware(datetime(2024, 1, 31))),
+            ('2024-01-31T14:00', timezone.make_aware(datetime(2024, 1, 31, 14))),
+            ('', None),
+        ):
+            with self.subTest(since=since):
+                self.client.get(reverse('downloaddata:excel'), {'since': since})
+                self.assertEqual(ExportJob.objects.filter(author=self.admin).latest('pk').since, expected)
+        self.assertEqual(self.client.get(reverse('downloaddata:excel'), {'since': 'yesterday'}).status_code, 400)
+
+
+class ExportCacheTest(TestCase):
+    """
+    Exports are reused until the exported data changes, after which a new export (with the changes) is created
+    """
+
+    def setUp(self):
+        self.enterContext(mock.patch.object(cache, 'DATA_PATH', self.enterContext(TemporaryDirectory())))
+        self.admin = User.objects.create(username='cache-admin', role_id=get_user_role_id(ROLE_ADMIN))
+        self.author = User.objects.create(username='cache-author', role_id=get_user_role_id(ROLE_PARTICIPANT))
+        self.prompt = JournalEntryPrompt.objects.create(text='Original prompt', order=1)
+        self.journal_entry = JournalEntry.objects.create(author=self.author, text='<p>Original text</p>')
+        self.journal_entry.prompt.add(self.prompt)
+        self.conversation = Conversation.objects.create(
+            author=self.author,
+            conversation_date=date(2024, 1, 31),
+            cancer_champion_reflection='Original reflection'
+        )
+        self.client.force_login(self.admin)
+
+    def export(self, url_name):
+        """
+        Request an export, running its job unless the export is cached, and return the job and the text of its file
+        """
+        response = self.client.get(reverse(url_name))
+        job = ExportJob.objects.filter(author=self.admin).latest('pk')
+        if job.status == ExportJob.STATUS_PENDING:
+            self.assertRedirects(response, reverse('downloaddata:job', kwargs={'pk': job.pk}))
+            ExportJob.claim_next().run()
+            job.refresh_from_db()
+        else:
+            self.assertRedirects(response, reverse('downloaddata:job_download', kwargs={'pk': job.pk}), fetch_redirect_response=False)
+        self.assertEqual(job.status, ExportJob.STATUS_COMPLETE, job.error)
+        with zipfile.ZipFile(job.file_path) as zip_file:
+            return job, ' '.join(zip_file.read(name).decode() for name in zip_file.namelist() if name.endswith('.xml'))
+
+    def edit_journal_entry(self):
+        self.journal_entry.text = '<p>Edited text</p>'
+        self.journal_entry.last_updated = timezone.now()
+        self.journal_entry.save()
+
+    def add_prompt(self):
+        self.journal_entry.prompt.add(JournalEntryPrompt.objects.create(text='Added prompt', order=2))
+
+    def rename_prompt(self):
+        self.prompt.text = 'Renamed prompt'
+        self.prompt.save()
+
+    def rename_author(self):
+        self.author.username = 'renamed-author'
+        self.author.save()
+
+    def edit_conversation(self):
+        self.conversation.cancer_champion_reflection = 'Edited reflection'
+        self.conversation.last_updated = timezone.now()
+        self.conversation.save()
+
+    def assertChangesAreExported(self, url_name):
+        job, text = self.export(url_name)
+        self.assertIn('Original text', text)
+        self.assertEqual(self.export(url_name)[0].file_path, job.file_path)
+
+        for change in (self.edit_journal_entry, self.add_prompt, self.rename_prompt, self.rename_author, self.edit_conversation):
+            change()
+            new_job, text = self.export(url_name)
+            self.assertNotEqual(new_job.file_path, job.file_path, f'Export not created again after {change.__name__}')
+            job = new_job
+
+        for expected in ('Edited text', 'Added prompt', 'Renamed prompt', 'renamed-author', 'Edited reflection'):
+            self.assertIn(expected, text)
+        self.assertNotIn('Original', text)
+
+    def test_excel_export_changes_with_data(self):
+        self.assertChangesAreExported('downloaddata:excel')
+
+    def test_word_export_changes_with_data(self):
+        self.assertChangesAreExported('downloaddata:word')
@@ -6,4 +6,7 @@ app_name = 'downloaddata'
 urlpatterns = [
     path('excel/', views.download_data_excel, name='excel'),
     path('word/', views.download_data_word, name='word'),
+    path('media.zip', views.download_media_zip, name='media_zip'),
+    path('jobs/<int:pk>/', views.export_job_status, name='job'),
+    path('jobs/<int:pk>/download/', views.export_job_download, name='job_download'),
 ]
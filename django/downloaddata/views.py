@@ -1,34 +1,159 @@
+from django.contrib import admin
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, Http404
-from . import excel, word
-import os
+from django.core.exceptions import BadRequest, PermissionDenied
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time
+from . import cache, mediazip
+from .models import ExportJob
+
+
+def get_since(request, file_format):
+    """
+    Returns the 'since' datetime requested in the URL, or None to export all data
+
+    Can be a date/datetime (e.g. ?since=2024-01-31 or ?since=2024-01-31T14:00)
+    or 'last' to use the time of the user's last export in this file_format (e.g. ?since=last)
+    """
+
+    since = request.GET.get('since')
+    if not since:
+        return None
+    if since == 'last':
+        return ExportJob.get_watermark(request.user, file_format)
+    try:
+        since_datetime = parse_datetime(since)
+        if since_datetime is None:
+            since_date = parse_date(since)
+            since_datetime = datetime.combine(since_date, time()) if since_date else None
+    except ValueError:
+        since_datetime = None
+    if since_datetime is None:
+        raise BadRequest('Invalid since value, e.g. use ?since=2024-01-31 or ?since=last')
+    if timezone.is_naive(since_datetime):
+        since_datetime = timezone.make_aware(since_datetime)
+    return since_datetime
+
+
+def create_export_job(request, file_format):
+    """
+    Queue a new export job for the current user and redirect them to its status page
+
+    Only data created or updated after the time given by ?since= is exported (see get_since)
+
+    If an identical export (same file_format and dataset fingerprint) already exists in the cache,
+    the new job is completed straight away using the cached file and the user is sent directly to the download.
+    If an identical export is in progress, the new job follows it and shares its file once it's complete.
+    """
+
+    site_url = f'{request.scheme}://{request.get_host()}'
+    since = get_since(request, file_format)
+    fingerprint = cache.get_dataset_fingerprint(file_format, site_url, since)
+    job_fields = {
+        'file_format': file_format,
+        'site_url': site_url,
+        'since': since,
+        'fingerprint': fingerprint,
+        'author': request.user,
+    }
+
+    cached_job = ExportJob.get_cached(file_format, fingerprint)
+    if cached_job:
+        now = timezone.now()
+        job = ExportJob.objects.create(
+            **job_fields,
+            status=ExportJob.STATUS_COMPLETE,
+            file_path=cached_job.file_path,
+            started=now,
+            finished=now
+        )
+        return redirect('downloaddata:job_download', pk=job.pk)
+
+    # If an identical export is already in progress, wait for it rather than creating the file again
+    job = ExportJob.create_or_follow(**job_fields)
+    return redirect('downloaddata:job', pk=job.pk)
 
 
 @login_required
 def download_data_excel(request):
     """
-    Creates an Excel workbook/spreadsheet and return it to the user
+    Queues the creation of an Excel workbook/spreadsheet, which the user can download once it's ready
+
+    Only admins can download data, as it includes every participant's data
     """
 
-    file_path = excel.create_workbook(request)
-    if os.path.exists(file_path):
-        with open(file_path, 'rb') as fh:
-            response = HttpResponse(fh.read(), content_type="application/vnd.ms-excel")
-            response['Content-Disposition'] = f'inline; filename={os.path.basename(file_path)}'
-            return response
-    raise Http404
+    if not request.user.is_admin:
+        raise PermissionDenied
+    return create_export_job(request, ExportJob.FILE_FORMAT_EXCEL)
 
 
 @login_required
 def download_data_word(request):
     """
-    Creates an Word document (.docx) and return it to the user
+    Queues the creation of a Word document (.docx), which the user can download once it's ready
+
+    Only admins can download data, as it includes every participant's data
+    """
+
+    if not request.user.is_admin:
+        raise PermissionDenied
+    return create_export_job(request, ExportJob.FILE_FORMAT_WORD)
+
+
+@login_required
+def download_media_zip(request):
+    """
+    Returns a ZIP file of all uploaded media files to the user, streamed as it's created
+
+    Only admins can download it, as it includes every participant's files
+    """
+
+    if not request.user.is_admin:
+        raise PermissionDenied
+    response = StreamingHttpResponse(mediazip.stream_media_zip(), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="encv_media_{timezone.now().strftime("%Y-%m-%d_%H-%M")}.zip"'
+    return response
+
+
+@login_required
+def export_job_status(request, pk):
+    """
+    Shows the status of an export job, refreshing until the job has finished
+    """
+
+    if not request.user.is_admin:
+        raise PermissionDenied
+    job = get_object_or_404(ExportJob, pk=pk, author=request.user)
+    # Stop waiting for a job (or the job it's following) that has exceeded EXPORT_JOB_TIMEOUT, e.g. if its worker has stopped
+    for in_progress_job in (job, job.leader):
+        if in_progress_job and in_progress_job.has_timed_out:
+            in_progress_job.fail('Timed out')
+            job.refresh_from_db()
+    # A job can be left following a job that has already finished, e.g. if the worker stopped during hand_over_to_followers()
+    if job.leader and job.leader.is_finished:
+        job.leader.hand_over_to_followers()
+        job.refresh_from_db()
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Download Data',
+        'job': job,
+    }
+    return render(request, 'downloaddata/exportjob.html', context)
+
+
+@login_required
+def export_job_download(request, pk):
+    """
+    Returns the file created by a completed export job to the user
+
+    The file is streamed from disk in blocks (via FileResponse) rather than read into memory
     """
 
-    file_path = word.create_document(request)
-    if os.path.exists(file_path):
-        with open(file_path, 'rb') as fh:
-            response = HttpResponse(fh.read(), content_type="application/word")
-            response['Content-Disposition'] = f'inline; filename={os.path.basename(file_path)}'
-            return response
+    if not request.user.is_admin:
+        raise PermissionDenied
+    job = get_object_or_404(ExportJob, pk=pk, author=request.user)
+    if job.file_exists:
+        return FileResponse(open(job.file_path, 'rb'), content_type=job.content_type)
     raise Http404
@@ -1,52 +1,42 @@
+from django.conf import settings
 from docx import Document
-import os
-import glob
-import time
-import re
-from education import models as education_models
-from health import models as health_models
+from . import cache, ooxml, rows
 
 
-def media_url_full(request, media_file_path):
-    """
-    Return the full URL of the media file
-    """
-    return f"{request.scheme}://{request.META['HTTP_HOST']}{media_file_path}"
-
-
-# Used in clean_html function, but compiled here once for performance improvements
-CLEANR = re.compile('<.*?>')
+# Engines that can create the Word document (see EXPORT_WORD_ENGINE setting)
+ENGINE_OOXML = 'ooxml'  # streams XML straight into the file, for large exports (see ooxml.py)
+ENGINE_PYTHON_DOCX = 'python-docx'  # builds the whole document in memory with python-docx, the reference implementation
 
 
-def clean_html(raw_html):
+def create_document(site_url, engine=None, since=None):
     """
-    Remove all tags from HTML and convert chars
+    Creates a Word Document (.docx) and returns its file path
+
+    site_url (e.g. 'https://www.example.com') is used to build the full URLs of media files
+    engine is one of the ENGINE_ values above, defaulting to the EXPORT_WORD_ENGINE setting
+    If since (a datetime) is provided, only data created or updated after it is included
     """
-    clean_text = re.sub(CLEANR, '', raw_html)
-    clean_text = clean_text\
-        .replace('&#39;', "'")\
-        .replace('&nbsp;', ' ')\
-        .replace('&quot;', '"')
-    return clean_text
 
+    # Establish new, unique file path
+    file_path = cache.new_file_path('docx')
 
-def create_document(request):
-    """
-    Creates a Word Document (.docx) and returns its file path
-    """
+    if (engine or settings.EXPORT_WORD_ENGINE) == ENGINE_PYTHON_DOCX:
+        document = Document()
+        write_document(document, site_url, since)
+        document.save(file_path)
+    else:
+        with ooxml.DocumentWriter(file_path) as document:
+            write_document(document, site_url, since)
+    return file_path
 
-    # Delete all existing files in the data folder
-    data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
-    files = glob.glob(data_path + '/*')
-    for f in files:
-        os.remove(f)
 
-    # Establish new file name
-    file_name = f'encv_data_{time.strftime("%Y-%m-%d_%H-%M")}.docx'
-    file_path = os.path.join(data_path, file_name)
+def write_document(document, site_url, since=None):
+    """
+    Builds the content of the Word document, row by row
 
-    # Create a new Document
-    document = Document()
+    document can be a python-docx Document or an ooxml.DocumentWriter, as both provide
+    the add_heading(), add_paragraph() and add_page_break() methods used here
+    """
 
     # A visual separator for data items presented in the document
     item_separator = """
@@ -65,39 +55,41 @@ Data is organised into 2 strands:
 1) Education Strand (includes a list of 'Journal Entries' from participants)
 2) Health Strand (includes 'Conversations' between cancer champions and the patients)
 """)
+    if since:
+        document.add_paragraph(f"Only data created or updated since {rows.format_datetime(since)} (UTC) is included.")
     document.add_page_break()
     # Education strand content
     document.add_heading('1) Education Strand', 1)
     document.add_paragraph(item_separator)
-    for journal_entry in education_models.JournalEntry.objects.all().select_related('author',).prefetch_related('prompt').order_by('id'):
-        document.add_heading(f'Journal Entry ID: {journal_entry.id}', 2)
+    for (id, author, prompts, text, link, image, audio, video, created, last_updated) in rows.journal_entry_rows(site_url, order_by=['id'], text_field='text_plain', since=since):
+        document.add_heading(f'Journal Entry ID: {id}', 2)
         document.add_paragraph(f"""
 Author:
-{str(journal_entry.author)}
+{author}
 
 Created:
-{str(journal_entry.created)[:16]}
+{created}
 
 Last Updated:
-{str(journal_entry.last_updated)[:16]}
+{last_updated}
 
 Link:
-{journal_entry.link}
+{link}
 
 Image (download link):
-{media_url_full(request, journal_entry.image.url) if journal_entry.image else None}
+{image}
 
 Audio (download link):
-{media_url_full(request, journal_entry.audio.url) if journal_entry.audio else None}
+{audio}
 
 Video (download link):
-{media_url_full(request, journal_entry.video.url) if journal_entry.video else None}
+{video}
 
 Prompt(s):
-{journal_entry.prompts_as_str}
+{prompts}
 
 Journal Entry Text:
-{clean_html(journal_entry.text)}
+{text}
 
 """)
         document.add_paragraph(item_separator)
@@ -106,33 +98,29 @@ Journal Entry Text:
     document.add_page_break()
     document.add_heading('2) Health Strand', 1)
     document.add_paragraph(item_separator)
-    for conversation in health_models.Conversation.objects.all().select_related('author',).order_by('id'):
-        document.add_heading(f'Conversation ID: {conversation.id}', 2)
+    for (id, author, conversation_date, conversation_audio, conversation_transcript, cancer_champion_reflection, created, last_updated) in rows.conversation_rows(site_url, order_by=['id'], since=since):
+        document.add_heading(f'Conversation ID: {id}', 2)
         document.add_paragraph(f"""
 Author:
-{str(conversation.author)}
+{author}
 
 Created:
-{str(conversation.created)[:16]}
+{created}
 
 Last Updated:
-{str(conversation.last_updated)[:16]}
+{last_updated}
 
 Conversation Date:
-{str(conversation.conversation_date)[:10]}
+{conversation_date}
 
 Conversation Audio (download link):
-{media_url_full(request, conversation.conversation_audio.url) if conversation.conversation_audio else None}
+{conversation_audio}
 
 Conversation Transcript (download link):
-{media_url_full(request, conversation.conversation_transcript.url) if conversation.conversation_transcript else None}
+{conversation_transcript}
 
 Cancer Champion Reflection:
-{conversation.cancer_champion_reflection}
+{cancer_champion_reflection}
 
 """)
         document.add_paragraph(item_separator)
-
-    # Save document and return the file path
-    document.save(file_path)
-    return file_path
@@ -1,8 +1,14 @@
+from django.conf import settings
 from django.contrib import admin
-from django.db.models import ManyToManyField, ForeignKey
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.db.models import ManyToManyField, ForeignKey, Exists, OuterRef
+from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from django.utils import timezone
-from core import custom_permissions
+from core import custom_permissions, pagination, search
+from chunkedupload.widgets import ChunkedFileInput
+from mediafiles.models import ImageVariant
+from mediafiles.thumbnails import get_thumbnail_url
 from . import models
 
 
@@ -22,12 +28,52 @@ def get_foreignkey_fields(model, exclude=[]):
     return list(f.name for f in model._meta.get_fields() if type(f) is ForeignKey and f.name not in exclude)
 
 
+class PromptListFilter(admin.SimpleListFilter):
+    """
+    Filter journal entries by prompt, showing the number of journal entries that use each prompt
+    """
+
+    title = 'prompt'
+    # Same parameter as the default filter for the prompt field, so existing links still work
+    parameter_name = 'prompt__id__exact'
+
+    def lookups(self, request, model_admin):
+        # Participants only see (and so only count) their own journal entries
+        counts = models.JournalEntryPrompt.get_journal_entry_counts(author=request.user if request.user.is_participant else None)
+        return [(prompt.id, f'{prompt} ({counts.get(prompt.id, 0)})') for prompt in models.JournalEntryPrompt.objects.all()]
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        if not self.value().isdigit():
+            raise IncorrectLookupParameters(f'Invalid prompt: {self.value()}')
+        # Exists (rather than a join) so that entries aren't duplicated and no DISTINCT is needed
+        return queryset.filter(Exists(models.JournalEntry.prompt.through.objects.filter(
+            journalentry_id=OuterRef('pk'),
+            journalentryprompt_id=self.value()
+        )))
+
+
 class GenericAdminView(admin.ModelAdmin):
     """
     This is a generic class that can be applied to most models to customise their inclusion in the Django admin.
     """
 
     list_per_page = 100
+    # Large changelists show an estimated count and are paginated by created date (see core/pagination.py)
+    paginator = pagination.EstimatedCountPaginator
+    show_full_result_count = False
+
+    # File fields that are uploaded in chunks, so that large files can be uploaded reliably (see chunkedupload app)
+    chunked_upload_fields = ()
+
+    def get_changelist(self, request, **kwargs):
+        return pagination.KeysetChangeList
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        if db_field.name in self.chunked_upload_fields:
+            kwargs['widget'] = ChunkedFileInput(user=request.user)
+        return super().formfield_for_dbfield(db_field, request, **kwargs)
 
     def get_actions(self, request):
         actions = super().get_actions(request)
@@ -78,14 +124,15 @@ class JournalEntryAdminView(GenericAdminView):
     list_display = ('view_journal_entry',
                     'text_preview',
                     'link',
-                    'image',
+                    'image_thumbnail',
                     'audio',
                     'video',
                     'author',
                     'created',
                     'last_updated')
     list_display_links = ('view_journal_entry',)
-    list_filter = ('prompt',)
+    list_select_related = ('author',)
+    list_filter = (PromptListFilter,)
     search_fields = ('id',
                      'text',
                      'link',
@@ -93,6 +140,13 @@ class JournalEntryAdminView(GenericAdminView):
                      'audio',
                      'video',
                      'author__username')
+    # Search fields covered by the full text search index (see migration 0005_journalentry_search_index)
+    full_text_search_fields = ('text',
+                               'link',
+                               'image',
+                               'audio',
+                               'video')
+    chunked_upload_fields = ('audio', 'video')
     exclude = ('author',
                'created',
                'last_updated')
@@ -115,9 +169,39 @@ class JournalEntryAdminView(GenericAdminView):
     def get_queryset(self, request, obj=None):
         return custom_permissions.get_queryset_by_permission(self, request, 'hide_if_participant_is_not_author')
 
+    def get_search_results(self, request, queryset, search_term):
+        return search.get_search_results(self, request, queryset, search_term)
+
+    def get_ordering(self, request):
+        return search.get_ordering(self, request)
+
+    @admin.display(description='image', ordering='image')
+    def image_thumbnail(self, obj):
+        # A link to the image that shows its thumbnail, which is only loaded once it's scrolled into view
+        # Thumbnails are shown at half size, so they're sharp on high resolution screens
+        if obj.image:
+            width, height = settings.THUMBNAIL_SIZE
+            return format_html(
+                '<a href="{}" target="_blank"><img src="{}" alt="{}" loading="lazy" width="{}" height="{}"></a>',
+                obj.image.url, get_thumbnail_url(obj.image.name), obj.image.name, width // 2, height // 2
+            )
+
+    @admin.display(description='image preview')
+    def image_preview(self, obj):
+        # The browser picks the smallest of the image's variants (see mediafiles/images.py) that fits the preview,
+        # or the image itself if it hasn't been processed yet
+        return format_html(
+            '<img src="{}" srcset="{}" sizes="(max-width: 960px) 100vw, 960px" alt="{}" loading="lazy" style="max-width: 100%; height: auto;">',
+            obj.image.url, ImageVariant.get_srcset(obj.image.name), obj.image.name
+        )
+
     def get_readonly_fields(self, request, obj=None):
         # Only show time_left_to_edit if the object is being edited (i.e. if object already exists)
-        return ('time_left_to_edit',) if obj else []
+        readonly_fields = ['time_left_to_edit'] if obj else []
+        # A preview of the current image, if it has one
+        if obj and obj.image:
+            readonly_fields.append('image_preview')
+        return readonly_fields
 
     def save_model(self, request, obj, form, change):
         # Automatically set author to current user
@@ -138,43 +222,43 @@ class QuestionnaireAdminView(GenericAdminView):
     search_fields = ('title',
                      'link_to_questionnaire',
                      'author__username')
-
-    def changelist_view(self, request, extra_context=None):
-        """
-        Add the current user to the view to be used in other methods below
-        """
-        setattr(self, 'user', request.user)
-        return super().changelist_view(request, extra_context)
+    list_select_related = ('author',)
 
     def get_list_display(self, request, obj=None):
-        if request.user.role.name == 'participant':
+        link_to_complete_questionnaire = self.get_link_to_complete_questionnaire(request.user)
+        if request.user.is_participant:
             return ('title',
-                    'link_to_complete_questionnaire',)
+                    link_to_complete_questionnaire,)
         else:
             return ('view_questionnaire',
                     'title',
-                    'link_to_complete_questionnaire',
+                    link_to_complete_questionnaire,
                     'author',
                     'created',
                     'last_updated')
 
     def get_list_display_links(self, request, obj=None):
-        if request.user.role.name == 'participant':
+        if request.user.is_participant:
             return None
         else:
             return ('view_questionnaire',)
 
     def get_exclude(self, request, obj=None):
         exclude = ['author', 'created', 'last_updated']
-        if request.user.role.name == 'participant':
+        if request.user.is_participant:
             exclude.append('link_to_questionnaire')
         return exclude
 
-    def link_to_complete_questionnaire(self, obj=None):
+    def get_link_to_complete_questionnaire(self, user):
         """
-        Modify the questionnaire link to include the current participant's information
+        Returns a list_display column that modifies the questionnaire link to include the given participant's information
+
+        The column is created for each request, as this ModelAdmin is shared by all requests (including concurrent ones),
+        so mustn't store the current user itself
         """
-        return mark_safe(f'<a href="{obj.link_to_questionnaire}" target="_blank">{obj.link_to_questionnaire}</a><br>Secret Passcode: {self.user.id}')
+        def link_to_complete_questionnaire(obj):
+            return mark_safe(f'<a href="{obj.link_to_questionnaire}" target="_blank">{obj.link_to_questionnaire}</a><br>Secret Passcode: {user.id}')
+        return link_to_complete_questionnaire
 
     def has_module_permission(self, request, obj=None):
         return custom_permissions.get_permission(self, request, obj, 'all_users_in_strand')
@@ -5,3 +5,6 @@ app_name = "education"
 
 class ThisAppConfig(AppConfig):
     name = app_name
+
+    def ready(self):
+        from . import signals  # NOQA
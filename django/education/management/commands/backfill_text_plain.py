@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from downloaddata.models import ExportJob
+from education.models import JournalEntry
+
+
+class Command(BaseCommand):
+    """
+    Set the plain text versions (text_plain and text_preview) of existing journal entries
+
+    New and edited journal entries have these set automatically when saved, and existing ones are set by migrations,
+    so this is only needed if html_to_text() changes without a migration to recalculate them
+    """
+
+    help = 'Sets JournalEntry.text_plain and JournalEntry.text_preview for existing journal entries, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        batch = []
+        updated = 0
+        for journal_entry in JournalEntry.objects.only('id', 'text').order_by('id').iterator(chunk_size=batch_size):
+            journal_entry.set_text_plain()
+            batch.append(journal_entry)
+            if len(batch) >= batch_size:
+                updated += JournalEntry.objects.bulk_update(batch, ['text_plain', 'text_preview'])
+                batch = []
+        if batch:
+            updated += JournalEntry.objects.bulk_update(batch, ['text_plain', 'text_preview'])
+        # bulk_update() doesn't change last_updated, so the dataset fingerprint doesn't change either
+        ExportJob.invalidate_cached()
+        self.stdout.write(f'Updated {updated} journal entries')
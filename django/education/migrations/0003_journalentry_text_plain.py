@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0002_alter_journalentry_prompt_alter_journalentry_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='journalentry',
+            name='text_plain',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='journalentry',
+            name='text_preview',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0003_journalentry_text_plain'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['created'], name='education_j_created_d2efa1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['last_updated'], name='education_j_last_up_2f4c2b_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+import core.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0004_changed_since_indexes'),
+    ]
+
+    operations = [
+        core.search.CreateSearchIndex(
+            model_name='journalentry',
+            fields=['text_plain', 'link', 'image', 'audio', 'video'],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0005_journalentry_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='journalentry',
+            name='education_j_created_d2efa1_idx',
+        ),
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['created', 'id'], name='education_j_created_93f3a6_idx'),
+        ),
+    ]
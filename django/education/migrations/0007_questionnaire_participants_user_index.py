@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0006_created_id_index'),
+    ]
+
+    # Find the questionnaires that a participant is limited to (see custom_permissions.get_queryset_by_permission)
+    # The table is created automatically for the many to many field, so its indexes can't be set on a model
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX "education_questionnaire_limit_user_idx" ON "education_questionnaire_limit_to_certain_participants" ("user_id", "questionnaire_id")',
+            reverse_sql='DROP INDEX "education_questionnaire_limit_user_idx"',
+        ),
+    ]
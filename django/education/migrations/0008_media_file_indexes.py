@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0007_questionnaire_participants_user_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['image'], name='education_j_image_05631f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['audio'], name='education_j_audio_9cef99_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['video'], name='education_j_video_2a06ec_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+from django.utils.text import Truncator
+from core.text import html_to_text
+
+
+def set_text_plain(apps, schema_editor):
+    """
+    Set text_plain and text_preview of existing journal entries again,
+    as html_to_text() now converts the end of each paragraph (and other blocks) to a new line
+    """
+
+    JournalEntry = apps.get_model('education', 'JournalEntry')
+    batch = []
+    for journal_entry in JournalEntry.objects.only('id', 'text').order_by('id').iterator(chunk_size=500):
+        journal_entry.text_plain = html_to_text(journal_entry.text)
+        journal_entry.text_preview = Truncator(journal_entry.text_plain).chars(100)
+        batch.append(journal_entry)
+        if len(batch) >= 500:
+            JournalEntry.objects.bulk_update(batch, ['text_plain', 'text_preview'])
+            batch = []
+    if batch:
+        JournalEntry.objects.bulk_update(batch, ['text_plain', 'text_preview'])
+
+    # bulk_update() doesn't change last_updated, so the dataset fingerprint doesn't change either:
+    # stop reusing exports created with the old text_plain (see ExportJob.invalidate_cached)
+    ExportJob = apps.get_model('downloaddata', 'ExportJob')
+    ExportJob.objects.filter(status='complete').exclude(fingerprint=None).update(fingerprint=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0008_media_file_indexes'),
+        ('downloaddata', '0004_exportjob_since'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_text_plain, migrations.RunPython.noop),
+    ]
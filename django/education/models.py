@@ -1,10 +1,12 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from django.utils import timezone
 from django.utils.text import Truncator
-from django.utils.html import strip_tags
 from ckeditor_uploader.fields import RichTextUploadingField
 from datetime import date, timedelta
 from account.models import User
+from core.text import html_to_text
 
 
 class JournalEntryPrompt(models.Model):
@@ -15,6 +17,39 @@ class JournalEntryPrompt(models.Model):
     text = models.TextField(unique=True, blank=True, null=True)
     order = models.IntegerField(blank=True, null=True)
 
+    # Cached counts of journal entries per prompt are invalidated by changing this version (see signals.py)
+    counts_cache_version_key = 'education_journalentryprompt_counts_version'
+
+    @classmethod
+    def get_journal_entry_counts(cls, author=None):
+        """
+        Returns a dict of the number of journal entries that use each prompt: {prompt id: count}
+        Optionally only count the journal entries of the given author
+
+        Counts are cached for ADMIN_COUNT_CACHE_TIMEOUT seconds, or until a journal entry's prompts change (see signals.py)
+        """
+
+        version = cache.get_or_set(cls.counts_cache_version_key, 1, None)
+        cache_key = f'education_journalentryprompt_counts_{version}_{author.pk if author else "all"}'
+        counts = cache.get(cache_key)
+        if counts is None:
+            through = JournalEntry.prompt.through.objects.all()
+            if author is not None:
+                through = through.filter(journalentry__author=author)
+            counts = dict(
+                through.values_list('journalentryprompt_id').annotate(count=models.Count('journalentry_id')).order_by()
+            )
+            cache.set(cache_key, counts, settings.ADMIN_COUNT_CACHE_TIMEOUT)
+        return counts
+
+    @classmethod
+    def clear_journal_entry_counts(cls):
+        try:
+            cache.incr(cls.counts_cache_version_key)
+        except ValueError:
+            # The version isn't in the cache (e.g. it's been evicted), so nothing cached is reachable anyway
+            pass
+
     def __str__(self):
         return f'{self.order}) {self.text}' if self.order else self.text
 
@@ -37,6 +72,9 @@ class JournalEntry(models.Model):
         help_text="<br><strong style='color: #34495e; font-size: 1.3em;'>Please share any general reflections you have about the text you are reading. You can use the prompts above to focus your thinking.</strong><br>"
     )
     text = RichTextUploadingField(blank=True, null=True, help_text="Optional if providing content in another format below, e.g. audio/video.")
+    # Plain text versions of 'text', set automatically when saved (see set_text_plain)
+    text_plain = models.TextField(blank=True, default='', editable=False)
+    text_preview = models.CharField(max_length=100, blank=True, default='', editable=False)
     link = models.URLField(
         blank=True,
         null=True,
@@ -69,10 +107,6 @@ class JournalEntry(models.Model):
     def name(self):
         return f'Journal Entry: {self.author.username} ({self.created.date()} {str(self.created.time())[:5]})'
 
-    @property
-    def text_preview(self):
-        return strip_tags(Truncator(self.text).chars(100))
-
     @property
     def view_journal_entry(self):
         return 'View'
@@ -90,12 +124,34 @@ class JournalEntry(models.Model):
         else:
             return "You've run out of time to edit this journal entry"
 
+    def set_text_plain(self):
+        """
+        Set the plain text versions of the rich text, so it doesn't have to be converted each time it's shown
+        """
+        self.text_plain = html_to_text(self.text)
+        self.text_preview = Truncator(self.text_plain).chars(100)
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.set_text_plain()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'text_plain', 'text_preview'}
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-created']
         verbose_name_plural = 'journal entries'
+        indexes = [
+            models.Index(fields=['created', 'id']),
+            models.Index(fields=['last_updated']),
+            # Find the journal entry that a media file belongs to (see mediafiles app)
+            models.Index(fields=['image']),
+            models.Index(fields=['audio']),
+            models.Index(fields=['video']),
+        ]
 
 
 class Questionnaire(models.Model):
@@ -0,0 +1,16 @@
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+from .models import JournalEntry, JournalEntryPrompt
+
+
+@receiver(m2m_changed, sender=JournalEntry.prompt.through)
+@receiver([post_save, post_delete], sender=JournalEntry)
+@receiver([post_save, post_delete], sender=JournalEntryPrompt)
+def clear_journal_entry_prompt_counts(sender, **kwargs):
+    """
+    Recount the journal entries of each prompt (see JournalEntryPrompt.get_journal_entry_counts) when next needed
+
+    Saving a journal entry can change its author, and so the counts of that author's journal entries
+    """
+
+    JournalEntryPrompt.clear_journal_entry_counts()
@@ -0,0 +1,190 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+from account import lookups
+from core.testing import QueryBudgetMixin, create_user
+from . import models
+import re
+import threading
+
+
+class AdminQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """
+    The number of queries made by the admin pages mustn't grow with the number of objects shown (e.g. one query per row)
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('budget-admin', lookups.ROLE_ADMIN)
+        cls.participants = [create_user(f'budget-participant-{i}', lookups.ROLE_PARTICIPANT, lookups.STRAND_EDUCATION) for i in range(3)]
+        prompts = [models.JournalEntryPrompt.objects.create(text=f'Prompt {i}', order=i) for i in range(3)]
+        for i in range(30):
+            participant = cls.participants[i % len(cls.participants)]
+            journal_entry = models.JournalEntry.objects.create(
+                author=participant,
+                text=f'<p>Journal entry {i}</p>',
+                image=f'education/journal_entry/image/{i}.jpg',
+                audio=f'education/journal_entry/audio/{i}.mp3',
+            )
+            journal_entry.prompt.set(prompts[:i % 3])
+            questionnaire = models.Questionnaire.objects.create(title=f'Questionnaire {i}', link_to_questionnaire='https://www.example.com', author=cls.admin)
+            questionnaire.limit_to_certain_participants.set(cls.participants[:i % 3])
+        cls.journal_entry = models.JournalEntry.objects.filter(author=cls.participants[0]).first()
+        cls.questionnaire = models.Questionnaire.objects.filter(limit_to_certain_participants=None).first()
+
+    def test_journal_entry_changelist(self):
+        url = reverse('admin:education_journalentry_changelist')
+        self.assertNumQueriesForPage(4, self.admin, url)
+        self.assertNumQueriesForPage(5, self.participants[0], url)
+
+    def test_journal_entry_change(self):
+        url = reverse('admin:education_journalentry_change', args=[self.journal_entry.pk])
+        self.assertNumQueriesForPage(8, self.admin, url)
+        self.assertNumQueriesForPage(8, self.participants[0], url)
+
+    def test_questionnaire_changelist(self):
+        url = reverse('admin:education_questionnaire_changelist')
+        self.assertNumQueriesForPage(3, self.admin, url)
+        self.assertNumQueriesForPage(4, self.participants[0], url)
+
+    def test_questionnaire_change(self):
+        url = reverse('admin:education_questionnaire_change', args=[self.questionnaire.pk])
+        self.assertNumQueriesForPage(7, self.admin, url)
+        self.assertNumQueriesForPage(6, self.participants[0], url)
+
+
+class QuestionnaireVisibilityTest(TestCase):
+    """
+    Participants see the questionnaires that are limited to them and those that aren't limited to anyone, each only once
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('visibility-admin', lookups.ROLE_ADMIN)
+        cls.participants = [create_user(f'visibility-participant-{i}', lookups.ROLE_PARTICIPANT, lookups.STRAND_EDUCATION) for i in range(4)]
+        cls.limited = models.Questionnaire.objects.create(title='Limited', link_to_questionnaire='https://www.example.com/limited')
+        # Limited to several participants, so a join on the participants table would return this questionnaire more than once
+        cls.limited.limit_to_certain_participants.set(cls.participants[:3])
+        cls.unlimited = models.Questionnaire.objects.create(title='Unlimited', link_to_questionnaire='https://www.example.com/unlimited')
+
+    def get_changelist_results(self, user):
+        self.client.force_login(user)
+        response = self.client.get(reverse('admin:education_questionnaire_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['cl'].result_list)
+
+    def test_participants_see_limited_questionnaires_once(self):
+        for participant in self.participants[:3]:
+            with self.subTest(participant=participant.username):
+                self.assertCountEqual(self.get_changelist_results(participant), [self.limited, self.unlimited])
+
+    def test_other_participants_only_see_unlimited_questionnaires(self):
+        self.assertEqual(self.get_changelist_results(self.participants[3]), [self.unlimited])
+
+    def test_admins_see_all_questionnaires_once(self):
+        self.assertCountEqual(self.get_changelist_results(self.admin), [self.limited, self.unlimited])
+
+
+class QuestionnaireChangelistConcurrencyTest(TransactionTestCase):
+    """
+    The questionnaire changelist shows each participant their own passcode, even when rendered for several participants at the same time
+    (the ModelAdmin is shared by all requests, so mustn't store the current user)
+    """
+
+    # Keep the roles and strands created by migrations, which are removed when the database is flushed after each test
+    serialized_rollback = True
+
+    def test_each_participant_sees_only_their_own_passcode(self):
+        participants = [create_user(f'concurrent-participant-{i}', lookups.ROLE_PARTICIPANT, lookups.STRAND_EDUCATION) for i in range(6)]
+        for i in range(5):
+            models.Questionnaire.objects.create(title=f'Questionnaire {i}', link_to_questionnaire='https://www.example.com')
+        url = reverse('admin:education_questionnaire_changelist')
+        barrier = threading.Barrier(len(participants))
+        passcodes = {}
+        errors = []
+
+        def render_changelist(participant):
+            try:
+                client = Client()
+                client.force_login(participant)
+                # Start all requests at the same time, so they're rendered concurrently
+                barrier.wait()
+                for _ in range(10):
+                    response = client.get(url)
+                    passcodes.setdefault(participant.id, set()).update(
+                        int(passcode) for passcode in re.findall(r'Secret Passcode: (\d+)', response.content.decode())
+                    )
+            except Exception as err:
+                errors.append(err)
+                barrier.abort()
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=render_changelist, args=(participant,)) for participant in participants]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(passcodes, {participant.id: {participant.id} for participant in participants})
+
+
+class JournalEntryPromptCountsTest(TestCase):
+    """
+    Cached counts of journal entries per prompt (see JournalEntryPrompt.get_journal_entry_counts)
+    must change as soon as journal entries or prompts change (see signals.py)
+    """
+
+    def setUp(self):
+        # Cached counts aren't rolled back with the database after each test
+        cache.clear()
+        self.author = create_user('counts-author', lookups.ROLE_PARTICIPANT, lookups.STRAND_EDUCATION)
+        self.other_author = create_user('counts-other', lookups.ROLE_PARTICIPANT, lookups.STRAND_EDUCATION)
+        self.prompts = [models.JournalEntryPrompt.objects.create(text=f'Prompt {i}', order=i) for i in range(1, 3)]
+        self.journal_entry = models.JournalEntry.objects.create(author=self.author)
+        self.journal_entry.prompt.set(self.prompts)
+
+    def get_counts(self, author=None):
+        counts = models.JournalEntryPrompt.get_journal_entry_counts(author)
+        # The counts are cached
+        with self.assertNumQueries(0):
+            self.assertEqual(models.JournalEntryPrompt.get_journal_entry_counts(author), counts)
+        return counts
+
+    def test_adding_and_removing_prompts(self):
+        self.assertEqual(self.get_counts(), {self.prompts[0].pk: 1, self.prompts[1].pk: 1})
+        other = models.JournalEntry.objects.create(author=self.other_author)
+        other.prompt.add(self.prompts[0])
+        self.assertEqual(self.get_counts(), {self.prompts[0].pk: 2, self.prompts[1].pk: 1})
+        self.journal_entry.prompt.remove(self.prompts[1])
+        self.assertEqual(self.get_counts(), {self.prompts[0].pk: 2})
+        self.prompts[0].journal_entries.clear()
+        self.assertEqual(self.get_counts(), {})
+
+    def test_deleting_journal_entry(self):
+        self.assertEqual(self.get_counts(), {self.prompts[0].pk: 1, self.prompts[1].pk: 1})
+        self.journal_entry.delete()
+        self.assertEqual(self.get_counts(), {})
+
+    def test_deleting_prompt(self):
+        self.assertEqual(self.get_counts(), {self.prompts[0].pk: 1, self.prompts[1].pk: 1})
+        self.prompts[1].delete()
+        self.assertEqual(self.get_counts(), {self.prompts[0].pk: 1})
+
+    def test_counts_of_each_author(self):
+        self.assertEqual(self.get_counts(self.author), {self.prompts[0].pk: 1, self.prompts[1].pk: 1})
+        self.assertEqual(self.get_counts(self.other_author), {})
+        self.journal_entry.author = self.other_author
+        self.journal_entry.save()
+        self.assertEqual(self.get_counts(self.author), {})
+        self.assertEqual(self.get_counts(self.other_author), {self.prompts[0].pk: 1, self.prompts[1].pk: 1})
+
+    def test_prompt_filter_shows_current_counts(self):
+        admin = create_user('counts-admin', lookups.ROLE_ADMIN)
+        self.client.force_login(admin)
+        url = reverse('admin:education_journalentry_changelist')
+        self.assertContains(self.client.get(url), '1) Prompt 1 (1)')
+        models.JournalEntry.objects.create(author=self.other_author).prompt.add(self.prompts[0])
+        self.assertContains(self.client.get(url), '1) Prompt 1 (2)')
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.db.models import ManyToManyField, ForeignKey
 from django.utils import timezone
-from core import custom_permissions
+from core import custom_permissions, pagination, search
+from chunkedupload.widgets import ChunkedFileInput
 from . import models
 
 
@@ -27,6 +28,20 @@ class GenericAdminView(admin.ModelAdmin):
     """
 
     list_per_page = 100
+    # Large changelists show an estimated count and are paginated by created date (see core/pagination.py)
+    paginator = pagination.EstimatedCountPaginator
+    show_full_result_count = False
+
+    # File fields that are uploaded in chunks, so that large files can be uploaded reliably (see chunkedupload app)
+    chunked_upload_fields = ()
+
+    def get_changelist(self, request, **kwargs):
+        return pagination.KeysetChangeList
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        if db_field.name in self.chunked_upload_fields:
+            kwargs['widget'] = ChunkedFileInput(user=request.user)
+        return super().formfield_for_dbfield(db_field, request, **kwargs)
 
     def get_actions(self, request):
         actions = super().get_actions(request)
@@ -56,10 +71,15 @@ class ConversationAdminView(GenericAdminView):
                     'created',
                     'last_updated')
     list_display_links = ('view_conversation',)
+    list_select_related = ('author',)
     search_fields = ('id',
                      'conversation_audio',
                      'cancer_champion_reflection',
                      'author__username')
+    # Search fields covered by the full text search index (see migration 0003_conversation_search_index)
+    full_text_search_fields = ('conversation_audio',
+                               'cancer_champion_reflection')
+    chunked_upload_fields = ('conversation_audio',)
     exclude = ('author',
                'created',
                'last_updated')
@@ -69,7 +89,7 @@ class ConversationAdminView(GenericAdminView):
             'conversation_date',
             'conversation_audio',
         ]
-        if request.user.role.name == 'admin':
+        if request.user.is_admin:
             fields += ['conversation_transcript',]
         fields += ['cancer_champion_reflection',]
         return fields
@@ -92,6 +112,12 @@ class ConversationAdminView(GenericAdminView):
     def get_queryset(self, request, obj=None):
         return custom_permissions.get_queryset_by_permission(self, request, 'hide_if_participant_is_not_author')
 
+    def get_search_results(self, request, queryset, search_term):
+        return search.get_search_results(self, request, queryset, search_term)
+
+    def get_ordering(self, request):
+        return search.get_ordering(self, request)
+
     def save_model(self, request, obj, form, change):
         # Automatically set author to current user
         if obj.author is None:
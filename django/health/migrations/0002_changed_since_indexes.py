@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['created'], name='health_conv_created_652816_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['last_updated'], name='health_conv_last_up_030e37_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+import core.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0002_changed_since_indexes'),
+    ]
+
+    operations = [
+        core.search.CreateSearchIndex(
+            model_name='conversation',
+            fields=['cancer_champion_reflection', 'conversation_audio'],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0003_conversation_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='conversation',
+            name='health_conv_created_652816_idx',
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['created', 'id'], name='health_conv_created_d913df_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0004_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['conversation_audio'], name='health_conv_convers_51193e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['conversation_transcript'], name='health_conv_convers_031e0e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['video'], name='health_vide_video_3af7d5_idx'),
+        ),
+    ]
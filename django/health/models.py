@@ -45,6 +45,13 @@ class Conversation(models.Model):
 
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['created', 'id']),
+            models.Index(fields=['last_updated']),
+            # Find the conversation that a media file belongs to (see mediafiles app)
+            models.Index(fields=['conversation_audio']),
+            models.Index(fields=['conversation_transcript']),
+        ]
 
 
 class Video(models.Model):
@@ -71,3 +78,7 @@ class Video(models.Model):
 
     class Meta:
         ordering = ['-created']
+        indexes = [
+            # Find the video that a media file belongs to (see mediafiles app)
+            models.Index(fields=['video']),
+        ]
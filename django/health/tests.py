@@ -0,0 +1,35 @@
+from django.test import TestCase
+from django.urls import reverse
+from account import lookups
+from core.testing import QueryBudgetMixin, create_user
+from datetime import date
+from . import models
+
+
+class AdminQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """
+    The number of queries made by the admin pages mustn't grow with the number of objects shown (e.g. one query per row)
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user('budget-admin', lookups.ROLE_ADMIN)
+        cls.participants = [create_user(f'budget-participant-{i}', lookups.ROLE_PARTICIPANT, lookups.STRAND_HEALTH) for i in range(3)]
+        for i in range(30):
+            models.Conversation.objects.create(
+                author=cls.participants[i % len(cls.participants)],
+                conversation_date=date(2024, 1, 1 + i),
+                conversation_audio=f'health/conversation/audio/{i}.mp3',
+                cancer_champion_reflection=f'Reflection {i}',
+            )
+        cls.conversation = models.Conversation.objects.filter(author=cls.participants[0]).first()
+
+    def test_conversation_changelist(self):
+        url = reverse('admin:health_conversation_changelist')
+        self.assertNumQueriesForPage(3, self.admin, url)
+        self.assertNumQueriesForPage(4, self.participants[0], url)
+
+    def test_conversation_change(self):
+        url = reverse('admin:health_conversation_change', args=[self.conversation.pk])
+        self.assertNumQueriesForPage(5, self.admin, url)
+        self.assertNumQueriesForPage(5, self.participants[0], url)
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+app_name = "mediafiles"
+
+
+class ThisAppConfig(AppConfig):
+    name = app_name
@@ -0,0 +1,127 @@
+"""
+Processing of uploaded images, which is run in the background by the 'run_image_worker' command (see models.ImageProcessingJob)
+
+- normalise_image(): rotates an image to match its EXIF orientation, removes its EXIF data (which can include the location
+  a photo was taken), resizes it to fit within IMAGE_MAX_SIZE and compresses it. The image is replaced in place, so its name is unchanged.
+- create_variant(): creates a smaller WebP copy of an image, for pages that show the image at a smaller size.
+  Variants are stored in the VARIANTS_FOLDER of the media folder, e.g. variants/education/journal_entry/image/photo.jpg_960w.webp
+"""
+
+from django.conf import settings
+from django.db.models import ImageField
+from PIL import features, Image, ImageOps
+from .owners import get_media_index, is_uploaded_by_editor
+from .thumbnails import SOURCE_FORMATS
+import os
+import posixpath
+import uuid
+
+
+VARIANTS_FOLDER = 'variants/'
+
+# Variants are only created if Pillow is built with libwebp
+CAN_CREATE_VARIANTS = features.check('webp')
+
+# The extensions of images that are processed
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def is_processed_image(name):
+    """
+    Returns True if the media file with the given name is an uploaded image that should be processed,
+    i.e. an image uploaded to an image field or via the rich text editor
+    """
+
+    stem, extension = os.path.splitext(name)
+    if extension.lower() not in IMAGE_EXTENSIONS or name.startswith(VARIANTS_FOLDER):
+        return False
+    if is_uploaded_by_editor(name):
+        # The editor also saves a thumbnail of each image, which isn't processed
+        return not stem.endswith('_thumb')
+    return any(
+        isinstance(model._meta.get_field(field_name), ImageField)
+        for model, field_name in get_media_index().get(posixpath.dirname(name), [])
+    )
+
+
+def save_image(image, full_path, image_format, only_if_smaller=False, **options):
+    """
+    Save the image to the given path, writing to a temporary file first so a partly written image is never served
+
+    If only_if_smaller, an existing file is only replaced if the new file is smaller. Returns True if the file was saved.
+    """
+
+    temporary_path = f'{full_path}.{uuid.uuid4().hex[:8]}.tmp'
+    try:
+        image.save(temporary_path, image_format, **options)
+        if only_if_smaller and os.path.getsize(temporary_path) >= os.path.getsize(full_path):
+            return False
+        os.replace(temporary_path, full_path)
+        return True
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def normalise_image(full_path):
+    """
+    Rotate the image at the given path to match its EXIF orientation, remove its EXIF data, resize it to fit within IMAGE_MAX_SIZE
+    and compress it (JPEG and WebP at IMAGE_QUALITY, PNG losslessly), in its original format
+
+    If the image doesn't need rotating, removing EXIF data from or resizing,
+    it's only replaced if compressing it makes it smaller (e.g. it isn't replaced if it was already compressed).
+    Animated images aren't changed. Returns the (width, height) of the image.
+    """
+
+    with Image.open(full_path, formats=SOURCE_FORMATS) as image:
+        image_format = image.format
+        if getattr(image, 'is_animated', False):
+            return image.size
+        max_width, max_height = settings.IMAGE_MAX_SIZE
+        must_change = bool(image.getexif()) or image.width > max_width or image.height > max_height
+
+        icc_profile = image.info.get('icc_profile')
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(settings.IMAGE_MAX_SIZE, Image.Resampling.LANCZOS)
+
+    # Saved without the EXIF data, but with the colour profile (so colours are unchanged)
+    options = {'icc_profile': icc_profile} if icc_profile else {}
+    if image_format == 'JPEG':
+        options.update(quality=settings.IMAGE_QUALITY, optimize=True)
+        if image.mode not in ('RGB', 'L', 'CMYK'):
+            image = image.convert('RGB')
+    elif image_format == 'PNG':
+        options.update(optimize=True)
+    elif image_format == 'WEBP':
+        options.update(quality=settings.IMAGE_QUALITY)
+    save_image(image, full_path, image_format, only_if_smaller=not must_change, **options)
+    return image.size
+
+
+def get_variant_name(name, width):
+    """
+    Returns the name of the variant of the image with the given name at the given width
+    """
+
+    # The name includes the image's extension, so images that only differ by extension (e.g. photo.jpg and photo.png) have different variants
+    return f'{VARIANTS_FOLDER}{name}_{width}w.webp'
+
+
+def create_variant(name, width):
+    """
+    Create a WebP copy of the (normalised) image with the given name, resized to the given width
+
+    Returns the name, width, height and size (bytes) of the variant
+    """
+
+    variant_name = get_variant_name(name, width)
+    variant_path = os.path.join(settings.MEDIA_ROOT, variant_name)
+    with Image.open(os.path.join(settings.MEDIA_ROOT, name), formats=SOURCE_FORMATS) as image:
+        height = max(round(image.height * width / image.width), 1)
+        variant = image.resize((width, height), Image.Resampling.LANCZOS)
+    if variant.mode not in ('RGB', 'RGBA'):
+        variant = variant.convert('RGBA')
+
+    os.makedirs(os.path.dirname(variant_path), exist_ok=True)
+    save_image(variant, variant_path, 'WEBP', quality=settings.IMAGE_QUALITY)
+    return variant_name, width, height, os.path.getsize(variant_path)
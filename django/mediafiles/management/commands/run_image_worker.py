@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from mediafiles.models import ImageProcessingJob
+from mediafiles import images, owners
+import os
+import time
+
+
+class Command(BaseCommand):
+    """
+    Process pending ImageProcessingJob objects in the background, away from the web workers
+
+    Run continuously (e.g. as a systemd service): python manage.py run_image_worker
+    Or process all pending jobs and exit (e.g. from cron): python manage.py run_image_worker --once
+    To also process images uploaded before images were processed: python manage.py run_image_worker --once --existing
+    """
+
+    help = 'Claims and runs pending image processing jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process all pending jobs and then exit')
+        parser.add_argument('--poll-interval', type=float, default=5, help='Seconds to wait between checks for new jobs')
+        parser.add_argument('--existing', action='store_true', help='First create jobs for existing images that have never been processed')
+
+    def handle(self, *args, **options):
+        if options['existing']:
+            self.enqueue_existing()
+        while True:
+            job = ImageProcessingJob.claim_next()
+            if job:
+                job.run()
+                self.stdout.write(f'Image processing job {job.pk} ({job.name}) finished: {job.status}')
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['poll_interval'])
+
+    def enqueue_existing(self):
+        """
+        Create jobs for the existing images in the media folder that haven't been processed (or queued) yet
+        """
+        processed = set(ImageProcessingJob.objects.values_list('name', flat=True))
+        created = 0
+        for folder in [*owners.get_media_index(), settings.CKEDITOR_UPLOAD_PATH]:
+            for root, _, file_names in os.walk(os.path.join(settings.MEDIA_ROOT, folder)):
+                for file_name in file_names:
+                    name = os.path.relpath(os.path.join(root, file_name), settings.MEDIA_ROOT).replace(os.sep, '/')
+                    if name not in processed and images.is_processed_image(name):
+                        ImageProcessingJob.enqueue(name)
+                        processed.add(name)
+                        created += 1
+        self.stdout.write(f'Created {created} image processing jobs for existing images')
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageProcessingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, help_text='Name of the image in the media folder, e.g. education/journal_entry/image/photo.jpg', max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('complete', 'Complete'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('original_size', models.BigIntegerField(blank=True, help_text='Size of the uploaded image, in bytes', null=True)),
+                ('size', models.BigIntegerField(blank=True, help_text='Size of the image once processed, in bytes', null=True)),
+                ('width', models.IntegerField(blank=True, null=True)),
+                ('height', models.IntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ImageVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Name of the variant in the media folder', max_length=255, unique=True)),
+                ('width', models.IntegerField()),
+                ('height', models.IntegerField()),
+                ('size', models.BigIntegerField(help_text='Size of the variant, in bytes')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='mediafiles.imageprocessingjob')),
+            ],
+            options={
+                'ordering': ['width'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='imageprocessingjob',
+            index=models.Index(fields=['status', 'created'], name='mediafiles__status_aa35e1_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='imageprocessingjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('name',), name='mediafiles_imageprocessingjob_single_pending'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mediafiles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imageprocessingjob',
+            name='attempts',
+            field=models.IntegerField(default=0, help_text='Number of times the job has been claimed by a worker'),
+        ),
+    ]
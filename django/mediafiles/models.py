@@ -0,0 +1,188 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models
+from django.utils import timezone
+from . import images
+from datetime import timedelta
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class ImageProcessingJob(models.Model):
+    """
+    A request to process an uploaded image (see images.py): normalise it and create its variants
+
+    Jobs are created when an image is saved (see storage.py) and processed in the background by the 'run_image_worker' management command,
+    so saving a journal entry (or uploading an image in the rich text editor) doesn't wait for the image to be processed
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETE = 'complete'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETE, 'Complete'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=255, db_index=True, help_text='Name of the image in the media folder, e.g. education/journal_entry/image/photo.jpg')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    original_size = models.BigIntegerField(blank=True, null=True, help_text='Size of the uploaded image, in bytes')
+    size = models.BigIntegerField(blank=True, null=True, help_text='Size of the image once processed, in bytes')
+    width = models.IntegerField(blank=True, null=True)
+    height = models.IntegerField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    attempts = models.IntegerField(default=0, help_text='Number of times the job has been claimed by a worker')
+
+    created = models.DateTimeField(default=timezone.now)
+    started = models.DateTimeField(blank=True, null=True)
+    finished = models.DateTimeField(blank=True, null=True)
+
+    @property
+    def full_path(self):
+        return os.path.join(settings.MEDIA_ROOT, self.name)
+
+    @classmethod
+    def enqueue(cls, name):
+        """
+        Create a pending job for the image with the given name, unless there's one already
+        """
+        return cls.objects.get_or_create(name=name, status=cls.STATUS_PENDING)[0]
+
+    @classmethod
+    def claim_next(cls):
+        """
+        Claim the oldest pending job and mark it as running, returning None if there are no pending jobs
+
+        The status is only changed if the job is still pending when the UPDATE runs,
+        so multiple workers can safely poll the same table without running a job twice.
+        If there are no pending jobs, a job that has timed out (see reclaim_timed_out) is claimed instead.
+        """
+        for job in cls.objects.filter(status=cls.STATUS_PENDING).order_by('created', 'id')[:10]:
+            claimed = cls.objects.filter(pk=job.pk, status=cls.STATUS_PENDING).update(
+                status=cls.STATUS_RUNNING,
+                started=timezone.now(),
+                attempts=models.F('attempts') + 1
+            )
+            if claimed:
+                job.refresh_from_db()
+                return job
+        return cls.reclaim_timed_out()
+
+    @classmethod
+    def reclaim_timed_out(cls):
+        """
+        Claim the oldest job that has been running for longer than IMAGE_JOB_TIMEOUT (e.g. because its worker was stopped),
+        returning None if there isn't one
+
+        Jobs that have already been claimed IMAGE_JOB_MAX_ATTEMPTS times are marked as failed instead,
+        so an image that stops the worker (e.g. by using too much memory) isn't run again and again.
+        The job is only claimed if its start time is unchanged when the UPDATE runs, so only one worker can reclaim it.
+        """
+        timed_out = cls.objects.filter(
+            status=cls.STATUS_RUNNING,
+            started__lt=timezone.now() - timedelta(seconds=settings.IMAGE_JOB_TIMEOUT)
+        )
+        for job in timed_out.order_by('started', 'id')[:10]:
+            still_timed_out = cls.objects.filter(pk=job.pk, status=cls.STATUS_RUNNING, started=job.started)
+            if job.attempts >= settings.IMAGE_JOB_MAX_ATTEMPTS:
+                still_timed_out.update(status=cls.STATUS_FAILED, error='Timed out', finished=timezone.now())
+                continue
+            if still_timed_out.update(started=timezone.now(), attempts=models.F('attempts') + 1):
+                job.refresh_from_db()
+                return job
+        return None
+
+    def run(self):
+        """
+        Normalise the image, replace the variants of any previous job for the same image and record the outcome
+        """
+        try:
+            self.original_size = os.path.getsize(self.full_path)
+            self.width, self.height = images.normalise_image(self.full_path)
+            self.size = os.path.getsize(self.full_path)
+            ImageVariant.delete_for_image(self.name)
+            if images.CAN_CREATE_VARIANTS:
+                for width in settings.IMAGE_VARIANT_WIDTHS:
+                    if width < self.width:
+                        variant_name, variant_width, variant_height, variant_size = images.create_variant(self.name, width)
+                        self.variants.create(name=variant_name, width=variant_width, height=variant_height, size=variant_size)
+            self.status = self.STATUS_COMPLETE
+        except Exception as err:
+            logger.exception('Image processing job %s failed', self.pk)
+            self.error = str(err)
+            self.status = self.STATUS_FAILED
+        self.finished = timezone.now()
+        self.save()
+
+    def __str__(self):
+        return f'Image Processing Job: {self.name} ({self.get_status_display()})'
+
+    class Meta:
+        ordering = ['-created']
+        indexes = [
+            models.Index(fields=['status', 'created']),
+        ]
+        constraints = [
+            # Only one pending job per image, however many times it's saved before being processed
+            models.UniqueConstraint(
+                fields=['name'],
+                condition=models.Q(status='pending'),
+                name='mediafiles_imageprocessingjob_single_pending'
+            ),
+        ]
+
+
+class ImageVariant(models.Model):
+    """
+    A smaller WebP copy of a processed image (see images.create_variant), e.g. for use in an img srcset
+    """
+
+    related_name = 'variants'
+
+    job = models.ForeignKey(ImageProcessingJob, related_name=related_name, on_delete=models.CASCADE)
+    name = models.CharField(max_length=255, unique=True, help_text='Name of the variant in the media folder')
+    width = models.IntegerField()
+    height = models.IntegerField()
+    size = models.BigIntegerField(help_text='Size of the variant, in bytes')
+
+    @property
+    def url(self):
+        return default_storage.url(self.name)
+
+    @classmethod
+    def get_srcset(cls, name):
+        """
+        Returns the srcset of the image with the given name: its variants followed by the image itself,
+        e.g. 'a.jpg_480w.webp 480w, a.jpg_960w.webp 960w, a.jpg 2560w'
+        Returns an empty string if it doesn't have any variants (yet), e.g. if it hasn't been processed
+        """
+        variants = list(cls.objects.filter(job__name=name).select_related('job'))
+        if not variants:
+            return ''
+        return ', '.join([
+            *(f'{variant.url} {variant.width}w' for variant in variants),
+            f'{default_storage.url(name)} {variants[0].job.width}w'
+        ])
+
+    @classmethod
+    def delete_for_image(cls, name):
+        """
+        Delete the variants (and their files) of the image with the given name
+        """
+        for variant in cls.objects.filter(job__name=name):
+            try:
+                os.remove(os.path.join(settings.MEDIA_ROOT, variant.name))
+            except FileNotFoundError:
+                pass
+            variant.delete()
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ['width']
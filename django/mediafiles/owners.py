@@ -0,0 +1,65 @@
+"""
+Find the object that a media file belongs to, so that access to the file can be checked
+
+Media files are found by the folder they're uploaded to (the upload_to of the model's FileField, see get_media_index)
+and then by the file's name in the database (each file field has an index, see the models' Meta.indexes).
+Access is checked using the same permissions as the Django admin (see core/custom_permissions.py):
+a user can view a file if they can view the object that it belongs to in the admin.
+"""
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib import admin
+from django.db.models import FileField, ImageField
+from functools import lru_cache
+import posixpath
+
+
+@lru_cache(maxsize=None)
+def get_media_index():
+    """
+    Returns a dict of each folder that files are uploaded to (e.g. 'education/journal_entry/image')
+    and a list of the (model, field name) of the file fields that upload to it
+    """
+
+    index = {}
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, FileField) and isinstance(field.upload_to, str):
+                index.setdefault(field.upload_to.strip('/'), []).append((model, field.name))
+    return index
+
+
+def is_uploaded_by_editor(path):
+    """
+    Returns True if the file was uploaded via the rich text editor (e.g. an image within the text of a journal entry)
+
+    These files can't be linked to an object, so are available to all logged in users
+    """
+
+    return path.startswith(settings.CKEDITOR_UPLOAD_PATH)
+
+
+def get_owner(request, path, image_only=False):
+    """
+    Returns the object that the media file at the given path (relative to MEDIA_ROOT) belongs to,
+    or None if there isn't one or the current user isn't permitted to view it
+
+    If image_only, only files of image fields are found
+    """
+
+    for model, field_name in get_media_index().get(posixpath.dirname(path), []):
+        if image_only and not isinstance(model._meta.get_field(field_name), ImageField):
+            continue
+        model_admin = admin.site._registry.get(model)
+        if model_admin is None:
+            # Objects that aren't in the admin (e.g. health videos) can only be viewed by admins
+            queryset = model.objects.all() if request.user.is_admin else None
+        else:
+            queryset = model_admin.get_queryset(request)
+        if queryset is None:
+            continue
+        obj = queryset.filter(**{field_name: path}).first()
+        if obj is not None and (model_admin is None or model_admin.has_view_or_change_permission(request, obj)):
+            return obj
+    return None
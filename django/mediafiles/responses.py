@@ -0,0 +1,218 @@
+"""
+Responses that send a media file, once access to it has been checked (see views.py)
+
+In production the file is sent by the front-end web server, so that Django doesn't have to read the file
+and a worker isn't tied up for the whole download (see MEDIA_SERVER in settings.py):
+- 'x-accel-redirect': nginx sends the file from an internal location (MEDIA_INTERNAL_URL), e.g.
+      location /protected-media/ {
+          internal;
+          alias /path/to/django/media/;
+      }
+- 'x-sendfile': Apache (with mod_xsendfile enabled and XSendFilePath set to MEDIA_ROOT) sends the file
+- None: Django sends the file (for development), see file_response()
+
+The web servers handle Range requests (used when seeking in audio and video) and conditional requests themselves,
+and file_response() does the same when Django sends the file.
+"""
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.encoding import iri_to_uri
+from django.utils.http import http_date, parse_http_date_safe
+import mimetypes
+import os
+import re
+import secrets
+
+
+# Size of each block read from a file when sending part of it
+BLOCK_SIZE = 64 * 1024
+# Range requests with more ranges than this are sent the whole file instead (as permitted by RFC 9110)
+MAX_RANGES = 20
+
+RANGE_SPEC_RE = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+
+
+def get_etag(stat):
+    """
+    Returns a strong ETag of a file, which changes whenever the file is modified
+    """
+
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range_header(header, size):
+    """
+    Returns a list of the (start, end) byte ranges (end is inclusive) requested by the given Range header
+    within a file of the given size, in order and with overlapping ranges combined.
+    An empty list means none of the ranges can be satisfied.
+
+    Returns None if the header is invalid (or requests too many ranges), in which case it's ignored and the whole file is sent
+    """
+
+    unit, _, range_specs = header.partition('=')
+    if unit.strip().lower() != 'bytes':
+        return None
+    range_specs = range_specs.split(',')
+    if len(range_specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for range_spec in range_specs:
+        match = RANGE_SPEC_RE.match(range_spec)
+        if match is None:
+            return None
+        start, end = match.groups()
+        if start:
+            start = int(start)
+            if end and int(end) < start:
+                return None
+            end = int(end) if end else size - 1
+        elif end:
+            # A suffix range, i.e. the last <end> bytes of the file
+            if int(end) == 0:
+                continue
+            start, end = max(size - int(end), 0), size - 1
+        else:
+            return None
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+
+    combined_ranges = []
+    for start, end in sorted(ranges):
+        if combined_ranges and start <= combined_ranges[-1][1] + 1:
+            combined_ranges[-1] = (combined_ranges[-1][0], max(end, combined_ranges[-1][1]))
+        else:
+            combined_ranges.append((start, end))
+    return combined_ranges
+
+
+def is_if_range_current(request, etag, last_modified):
+    """
+    Returns True if there's no If-Range header, or if it matches the current version of the file
+    (otherwise the file has changed since the client received the first part of it, so the whole file is sent)
+    """
+
+    if_range = request.headers.get('If-Range')
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    # Weak ETags (W/"...") never match, as the ranges of a file must be byte for byte the same
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def read_range(full_path, start, end):
+    """
+    Yields the bytes of the file between start and end (inclusive) in blocks, so the file isn't loaded into memory
+    """
+
+    with open(full_path, 'rb') as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            data = file.read(min(BLOCK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+def read_ranges(full_path, parts, closing):
+    """
+    Yields the parts of a multipart/byteranges response: the headers of each part followed by its range of the file
+    """
+
+    for part_header, start, end in parts:
+        yield part_header
+        yield from read_range(full_path, start, end)
+        yield b'\r\n'
+    yield closing
+
+
+def file_response(request, full_path, content_type):
+    """
+    Returns a response that sends the file at the given path, or the parts of it requested in a Range header,
+    or 'Not Modified' if the client's copy of the file is current
+    """
+
+    stat = os.stat(full_path)
+    size = stat.st_size
+    etag = get_etag(stat)
+    last_modified = int(stat.st_mtime)
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+    }
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        # 304 Not Modified or 412 Precondition Failed
+        for header, value in headers.items():
+            response.headers.setdefault(header, value)
+        return response
+
+    range_header = request.headers.get('Range')
+    ranges = None
+    if range_header and request.method in ('GET', 'HEAD') and is_if_range_current(request, etag, last_modified):
+        ranges = parse_range_header(range_header, size)
+
+    if ranges is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    elif not ranges:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(read_range(full_path, start, end), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    else:
+        boundary = secrets.token_hex(16)
+        parts = [
+            (
+                f'--{boundary}\r\nContent-Type: {content_type}\r\nContent-Range: bytes {start}-{end}/{size}\r\n\r\n'.encode(),
+                start,
+                end
+            )
+            for start, end in ranges
+        ]
+        closing = f'--{boundary}--\r\n'.encode()
+        response = StreamingHttpResponse(
+            read_ranges(full_path, parts, closing),
+            status=206,
+            content_type=f'multipart/byteranges; boundary={boundary}'
+        )
+        response['Content-Length'] = sum(len(part_header) + end - start + 1 + 2 for part_header, start, end in parts) + len(closing)
+
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def media_response(request, path):
+    """
+    Returns a response that sends the media file at the given path (relative to MEDIA_ROOT)
+    """
+
+    full_path = os.path.join(settings.MEDIA_ROOT, path)
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+
+    if settings.MEDIA_SERVER == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = iri_to_uri(settings.MEDIA_INTERNAL_URL + path)
+    elif settings.MEDIA_SERVER == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+    elif settings.MEDIA_SERVER is None:
+        response = file_response(request, full_path, content_type)
+    else:
+        raise ImproperlyConfigured(f"MEDIA_SERVER must be 'x-accel-redirect', 'x-sendfile' or None, not {settings.MEDIA_SERVER!r}")
+
+    # Access depends on the user, so the file mustn't be cached by shared caches (e.g. proxies)
+    patch_cache_control(response, private=True)
+    return response
@@ -0,0 +1,18 @@
+from django.core.files.storage import FileSystemStorage
+from . import images
+
+
+class MediaStorage(FileSystemStorage):
+    """
+    Storage of media files that queues each uploaded image to be processed in the background (see images.py)
+
+    Used for all media files, including journal entry images and images uploaded via the rich text editor (see STORAGES in settings.py)
+    """
+
+    def _save(self, name, content):
+        name = super()._save(name, content)
+        if images.is_processed_image(name):
+            # Imported here, as models can't be imported before the app registry is ready (unlike this storage)
+            from .models import ImageProcessingJob
+            ImageProcessingJob.enqueue(name)
+        return name
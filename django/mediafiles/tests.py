@@ -0,0 +1,501 @@
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+from account import lookups
+from core.testing import create_user
+from education.models import JournalEntry
+from health.models import Conversation, Video
+from . import responses, thumbnails
+from .models import ImageProcessingJob, ImageVariant
+from datetime import date, timedelta
+from unittest import mock
+import io
+import os
+import shutil
+import tempfile
+
+
+def create_image(path, color='red', size=(1000, 800), image_format=None, **options):
+    """
+    Save a plain image of the given color and size to path (creating its folder), returning its file size
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.new('RGB', size, color).save(path, image_format, **options)
+    return os.path.getsize(path)
+
+
+class MediaRootMixin:
+    """
+    Mixin for a TestCase that uses an empty, temporary MEDIA_ROOT
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media_root_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_root_override.enable()
+        self.addCleanup(media_root_override.disable)
+
+    def media_path(self, name):
+        return os.path.join(self.media_root, name)
+
+
+class ImageProcessingTest(MediaRootMixin, TestCase):
+    """
+    Tests for images.py and ImageProcessingJob.run()
+    """
+
+    def run_job(self, name):
+        job = ImageProcessingJob.enqueue(name)
+        job.run()
+        job.refresh_from_db()
+        return job
+
+    def test_images_that_only_differ_by_extension_have_separate_variants(self):
+        create_image(self.media_path('education/journal_entry/image/photo.jpg'), 'red')
+        create_image(self.media_path('education/journal_entry/image/photo.png'), 'blue')
+        jpeg_job = self.run_job('education/journal_entry/image/photo.jpg')
+        png_job = self.run_job('education/journal_entry/image/photo.png')
+
+        self.assertEqual((jpeg_job.status, png_job.status), (ImageProcessingJob.STATUS_COMPLETE, ImageProcessingJob.STATUS_COMPLETE))
+        jpeg_variant = jpeg_job.variants.get(width=480)
+        png_variant = png_job.variants.get(width=480)
+        self.assertNotEqual(jpeg_variant.name, png_variant.name)
+        # Each variant is a copy of its own image
+        with Image.open(self.media_path(jpeg_variant.name)) as variant:
+            red, green, blue = variant.convert('RGB').getpixel((10, 10))
+            self.assertGreater(red, blue)
+        with Image.open(self.media_path(png_variant.name)) as variant:
+            red, green, blue = variant.convert('RGB').getpixel((10, 10))
+            self.assertGreater(blue, red)
+
+    def test_variants_are_created_at_each_width_smaller_than_the_image(self):
+        create_image(self.media_path('education/journal_entry/image/photo.jpg'), size=(1000, 500))
+        job = self.run_job('education/journal_entry/image/photo.jpg')
+        self.assertEqual(
+            list(job.variants.values_list('width', 'height')),
+            [(width, width // 2) for width in (480, 960)]
+        )
+
+    def test_uncompressed_png_is_compressed(self):
+        path = self.media_path('education/journal_entry/image/photo.png')
+        size = create_image(path, compress_level=0)
+        self.run_job('education/journal_entry/image/photo.png')
+        self.assertLess(os.path.getsize(path), size)
+        with Image.open(path) as image:
+            self.assertEqual((image.format, image.size), ('PNG', (1000, 800)))
+
+    def test_high_quality_jpeg_is_compressed(self):
+        path = self.media_path('cke_uploads/photo.jpg')
+        size = create_image(path, quality=100)
+        self.run_job('cke_uploads/photo.jpg')
+        self.assertLess(os.path.getsize(path), size)
+
+    def test_compressed_image_is_not_replaced(self):
+        path = self.media_path('education/journal_entry/image/photo.png')
+        create_image(path, optimize=True)
+        with open(path, 'rb') as file:
+            original = file.read()
+        self.run_job('education/journal_entry/image/photo.png')
+        with open(path, 'rb') as file:
+            self.assertEqual(file.read(), original)
+
+    def test_exif_orientation_is_applied_and_exif_removed(self):
+        path = self.media_path('education/journal_entry/image/photo.jpg')
+        exif = Image.Exif()
+        # Rotated 90 degrees, with the location the photo was taken
+        exif[0x0112] = 6
+        exif[0x8825] = {1: 'N', 2: (52.0, 27.0, 0.0)}
+        create_image(path, size=(1000, 800), exif=exif)
+        job = self.run_job('education/journal_entry/image/photo.jpg')
+        self.assertEqual((job.width, job.height), (800, 1000))
+        with Image.open(path) as image:
+            self.assertEqual(image.size, (800, 1000))
+            self.assertFalse(image.getexif())
+
+    @override_settings(IMAGE_MAX_SIZE=(500, 500))
+    def test_large_image_is_resized(self):
+        path = self.media_path('education/journal_entry/image/photo.jpg')
+        create_image(path, size=(1000, 800))
+        job = self.run_job('education/journal_entry/image/photo.jpg')
+        self.assertEqual((job.width, job.height), (500, 400))
+        self.assertEqual(list(job.variants.values_list('width', flat=True)), [480])
+
+    def test_invalid_image_fails(self):
+        path = self.media_path('education/journal_entry/image/photo.jpg')
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as file:
+            file.write(b'Not an image')
+        with self.assertLogs('mediafiles.models', 'ERROR'):
+            job = self.run_job('education/journal_entry/image/photo.jpg')
+        self.assertEqual(job.status, ImageProcessingJob.STATUS_FAILED)
+
+    def test_saved_images_are_queued(self):
+        image_file = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(image_file, 'JPEG')
+        name = default_storage.save('education/journal_entry/image/photo.jpg', ContentFile(image_file.getvalue()))
+        default_storage.save('education/journal_entry/audio/recording.mp3', ContentFile(b'audio'))
+        self.assertEqual(list(ImageProcessingJob.objects.values_list('name', 'status')), [(name, ImageProcessingJob.STATUS_PENDING)])
+
+
+@override_settings(IMAGE_JOB_TIMEOUT=60, IMAGE_JOB_MAX_ATTEMPTS=2)
+class ImageProcessingJobClaimTest(TestCase):
+    """
+    Tests for ImageProcessingJob.claim_next(), including reclaiming jobs whose worker has stopped
+    """
+
+    def create_running_job(self, name, started_seconds_ago, attempts=1):
+        return ImageProcessingJob.objects.create(
+            name=name,
+            status=ImageProcessingJob.STATUS_RUNNING,
+            started=timezone.now() - timedelta(seconds=started_seconds_ago),
+            attempts=attempts
+        )
+
+    def test_claims_pending_job(self):
+        job = ImageProcessingJob.enqueue('cke_uploads/photo.jpg')
+        claimed = ImageProcessingJob.claim_next()
+        self.assertEqual(claimed, job)
+        self.assertEqual((claimed.status, claimed.attempts), (ImageProcessingJob.STATUS_RUNNING, 1))
+        self.assertIsNone(ImageProcessingJob.claim_next())
+
+    def test_reclaims_timed_out_job(self):
+        self.create_running_job('cke_uploads/recent.jpg', 30)
+        job = self.create_running_job('cke_uploads/stopped.jpg', 120)
+        claimed = ImageProcessingJob.claim_next()
+        self.assertEqual(claimed, job)
+        self.assertEqual(claimed.attempts, 2)
+        self.assertGreater(claimed.started, timezone.now() - timedelta(seconds=60))
+        self.assertIsNone(ImageProcessingJob.claim_next())
+
+    def test_pending_jobs_are_claimed_before_timed_out_jobs(self):
+        self.create_running_job('cke_uploads/stopped.jpg', 120)
+        job = ImageProcessingJob.enqueue('cke_uploads/photo.jpg')
+        self.assertEqual(ImageProcessingJob.claim_next(), job)
+
+    def test_timed_out_job_fails_after_max_attempts(self):
+        job = self.create_running_job('cke_uploads/stopped.jpg', 120, attempts=2)
+        self.assertIsNone(ImageProcessingJob.claim_next())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (ImageProcessingJob.STATUS_FAILED, 'Timed out'))
+
+
+class ImageVariantSrcsetTest(MediaRootMixin, TestCase):
+    """
+    Tests for ImageVariant.get_srcset() and the image preview in the journal entry admin that uses it
+    """
+
+    name = 'education/journal_entry/image/my photo.jpg'
+
+    def setUp(self):
+        super().setUp()
+        create_image(self.media_path(self.name), size=(1000, 800))
+        job = ImageProcessingJob.enqueue(self.name)
+        job.run()
+
+    def test_srcset(self):
+        self.assertEqual(
+            ImageVariant.get_srcset(self.name),
+            '/media/variants/education/journal_entry/image/my%20photo.jpg_480w.webp 480w, '
+            '/media/variants/education/journal_entry/image/my%20photo.jpg_960w.webp 960w, '
+            '/media/education/journal_entry/image/my%20photo.jpg 1000w'
+        )
+
+    def test_unprocessed_image_has_no_srcset(self):
+        self.assertEqual(ImageVariant.get_srcset('education/journal_entry/image/other.jpg'), '')
+
+    def test_journal_entry_change_page_shows_image_with_srcset(self):
+        admin = create_user('srcset-admin', lookups.ROLE_ADMIN)
+        journal_entry = JournalEntry.objects.create(author=admin, image=self.name)
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:education_journalentry_change', args=[journal_entry.pk]))
+        self.assertContains(response, f'srcset="{ImageVariant.get_srcset(self.name)}"')
+
+
+class MediaPermissionTest(MediaRootMixin, TestCase):
+    """
+    Tests for views.serve_media: media files are only sent to users permitted to view the object they belong to
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = create_user('media-admin', lookups.ROLE_ADMIN)
+        self.author = create_user('media-author', lookups.ROLE_PARTICIPANT, lookups.STRAND_EDUCATION)
+        self.other_participant = create_user('media-other', lookups.ROLE_PARTICIPANT, lookups.STRAND_EDUCATION)
+        self.health_participant = create_user('media-health', lookups.ROLE_PARTICIPANT, lookups.STRAND_HEALTH)
+        for name in (
+            'education/journal_entry/audio/recording.mp3',
+            'health/conversation/audio/conversation.mp3',
+            'health/video/video.mp4',
+            'cke_uploads/photo.jpg',
+        ):
+            os.makedirs(os.path.dirname(self.media_path(name)), exist_ok=True)
+            with open(self.media_path(name), 'wb') as file:
+                file.write(b'media file')
+        JournalEntry.objects.create(author=self.author, audio='education/journal_entry/audio/recording.mp3')
+        Conversation.objects.create(
+            author=self.health_participant,
+            conversation_date=date(2024, 1, 31),
+            conversation_audio='health/conversation/audio/conversation.mp3'
+        )
+        Video.objects.create(title='Video', video='health/video/video.mp4')
+
+    def get(self, user, name):
+        if user:
+            self.client.force_login(user)
+        return self.client.get(f'/media/{name}')
+
+    def test_author_can_view(self):
+        response = self.get(self.author, 'education/journal_entry/audio/recording.mp3')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'media file')
+
+    def test_admin_can_view(self):
+        self.assertEqual(self.get(self.admin, 'education/journal_entry/audio/recording.mp3').status_code, 200)
+        self.assertEqual(self.get(self.admin, 'health/conversation/audio/conversation.mp3').status_code, 200)
+
+    def test_other_participant_cannot_view(self):
+        self.assertEqual(self.get(self.other_participant, 'education/journal_entry/audio/recording.mp3').status_code, 404)
+
+    def test_participant_in_other_strand_cannot_view(self):
+        self.assertEqual(self.get(self.health_participant, 'education/journal_entry/audio/recording.mp3').status_code, 404)
+        self.assertEqual(self.get(self.author, 'health/conversation/audio/conversation.mp3').status_code, 404)
+
+    def test_anonymous_user_is_sent_to_login(self):
+        response = self.get(None, 'education/journal_entry/audio/recording.mp3')
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith(reverse('admin:login')))
+
+    def test_file_without_object_cannot_be_viewed(self):
+        with open(self.media_path('education/journal_entry/audio/orphan.mp3'), 'wb') as file:
+            file.write(b'media file')
+        self.assertEqual(self.get(self.admin, 'education/journal_entry/audio/orphan.mp3').status_code, 404)
+
+    def test_path_traversal_is_denied(self):
+        for name in (
+            '../core/settings.py',
+            'education/journal_entry/audio/../../../../core/settings.py',
+            'education/journal_entry/audio/%2e%2e/%2e%2e/%2e%2e/%2e%2e/core/settings.py',
+            '/etc/passwd',
+        ):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(self.admin, name).status_code, 404)
+
+    def test_rich_text_editor_uploads_can_be_viewed_by_all_users(self):
+        for user in (self.admin, self.author, self.health_participant):
+            with self.subTest(user=user.username):
+                self.assertEqual(self.get(user, 'cke_uploads/photo.jpg').status_code, 200)
+        self.assertEqual(self.get(self.admin, 'cke_uploads/missing.jpg').status_code, 404)
+
+    def test_objects_not_in_admin_can_only_be_viewed_by_admins(self):
+        self.assertEqual(self.get(self.admin, 'health/video/video.mp4').status_code, 200)
+        self.assertEqual(self.get(self.health_participant, 'health/video/video.mp4').status_code, 404)
+
+    def test_image_variants_can_be_viewed_by_the_same_users_as_the_image(self):
+        name = 'education/journal_entry/image/photo.jpg'
+        create_image(self.media_path(name))
+        JournalEntry.objects.create(author=self.author, image=name)
+        ImageProcessingJob.enqueue(name).run()
+        variant = ImageVariant.objects.get(job__name=name, width=480)
+        self.assertEqual(self.get(self.author, variant.name).status_code, 200)
+        self.assertEqual(self.get(self.other_participant, variant.name).status_code, 404)
+        self.assertEqual(self.get(self.admin, 'variants/education/journal_entry/image/missing.jpg_480w.webp').status_code, 404)
+
+
+class ParseRangeHeaderTest(SimpleTestCase):
+    """
+    Tests for responses.parse_range_header()
+    """
+
+    def test_ranges(self):
+        for header, ranges in (
+            ('bytes=0-9', [(0, 9)]),
+            ('bytes=0-', [(0, 99)]),
+            ('bytes=90-200', [(90, 99)]),
+            ('bytes=-10', [(90, 99)]),
+            ('bytes=-200', [(0, 99)]),
+            ('bytes=50-59, 0-9', [(0, 9), (50, 59)]),
+            ('bytes=0-10,5-20,22-30', [(0, 20), (22, 30)]),
+            ('bytes=0-4,5-9', [(0, 9)]),
+            ('bytes=0-9,100-110', [(0, 9)]),
+        ):
+            with self.subTest(header=header):
+                self.assertEqual(responses.parse_range_header(header, 100), ranges)
+
+    def test_unsatisfiable_ranges(self):
+        for header in ('bytes=100-', 'bytes=100-110,200-', 'bytes=-0'):
+            with self.subTest(header=header):
+                self.assertEqual(responses.parse_range_header(header, 100), [])
+
+    def test_invalid_headers_are_ignored(self):
+        for header in ('items=0-9', 'bytes=9-0', 'bytes=a-b', 'bytes=-', 'bytes=0-9,', '0-9'):
+            with self.subTest(header=header):
+                self.assertIsNone(responses.parse_range_header(header, 100))
+
+    def test_too_many_ranges_are_ignored(self):
+        ranges = ','.join(f'{i}-{i}' for i in range(0, responses.MAX_RANGES * 2, 2))
+        self.assertEqual(len(responses.parse_range_header(f'bytes={ranges}', 100)), responses.MAX_RANGES)
+        self.assertIsNone(responses.parse_range_header(f'bytes={ranges},90-99', 100))
+
+
+class FileResponseTest(SimpleTestCase):
+    """
+    Tests for responses.file_response() and responses.is_if_range_current()
+    """
+
+    content = bytes(range(100))
+
+    def setUp(self):
+        file = tempfile.NamedTemporaryFile(delete=False)
+        file.write(self.content)
+        file.close()
+        self.addCleanup(os.remove, file.name)
+        self.path = file.name
+        stat = os.stat(self.path)
+        self.etag = responses.get_etag(stat)
+        self.last_modified = http_date(int(stat.st_mtime))
+
+    def get(self, **headers):
+        request = RequestFactory().get('/media/file.bin', headers=headers)
+        response = responses.file_response(request, self.path, 'application/octet-stream')
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    def test_whole_file(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['ETag'], self.etag)
+
+    def test_single_range(self):
+        response, body = self.get(Range='bytes=-10')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.content[90:])
+        self.assertEqual(response['Content-Range'], 'bytes 90-99/100')
+        self.assertEqual(int(response['Content-Length']), len(body))
+
+    def test_multiple_ranges(self):
+        response, body = self.get(Range='bytes=0-4,10-11,3-6')
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges; boundary='))
+        self.assertEqual(int(response['Content-Length']), len(body))
+        boundary = response['Content-Type'].partition('boundary=')[2].encode()
+        parts = body.split(b'--' + boundary)
+        self.assertEqual(parts[-1], b'--\r\n')
+        self.assertIn(b'Content-Range: bytes 0-6/100\r\n\r\n' + self.content[0:7] + b'\r\n', parts[1])
+        self.assertIn(b'Content-Range: bytes 10-11/100\r\n\r\n' + self.content[10:12] + b'\r\n', parts[2])
+        self.assertEqual(len(parts), 4)
+
+    def test_unsatisfiable_range(self):
+        response, body = self.get(Range='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_too_many_ranges_sends_whole_file(self):
+        ranges = ','.join(f'{i}-{i}' for i in range(0, (responses.MAX_RANGES + 1) * 2, 2))
+        response, body = self.get(Range=f'bytes={ranges}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+
+    def test_if_range_with_current_etag_or_date_sends_range(self):
+        for if_range in (self.etag, self.last_modified):
+            with self.subTest(if_range=if_range):
+                response, body = self.get(Range='bytes=0-9', **{'If-Range': if_range})
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(body, self.content[:10])
+
+    def test_if_range_with_old_etag_or_date_sends_whole_file(self):
+        for if_range in ('"old"', f'W/{self.etag}', http_date(0)):
+            with self.subTest(if_range=if_range):
+                response, body = self.get(Range='bytes=0-9', **{'If-Range': if_range})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(body, self.content)
+
+    def test_not_modified(self):
+        response, body = self.get(**{'If-None-Match': self.etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], self.etag)
+
+
+class ThumbnailTest(MediaRootMixin, TestCase):
+    """
+    Tests for thumbnails.py and views.serve_thumbnail
+    """
+
+    name = 'education/journal_entry/image/photo.jpg'
+
+    def setUp(self):
+        super().setUp()
+        data_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, data_path)
+        data_path_patch = mock.patch.object(thumbnails, 'DATA_PATH', data_path)
+        data_path_patch.start()
+        self.addCleanup(data_path_patch.stop)
+        create_image(self.media_path(self.name), 'red', (1000, 500))
+        self.author = create_user('thumbnail-author', lookups.ROLE_PARTICIPANT, lookups.STRAND_EDUCATION)
+        JournalEntry.objects.create(author=self.author, image=self.name, audio='education/journal_entry/audio/recording.mp3')
+
+    def test_thumbnail_is_created_at_thumbnail_size(self):
+        thumbnail_path = thumbnails.get_thumbnail(self.media_path(self.name))
+        with Image.open(thumbnail_path) as thumbnail:
+            self.assertEqual(thumbnail.size, (100, 100))
+            self.assertEqual(thumbnail.format, thumbnails.THUMBNAIL_FORMAT)
+
+    def test_thumbnail_is_reused(self):
+        thumbnail_path = thumbnails.get_thumbnail(self.media_path(self.name))
+        with mock.patch.object(thumbnails, 'create_thumbnail') as create_thumbnail:
+            self.assertEqual(thumbnails.get_thumbnail(self.media_path(self.name)), thumbnail_path)
+        create_thumbnail.assert_not_called()
+
+    def test_thumbnail_is_created_again_when_image_changes(self):
+        thumbnail_path = thumbnails.get_thumbnail(self.media_path(self.name))
+        create_image(self.media_path(self.name), 'blue', (500, 1000))
+        new_thumbnail_path = thumbnails.get_thumbnail(self.media_path(self.name))
+        self.assertNotEqual(new_thumbnail_path, thumbnail_path)
+        with Image.open(new_thumbnail_path) as thumbnail:
+            red, green, blue = thumbnail.convert('RGB').getpixel((50, 50))
+        self.assertGreater(blue, 200)
+        self.assertLess(red, 50)
+
+    def test_file_that_is_not_an_image_has_no_thumbnail(self):
+        with open(self.media_path('education/journal_entry/image/not-an-image.jpg'), 'wb') as file:
+            file.write(b'not an image')
+        self.assertIsNone(thumbnails.get_thumbnail(self.media_path('education/journal_entry/image/not-an-image.jpg')))
+
+    def test_least_recently_used_thumbnails_are_evicted(self):
+        old_thumbnail_path = thumbnails.get_thumbnail(self.media_path(self.name))
+        os.utime(old_thumbnail_path, (0, 0))
+        create_image(self.media_path('education/journal_entry/image/other.jpg'), 'blue')
+        new_thumbnail_path = thumbnails.get_thumbnail(self.media_path('education/journal_entry/image/other.jpg'))
+        with self.settings(THUMBNAIL_CACHE_MAX_SIZE=os.path.getsize(new_thumbnail_path)):
+            thumbnails.evict()
+        self.assertFalse(os.path.exists(old_thumbnail_path))
+        self.assertTrue(os.path.exists(new_thumbnail_path))
+
+    def test_author_can_view_thumbnail(self):
+        self.client.force_login(self.author)
+        response = self.client.get(thumbnails.get_thumbnail_url(self.name))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], thumbnails.THUMBNAIL_CONTENT_TYPE)
+        self.assertIn('private', response['Cache-Control'])
+        b''.join(response.streaming_content)
+
+    def test_other_participant_cannot_view_thumbnail(self):
+        self.client.force_login(create_user('thumbnail-other', lookups.ROLE_PARTICIPANT, lookups.STRAND_EDUCATION))
+        self.assertEqual(self.client.get(thumbnails.get_thumbnail_url(self.name)).status_code, 404)
+
+    def test_anonymous_user_is_sent_to_login(self):
+        self.assertEqual(self.client.get(thumbnails.get_thumbnail_url(self.name)).status_code, 302)
+
+    def test_files_that_are_not_images_have_no_thumbnail_url(self):
+        # Even if the file is an image, it's only sent if it belongs to an image field
+        create_image(self.media_path('education/journal_entry/audio/recording.mp3'), image_format='JPEG')
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(thumbnails.get_thumbnail_url('education/journal_entry/audio/recording.mp3')).status_code, 404)
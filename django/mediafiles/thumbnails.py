@@ -0,0 +1,141 @@
+"""
+Thumbnails of uploaded images (e.g. journal entry images), so that lists of objects in the admin
+don't have to load each full size image
+
+Thumbnails are created when they're first requested (see views.serve_thumbnail) and stored in the 'data' folder of this app,
+in sub folders named after the start of each thumbnail's file name, so that no folder holds too many files.
+Each thumbnail's file name is a hash of the image's name, size and modification time, so a changed image gets a new thumbnail.
+The least recently used thumbnails are deleted once the folder is larger than THUMBNAIL_CACHE_MAX_SIZE (see evict()).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from PIL import features, Image, ImageOps
+import hashlib
+import os
+import time
+import uuid
+
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'thumbnails')
+
+# Image formats that thumbnails are created from (other formats, e.g. EPS, aren't opened at all)
+SOURCE_FORMATS = ['JPEG', 'PNG', 'GIF', 'WEBP', 'BMP', 'TIFF']
+
+# WebP is smaller, but requires Pillow to be built with libwebp
+if features.check('webp'):
+    THUMBNAIL_FORMAT, THUMBNAIL_EXTENSION, THUMBNAIL_CONTENT_TYPE = 'WEBP', 'webp', 'image/webp'
+else:
+    THUMBNAIL_FORMAT, THUMBNAIL_EXTENSION, THUMBNAIL_CONTENT_TYPE = 'JPEG', 'jpg', 'image/jpeg'
+THUMBNAIL_QUALITY = 80
+
+# A used thumbnail's modification time is updated (marking it as recently used) at most once in this many seconds
+TOUCH_INTERVAL = 60 * 60
+# Browsers reuse a thumbnail for this many seconds before checking whether it's changed
+BROWSER_CACHE_MAX_AGE = 60 * 60
+# The cache is checked for thumbnails to evict at most once in this many seconds
+EVICT_INTERVAL = 60 * 5
+
+
+def get_thumbnail_url(name):
+    """
+    Returns the URL of the thumbnail of the media file with the given name (e.g. 'education/journal_entry/image/photo.jpg')
+    """
+
+    return reverse('mediafiles:thumbnail', args=[name])
+
+
+def get_thumbnail_path(full_path):
+    """
+    Returns the path of the thumbnail of the image at the given path, which changes if the image changes
+    """
+
+    stat = os.stat(full_path)
+    key = hashlib.sha256(repr((full_path, stat.st_size, stat.st_mtime_ns, settings.THUMBNAIL_SIZE)).encode()).hexdigest()
+    return os.path.join(DATA_PATH, key[:2], key[2:4], f'{key}.{THUMBNAIL_EXTENSION}')
+
+
+def create_thumbnail(full_path, thumbnail_path):
+    """
+    Create a thumbnail of the image at full_path, cropped to THUMBNAIL_SIZE
+    """
+
+    width, height = settings.THUMBNAIL_SIZE
+    with Image.open(full_path, formats=SOURCE_FORMATS) as image:
+        # Decode JPEGs at a reduced size, which is much quicker for large photos
+        image.draft('RGB', (width * 2, height * 2))
+        # Photos taken on a phone are often stored sideways, with their orientation in the EXIF data
+        image = ImageOps.exif_transpose(image)
+        thumbnail = ImageOps.fit(image, (width, height), method=Image.Resampling.LANCZOS)
+    if THUMBNAIL_FORMAT == 'JPEG':
+        thumbnail = thumbnail.convert('RGB')
+    elif thumbnail.mode not in ('RGB', 'RGBA'):
+        thumbnail = thumbnail.convert('RGBA')
+
+    # Written to a temporary file and then renamed, so a partly written thumbnail is never served
+    os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+    temporary_path = f'{thumbnail_path}.{uuid.uuid4().hex[:8]}.tmp'
+    try:
+        thumbnail.save(temporary_path, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+        os.replace(temporary_path, thumbnail_path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def get_thumbnail(full_path):
+    """
+    Returns the path of the thumbnail of the image at the given path, creating the thumbnail if it doesn't exist yet
+
+    Returns None if a thumbnail can't be created (e.g. the file isn't an image)
+    """
+
+    thumbnail_path = get_thumbnail_path(full_path)
+    try:
+        mtime = os.stat(thumbnail_path).st_mtime
+    except FileNotFoundError:
+        try:
+            create_thumbnail(full_path, thumbnail_path)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            return None
+        if cache.add('mediafiles_thumbnails_evicted', True, EVICT_INTERVAL):
+            evict()
+    else:
+        # Mark the thumbnail as recently used, so it isn't evicted
+        if time.time() - mtime > TOUCH_INTERVAL:
+            try:
+                os.utime(thumbnail_path)
+            except FileNotFoundError:
+                pass
+    return thumbnail_path
+
+
+def evict():
+    """
+    Deletes the least recently used thumbnails until the folder is no larger than THUMBNAIL_CACHE_MAX_SIZE (bytes)
+    """
+
+    files = []
+    for folder, _, file_names in os.walk(DATA_PATH):
+        for file_name in file_names:
+            # Skip thumbnails that are still being written
+            if file_name.endswith('.tmp'):
+                continue
+            path = os.path.join(folder, file_name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+
+    total_size = sum(size for _, size, _ in files)
+    for mtime, size, path in files:
+        if total_size <= settings.THUMBNAIL_CACHE_MAX_SIZE:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+app_name = 'mediafiles'
+
+urlpatterns = [
+    # No files are uploaded to a 'thumbnails' folder, so this doesn't hide any media files
+    path('thumbnails/<path:path>', views.serve_thumbnail, name='thumbnail'),
+    path('<path:path>', views.serve_media, name='media'),
+]
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404
+from django.urls import reverse
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from .models import ImageVariant
+from .owners import get_owner, is_uploaded_by_editor
+from .responses import file_response, media_response
+from . import images, thumbnails
+import os
+import posixpath
+
+
+def get_permitted_file(request, path, image_only=False):
+    """
+    Returns the normalised path and the full path of the media file at the given path,
+    if the current user is permitted to view the object that it belongs to, otherwise raises Http404
+    (so users can't find out which files exist)
+
+    If image_only, only files of image fields (and images uploaded via the rich text editor) are permitted
+    """
+
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('File not found')
+
+    # Variants of an image (see images.py) can be viewed by the same users as the image itself
+    original_path = path
+    if path.startswith(images.VARIANTS_FOLDER):
+        variant = ImageVariant.objects.filter(name=path).select_related('job').first()
+        if variant is None:
+            raise Http404('File not found')
+        original_path = variant.job.name
+
+    if not is_uploaded_by_editor(original_path) and get_owner(request, original_path, image_only) is None:
+        raise Http404('File not found')
+    if not os.path.isfile(full_path):
+        raise Http404('File not found')
+    return path, full_path
+
+
+def serve_media(request, path):
+    """
+    Send a media file (user uploaded content), if the current user is permitted to view the object that it belongs to
+    """
+
+    if not request.user.is_authenticated:
+        return redirect_to_login(request.get_full_path(), reverse('admin:login'))
+
+    path, full_path = get_permitted_file(request, path)
+    return media_response(request, path)
+
+
+def serve_thumbnail(request, path):
+    """
+    Send the thumbnail of an image (see thumbnails.py), if the current user is permitted to view the image
+    """
+
+    if not request.user.is_authenticated:
+        return redirect_to_login(request.get_full_path(), reverse('admin:login'))
+
+    path, full_path = get_permitted_file(request, path, image_only=True)
+    thumbnail_path = thumbnails.get_thumbnail(full_path)
+    if thumbnail_path is None:
+        raise Http404('File not found')
+
+    # Thumbnails are small, so are sent by Django (unlike other media files)
+    response = file_response(request, thumbnail_path, thumbnails.THUMBNAIL_CONTENT_TYPE)
+    patch_cache_control(response, private=True, max_age=thumbnails.BROWSER_CACHE_MAX_AGE)
+    return response